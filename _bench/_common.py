@@ -0,0 +1,125 @@
+#-----------------------------------------------------------------
+# _common.py
+#
+# Helpers shared by the benchmarks in this directory. Like the
+# generators in _gen/, the benchmarks are meant to be run from
+# within this directory, with the package checked out as mlfi:
+#
+#   cd _bench && python bench_list_rules.py
+#
+# Copyright (C) 2014, Linh Vu Hong
+#-----------------------------------------------------------------
+import sys
+import time
+
+# ply imports the generated table modules by their top-level name
+sys.path.insert(0, "..")
+sys.path.insert(0, "../..")
+
+# a few payloads taken from test.annot
+_TYPES = [
+    "int",
+    "unit",
+    "t Dynamic_gui.ItemPointer.ip_map_item list",
+    "int Dynamic_gui.ItemPointer.field_k Dynamic_gui.ItemPointer.item_pointer",
+    "(t, int) Mlfi_type_path.field ->\n"
+    "  int Dynamic_gui.ItemPointer.field_k Dynamic_gui.ItemPointer.item_pointer ->\n"
+    "  t Dynamic_gui.ItemPointer.ip_map_item",
+]
+
+# width of a synthetic source line, in bytes
+LINE_WIDTH = 40
+
+
+def _position(filename, line, cnum):
+    bol = (line - 1) * LINE_WIDTH
+    return '"%s" %d %d %d' % (filename, line, bol, cnum)
+
+
+def _annotation(kind, payload):
+    return "%s(\n  %s\n)" % (kind, payload)
+
+
+def synth_blocks(nblocks, filename="bench_unit.mf"):
+    """ Yields the text of nblocks annotation blocks.
+
+        Every source line holds an application `f x` typed like the
+        compiler does it: one block for `f`, one for `x` and one
+        enclosing block for the application, so the spans are
+        properly nested.
+    """
+    ntypes = len(_TYPES)
+    for i in range(nblocks):
+        line, k = divmod(i, 3)
+        line += 1
+        bol = (line - 1) * LINE_WIDTH
+        if k == 0:
+            begin, end = bol + 2, bol + 8
+            annots = [_annotation("type", _TYPES[line % ntypes])]
+        elif k == 1:
+            begin, end = bol + 9, bol + 15
+            annots = [
+                _annotation("type", _TYPES[(line + 1) % ntypes]),
+                _annotation("ident", "int_ref Bench.x %s %s" % (
+                    _position(filename, 1, 4), _position(filename, 1, 5)))]
+        else:
+            begin, end = bol + 2, bol + 15
+            annots = [
+                _annotation("call", "stack"),
+                _annotation("type", _TYPES[(line + 2) % ntypes])]
+        yield "%s %s\n%s\n" % (
+            _position(filename, line, begin),
+            _position(filename, line, end),
+            "\n".join(annots))
+
+
+def synth_annot(nblocks, filename="bench_unit.mf"):
+    """ Returns the text of an annotation file with nblocks blocks.
+    """
+    return "".join(synth_blocks(nblocks, filename))
+
+
+def best_of(repeat, func, *args, **kwargs):
+    """ Calls func repeat times and returns the best wall-clock time
+        in seconds together with the result of the last call.
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.time()
+        result = func(*args, **kwargs)
+        elapsed = time.time() - t0
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def block_key(block):
+    """ A comparable summary of an ast.Block.
+    """
+    return (
+        (block.start.filename, block.start.line, block.start.column,
+         block.start.offset),
+        (block.end.filename, block.end.line, block.end.column,
+         block.end.offset),
+        tuple((a.type, a.data) for a in block.annotations))
+
+
+def block_records(blocks, join="\n".join):
+    """ Turns blocks into compact records
+        (start line, start column, end line, end column, data),
+        where data is the join of the type payloads of a block.
+        Blocks without a type annotation are left out.
+    """
+    for b in blocks:
+        data = [a.data for a in b.annotations if a.type == "type"]
+        if data:
+            yield (b.start.line, b.start.column, b.end.line, b.end.column,
+                   join(data))
+
+
+def read_test_annot():
+    """ Returns the content of test.annot at the package root.
+    """
+    with open("../test.annot", "r") as f:
+        return f.read()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_ast_layout.py
+#
+# Memory (traced with tracemalloc) held by the AST of test.annot
+# scaled up 1000 times, and the time to build it, for each node
+# layout of _gen/_ast_gen.py.
+#-----------------------------------------------------------------
+import io
+import sys
+import time
+import tracemalloc
+import types
+
+from _common import read_test_annot, block_key
+sys.path.insert(0, "../_gen")
+from _ast_gen import ASTCodeGenerator
+from mlfi import annotscanner
+
+
+def load_ast(layout):
+    """ Generates the AST module for layout and imports it.
+    """
+    buf = io.StringIO()
+    ASTCodeGenerator('../_gen/_ast.cfg', layout).generate(buf)
+    module = types.ModuleType('annotast_' + layout)
+    exec(buf.getvalue(), module.__dict__)
+    return module
+
+
+if __name__ == "__main__":
+    text = read_test_annot() * 1000
+    scanner = annotscanner.AnnotScanner()
+    print("{0} MB of text".format(len(text) // 10 ** 6))
+    print("{0:>8} {1:>10} {2:>10} {3:>12}".format(
+        "layout", "time (s)", "AST (MB)", "bytes/block"))
+    keys = None
+    for layout in ('dict', 'slots', 'tuple'):
+        # the scanner builds its nodes from the module it imported
+        annotscanner.ast = load_ast(layout)
+        tracemalloc.start()
+        t0 = time.time()
+        af = scanner.parse(text, 'x.annot')
+        elapsed = time.time() - t0
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        nblocks = len(af.blocks)
+        print("{0:>8} {1:>10.3f} {2:>10.1f} {3:>12.0f}".format(
+            layout, elapsed, size / 1e6, size / nblocks))
+        if keys is None:
+            keys = [block_key(b) for b in af.blocks[:1000]]
+        assert keys == [block_key(b) for b in af.blocks[:1000]]
+        del af
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_cmt.py
+#
+# Time to load the interval tree of the same synthetic module from
+# its .annot file and from its .cmt file, and their sizes. There is
+# no compiler at hand, so the .cmt is marshaled here: a typed tree
+# reduced to the expressions of the .annot, with shared types and
+# environments like the compiler writes them. The types read back
+# must be the ones of the .annot.
+#-----------------------------------------------------------------
+import os
+import shutil
+import struct
+import tempfile
+import time
+
+from _common import synth_blocks, LINE_WIDTH
+from mlfi.annotcmt import Block, cmt_records
+from mlfi.annotindex import block_entries, entry_payload
+from mlfi.annotstandalone import StandaloneAnnotParser
+from mlfi.intervaltree import intervaltree
+
+
+def block(tag, *fields):
+    b = Block(tag, len(fields))
+    b.fields[:] = fields
+    return b
+
+
+def marshal(value):
+    """ The Marshal data of value, in the shortest codes like OCaml
+        writes them, sharing the blocks and strings that are the same
+        Python objects.
+    """
+    out = bytearray()
+    objects = {}
+    stack = [value]
+    while stack:
+        v = stack.pop()
+        if type(v) is int:
+            if 0 <= v < 0x40:
+                out.append(0x40 + v)
+            elif -0x80 <= v < 0x80:
+                out += struct.pack('>Bb', 0x0, v)
+            elif -0x8000 <= v < 0x8000:
+                out += struct.pack('>Bh', 0x1, v)
+            else:
+                out += struct.pack('>Bi', 0x2, v)
+            continue
+        if id(v) in objects:
+            offset = len(objects) - objects[id(v)]
+            if offset < 0x100:
+                out += struct.pack('>BB', 0x4, offset)
+            elif offset < 0x10000:
+                out += struct.pack('>BH', 0x5, offset)
+            else:
+                out += struct.pack('>BI', 0x6, offset)
+            continue
+        if type(v) is bytes:
+            objects[id(v)] = len(objects)
+            if len(v) < 0x20:
+                out.append(0x20 + len(v))
+            elif len(v) < 0x100:
+                out += struct.pack('>BB', 0x9, len(v))
+            else:
+                out += struct.pack('>BI', 0xA, len(v))
+            out += v
+            continue
+        if v.fields:
+            objects[id(v)] = len(objects)
+        if v.tag < 16 and len(v.fields) < 8:
+            out.append(0x80 + v.tag + (len(v.fields) << 4))
+        else:
+            out += struct.pack('>BI', 0x8, (len(v.fields) << 10) | v.tag)
+        stack.extend(reversed(v.fields))
+    return struct.pack('>IIIII', 0x8495A6BE, len(out), len(objects), 0, 0) + bytes(out)
+
+
+class Types(object):
+    """ Builds the type_expr values of the payloads of _TYPES.
+    """
+    def __init__(self):
+        self.idents = {}
+        self.count = 0
+
+    def type_expr(self, desc):
+        self.count += 1
+        return block(0, desc, 100000000, 0, self.count)
+
+    def path(self, name):
+        parts = name.split('.')
+        if parts[0] not in self.idents:
+            self.idents[parts[0]] = block(0, parts[0].encode(), len(self.idents))
+        p = block(0, self.idents[parts[0]])
+        for part in parts[1:]:
+            p = block(1, p, part.encode())
+        return p
+
+    def constr(self, name, *args):
+        items = 0
+        for a in reversed(args):
+            items = block(0, a, items)
+        return self.type_expr(block(3, self.path(name), items, block(0, 0)))
+
+    def arrow(self, arg, res):
+        return self.type_expr(block(1, 0, arg, res, 0))
+
+    def payloads(self):
+        t = self.constr('t')
+        item = self.constr('Dynamic_gui.ItemPointer.ip_map_item', t)
+        pointer = self.constr('Dynamic_gui.ItemPointer.item_pointer',
+                              self.constr('Dynamic_gui.ItemPointer.field_k',
+                                          self.constr('int')))
+        return [
+            self.constr('int'),
+            self.constr('unit'),
+            self.constr('list', item),
+            pointer,
+            self.arrow(self.constr('Mlfi_type_path.field', t, self.constr('int')),
+                       self.arrow(pointer, item)),
+        ]
+
+
+def synth_cmt(nblocks, filename="bench_unit.mf"):
+    """ The .cmt data of the expressions of synth_blocks.
+    """
+    types = Types().payloads()
+    fname = filename.encode()
+    env = block(0, block(0, 0, b'Stdlib'), 0)
+    exps = 0
+    for i in reversed(range(nblocks)):
+        line, k = divmod(i, 3)
+        line += 1
+        bol = (line - 1) * LINE_WIDTH
+        (begin, end) = [(bol + 2, bol + 8), (bol + 9, bol + 15), (bol + 2, bol + 15)][k]
+        loc = block(0, block(0, fname, line, bol, begin),
+                    block(0, fname, line, bol, end), 0)
+        exp = block(0, block(0, i), loc, 0, types[(line + k) % len(types)], env, 0)
+        exps = block(0, exp, exps)
+    infos = block(0, b'Bench_unit', block(1, exps), 0, env)
+    return b'Caml1999T031' + marshal(infos)
+
+
+def load(entries):
+    tree = intervaltree.IntervalTree()
+    for (start, end, entry) in entries:
+        tree[start:end] = entry
+    return tree
+
+
+def load_annot(path):
+    with open(path) as f:
+        return load(block_entries(StandaloneAnnotParser().iter_blocks(f, path)))
+
+
+def load_cmt(path):
+    return load(cmt_records(path))
+
+
+def types(tree):
+    return sorted((i.begin, i.end, ' '.join(entry_payload(i.data, "type").split()))
+                  for i in tree)
+
+
+if __name__ == "__main__":
+    nblocks = 60000
+    tmpdir = tempfile.mkdtemp()
+    try:
+        annot = os.path.join(tmpdir, 'bench_unit.annot')
+        cmt = os.path.join(tmpdir, 'bench_unit.cmt')
+        with open(annot, 'w') as f:
+            for b in synth_blocks(nblocks):
+                f.write(b)
+        with open(cmt, 'wb') as f:
+            f.write(synth_cmt(nblocks))
+        print("{0} blocks".format(nblocks))
+        print("{0:>10} {1:>10} {2:>10}".format("file", "size (MB)", "load (s)"))
+        trees = []
+        for (path, func) in [(annot, load_annot), (cmt, load_cmt)]:
+            t0 = time.time()
+            trees.append(func(path))
+            elapsed = time.time() - t0
+            print("{0:>10} {1:>10.1f} {2:>10.3f}".format(
+                os.path.basename(path)[-5:], os.path.getsize(path) / 1e6, elapsed))
+        assert types(trees[0]) == types(trees[1])
+    finally:
+        shutil.rmtree(tmpdir)
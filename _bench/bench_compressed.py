@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_compressed.py
+#
+# Time to scan a synthetic annotation file stored plain, gzipped and
+# xz-compressed, read from the local disk and from a slow network
+# filesystem simulated by throttling reads, and peak memory (traced
+# with tracemalloc) of the streaming decompression. The peak of xz
+# is the dictionary of the decoder (8 MB with the default preset).
+#-----------------------------------------------------------------
+import builtins
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from _common import block_records, synth_blocks
+from mlfi.annotscanner import AnnotScanner, open_annot
+
+
+class ThrottledFile(io.RawIOBase):
+    """ A file read at no more than bandwidth bytes per second.
+    """
+    def __init__(self, filename, bandwidth):
+        self.raw = io.FileIO(filename, 'r')
+        self.bandwidth = bandwidth
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = self.raw.readinto(b)
+        time.sleep(float(n) / self.bandwidth)
+        return n
+
+    def close(self):
+        self.raw.close()
+        super(ThrottledFile, self).close()
+
+
+def throttled_open(bandwidth, paths):
+    """ A replacement of open() throttling the reads of paths.
+    """
+    real_open = builtins.open
+
+    def opener(file, mode='r', *args, **kwargs):
+        if file not in paths:
+            return real_open(file, mode, *args, **kwargs)
+        f = io.BufferedReader(ThrottledFile(file, bandwidth))
+        return f if 'b' in mode else io.TextIOWrapper(f)
+    return opener
+
+
+def scan(path):
+    """ Scans path and returns a digest of its records, which are
+        not kept, so the peak memory is the one of the reading.
+    """
+    digest = 0
+    with open_annot(path) as f:
+        for record in block_records(AnnotScanner().iter_blocks(f, path)):
+            digest = hash((digest, record))
+    return digest
+
+
+if __name__ == "__main__":
+    nblocks = 60000
+    bandwidth = 10e6
+    real_open = builtins.open
+    tmpdir = tempfile.mkdtemp()
+    try:
+        plain = os.path.join(tmpdir, 'x.annot')
+        with open(plain, 'w') as f:
+            for block in synth_blocks(nblocks):
+                f.write(block)
+        paths = [plain]
+        for (suffix, module) in [('.gz', gzip), ('.xz', lzma)]:
+            paths.append(plain + suffix)
+            with open(plain, 'rb') as src, module.open(paths[-1], 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+
+        size = os.path.getsize(plain)
+        print("{0} blocks, {1:.1f} MB, slow filesystem at {2:.0f} MB/s".format(
+            nblocks, size / 1e6, bandwidth / 1e6))
+        print("{0:>10} {1:>10} {2:>10} {3:>10} {4:>10} {5:>10}".format(
+            "file", "size (MB)", "local (s)", "slow (s)", "MB/s slow", "peak (MB)"))
+        expected = None
+        for path in paths:
+            t0 = time.time()
+            digest = scan(path)
+            local = time.time() - t0
+            tracemalloc.start()
+            scan(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            builtins.open = throttled_open(bandwidth, paths)
+            try:
+                t0 = time.time()
+                scan(path)
+                slow = time.time() - t0
+            finally:
+                builtins.open = real_open
+            if expected is None:
+                expected = digest
+            assert digest == expected
+            print("{0:>10} {1:>10.1f} {2:>10.3f} {3:>10.3f} {4:>10.1f} {5:>10.1f}".format(
+                os.path.basename(path), os.path.getsize(path) / 1e6,
+                local, slow, size / 1e6 / slow, peak / 1e6))
+    finally:
+        shutil.rmtree(tmpdir)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_contained.py
+#
+# Latency of strict containment queries, as mlfi makes on a
+# selection, over the nested intervals of bench_static within one
+# spanning the whole file, for selections of one line up to the
+# whole file: in an IntervalTree by filtering the intervals that
+# overlap the range, as search(strict=True) did, by pruning the
+# nodes (Node.search_contained), and in a new StaticIndex, then again
+# with the Intervals it gave kept.
+#-----------------------------------------------------------------
+import random
+import sys
+import time
+
+from _common import LINE_WIDTH
+from bench_static import synth_intervals
+from mlfi.annotindex import StaticIndex
+from mlfi.intervaltree import Interval, IntervalTree
+
+
+def filtered(tree, begin, end):
+    return set(iv for iv in tree.search(begin, end)
+               if iv.begin >= begin and iv.end <= end)
+
+
+def timed(func, *args):
+    t0 = time.time()
+    result = func(*args)
+    return (time.time() - t0, result)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    intervals = synth_intervals(n)
+    size = max(end for (_, end, _) in intervals)
+    intervals.append((0, size, (1, "module")))
+    nlines = size // LINE_WIDTH
+    tree = IntervalTree(Interval(*i) for i in intervals)
+    random.seed(0)
+
+    print("{0} intervals, {1} lines".format(len(intervals), nlines))
+    print("{0:>8} {1:>8} {2:>8} {3:>14} {4:>14} {5:>14} {6:>14}".format(
+        "lines", "queries", "found", "filtered (ms)", "pruned (ms)", "static (ms)", "cached (ms)"))
+    for lines in [1, 10, 100, 1000, 10000, nlines]:
+        lines = min(lines, nlines)
+        nqueries = max(1, min(200, 20000 // lines))
+        ranges = []
+        for _ in range(nqueries):
+            begin = random.randrange(nlines - lines + 1) * LINE_WIDTH
+            ranges.append((begin, begin + lines * LINE_WIDTH))
+        # a new index, whose Intervals are built by the searches
+        # that give them first, and kept for the next ones
+        index = StaticIndex(intervals)
+        times = []
+        results = []
+        for search in [lambda b, e: filtered(tree, b, e),
+                       lambda b, e: tree.search(b, e, strict=True),
+                       lambda b, e: index.search(b, e, strict=True),
+                       lambda b, e: index.search(b, e, strict=True)]:
+            (elapsed, result) = timed(lambda: [search(b, e) for (b, e) in ranges])
+            times.append(elapsed * 1e3 / nqueries)
+            results.append(result)
+        assert results[0] == results[1] == results[2] == results[3]
+        print("{0:>8} {1:>8} {2:>8} {3:>14.3f} {4:>14.3f} {5:>14.3f} {6:>14.3f}".format(
+            lines, nqueries, sum(len(r) for r in results[0]) // nqueries, *times))
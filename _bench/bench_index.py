@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_index.py
+#
+# Time to build and memory (traced with tracemalloc) held by the
+# interval tree of a synthetic annotation file, indexing the type
+# payloads only against every kind of annotation
+# (annotindex.block_entries), and the time of point queries for
+# types on both. Both trees are keyed on offsets.
+#-----------------------------------------------------------------
+import time
+import tracemalloc
+
+from _common import synth_annot, LINE_WIDTH
+from mlfi.annotindex import block_entries, has_kind, entry_payload
+from mlfi.annotstandalone import StandaloneAnnotParser
+from mlfi.intervaltree import intervaltree
+
+
+def type_records(blocks):
+    """ block_entries keeping the joined type payloads only.
+    """
+    for b in blocks:
+        data = [a.data for a in b.annotations if a.type == "type"]
+        if data:
+            yield (b.start.offset, b.end.offset, "\n".join(data))
+
+
+def build(records):
+    tree = intervaltree.IntervalTree()
+    for (start, end, data) in records:
+        tree[start:end] = data
+    return tree
+
+
+def measure(records):
+    """ Builds the tree of the records generator, tracing the
+        records and the tree but not the blocks they are made from.
+    """
+    tracemalloc.start()
+    t0 = time.time()
+    tree = build(records)
+    elapsed = time.time() - t0
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, elapsed, size
+
+
+def query(tree, points, payload):
+    t0 = time.time()
+    found = [sorted(payload(i.data) for i in tree[p]) for p in points]
+    return time.time() - t0, found
+
+
+if __name__ == "__main__":
+    nblocks = 30000
+    blocks = StandaloneAnnotParser().parse(synth_annot(nblocks), 'x.annot').blocks
+    points = [(line - 1) * LINE_WIDTH + col
+              for line in range(1, nblocks // 3, 7) for col in (3, 10, 14)]
+
+    print("{0} blocks, {1} annotations".format(
+        len(blocks), sum(len(b.annotations) for b in blocks)))
+    print("{0:>10} {1:>10} {2:>10} {3:>12} {4:>10}".format(
+        "index", "build (s)", "tree (MB)", "bytes/block", "query (s)"))
+    sizes = []
+    results = []
+    for (name, recs, payload) in [
+            ("type", type_records, str),
+            ("all", block_entries,
+             lambda e: entry_payload(e, "type") if has_kind(e, "type") else "")]:
+        tree, elapsed, size = measure(recs(blocks))
+        qtime, found = query(tree, points, payload)
+        sizes.append(size)
+        results.append(found)
+        print("{0:>10} {1:>10.3f} {2:>10.1f} {3:>12.0f} {4:>10.3f}".format(
+            name, elapsed, size / 1e6, size / len(tree), qtime))
+        del tree
+    # every synthetic block has a type, so the answers are the same
+    assert results[0] == results[1]
+    print("overhead of all kinds: {0:+.1f}%".format(
+        (sizes[1] - sizes[0]) * 100.0 / sizes[0]))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_innermost.py
+#
+# Latency of finding the innermost interval around a point, the one
+# mlfi shows, among the nested intervals of bench_static: by sorting
+# the intervals containing the point by length, as mlfi did, in an
+# IntervalTree and in a StaticIndex, and down the nesting forest of
+# the StaticIndex (StaticIndex.enclosing). Also the time to walk out
+# to the outermost interval.
+#-----------------------------------------------------------------
+import random
+import sys
+import time
+
+from bench_static import synth_intervals
+from mlfi.annotindex import StaticIndex
+from mlfi.intervaltree import Interval, IntervalTree
+
+
+def length(i):
+    return i.end - i.begin
+
+
+def timed(func, *args):
+    t0 = time.time()
+    result = func(*args)
+    return (time.time() - t0, result)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    intervals = synth_intervals(n)
+    size = max(end for (_, end, _) in intervals)
+    random.seed(0)
+    points = [random.randrange(size) for _ in range(20000)]
+
+    (tree_built, tree) = timed(lambda: IntervalTree(Interval(*i) for i in intervals))
+    (static_built, index) = timed(StaticIndex, intervals)
+    print("{0} intervals, {1} points, built in {2:.1f} s (IntervalTree), {3:.1f} s (StaticIndex)".format(
+        n, len(points), tree_built, static_built))
+    print("{0:>28} {1:>12}".format("innermost", "query (us)"))
+    found = []
+    for (name, func) in [
+            ("IntervalTree, sorted", lambda p: sorted(tree[p], key=length)[:1]),
+            ("StaticIndex, sorted", lambda p: sorted(index[p], key=length)[:1]),
+            ("StaticIndex.enclosing", lambda p: index.enclosing(p)[:1])]:
+        (elapsed, result) = min((timed(lambda: [func(p) for p in points]) for _ in range(3)),
+                                key=lambda r: r[0])
+        found.append([(i.begin, i.end) for r in result for i in r])
+        print("{0:>28} {1:>12.2f}".format(name, elapsed * 1e6 / len(points)))
+    assert found[0] == found[1] == found[2]
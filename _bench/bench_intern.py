@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_intern.py
+#
+# Memory (traced with tracemalloc) held by the interval trees of a
+# few synthetic annotation files loaded together, with and without
+# interning their payloads in a PayloadTable, and the time to load
+# them.
+#-----------------------------------------------------------------
+import io
+import time
+import tracemalloc
+
+from _common import synth_annot
+from mlfi.annotindex import PayloadTable, block_entries
+from mlfi.annotstandalone import StandaloneAnnotParser
+from mlfi.intervaltree import intervaltree
+
+
+def load(parser, text, intern):
+    tree = intervaltree.IntervalTree()
+    blocks = parser.iter_blocks(io.StringIO(text), 'x.annot')
+    for (start, end, data) in block_entries(blocks):
+        tree[start:end] = intern(data) if intern else data
+    return tree
+
+
+if __name__ == "__main__":
+    nfiles = 4
+    nblocks = 15000
+    texts = [synth_annot(nblocks, "bench_unit%d.mf" % i) for i in range(nfiles)]
+    parser = StandaloneAnnotParser()
+    print("{0} files of {1} blocks".format(nfiles, nblocks))
+    print("{0:>10} {1:>10} {2:>12}".format("payloads", "load (s)", "trees (MB)"))
+    sizes = []
+    trees = None
+    for (name, table) in [("copied", None), ("interned", PayloadTable())]:
+        intern = table.intern_entry if table else None
+        trees = None
+        tracemalloc.start()
+        t0 = time.time()
+        trees = [load(parser, text, intern) for text in texts]
+        elapsed = time.time() - t0
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        sizes.append(size)
+        print("{0:>10} {1:>10.3f} {2:>12.1f}".format(name, elapsed, size / 1e6))
+    for (k, tree) in enumerate(trees):
+        table.count(k, (iv.data for iv in tree))
+    stats = table.stats()
+    print("")
+    print("{0} payloads, {1} distinct, ratio {2:.1f}, {3:.1f} MB saved".format(
+        stats['lookups'], stats['distinct'], stats['ratio'], stats['saved_bytes'] / 1e6))
+    print("trees: {0:+.1f}%".format((sizes[1] - sizes[0]) * 100.0 / sizes[0]))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_keys.py
+#
+# Time to build (interval by interval, and at once) and query the
+# interval tree of a synthetic annotation file for the kinds of keys
+# of its positions: Points ordered by the Python __cmp__ they had
+# before, Points ordered like tuples, ints packing the line and the
+# column, and absolute offsets, which mlfi uses. Also the time to
+# sort the intervals for a build at once, by Interval.__cmp__ and by
+# a key of native values like Node.from_intervals.
+#-----------------------------------------------------------------
+import time
+from operator import attrgetter
+
+from _common import synth_annot, LINE_WIDTH
+from mlfi.annotstandalone import StandaloneAnnotParser
+from mlfi.intervaltree import intervaltree
+from mlfi.intervaltree.interval import Interval
+from mlfi.point import Point
+
+
+class CmpPoint(Point):
+    """ Point with the comparisons it had before.
+    """
+    __slots__ = ()
+
+    def __eq__(self, other):
+        if isinstance(other, type(self)):
+            return (self.x == other.x and self.y == other.y)
+        else:
+            return NotImplemented
+
+    def __cmp__(self, other):
+        def cmp(a, b):
+            return (a > b) - (a < b)
+        if isinstance(other, type(self)):
+            val = cmp(self.x, other.x)
+            if val == 0:
+                return cmp(self.y, other.y)
+            return val
+        else:
+            return NotImplemented
+
+    def __le__(self, other):
+        return self.__cmp__(other) <= 0
+
+    def __ge__(self, other):
+        return self.__cmp__(other) >= 0
+
+    def __lt__(self, other):
+        return self.__cmp__(other) < 0
+
+    def __gt__(self, other):
+        return self.__cmp__(other) > 0
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+
+# bits of the column in a packed key
+COLUMN_BITS = 16
+
+KEYS = [
+    ("cmp Point", lambda line, col: CmpPoint(line, col)),
+    ("Point", lambda line, col: Point(line, col)),
+    ("packed", lambda line, col: line << COLUMN_BITS | col),
+    ("offset", lambda line, col: (line - 1) * LINE_WIDTH + col),
+]
+
+
+def timed(func, *args):
+    t0 = time.time()
+    result = func(*args)
+    return (time.time() - t0, result)
+
+
+def add_all(intervals):
+    tree = intervaltree.IntervalTree()
+    for iv in intervals:
+        tree.add(iv)
+    return tree
+
+
+def query(tree, points):
+    return [sorted(id(i.data) for i in tree[p]) for p in points]
+
+
+if __name__ == "__main__":
+    nblocks = 30000
+    blocks = StandaloneAnnotParser().parse(synth_annot(nblocks), 'x.annot').blocks
+    positions = [(line, col) for line in range(1, nblocks // 3, 7) for col in (3, 10, 14)]
+
+    print("{0} blocks, {1} queries".format(nblocks, len(positions)))
+    print("{0:>10} {1:>10} {2:>10} {3:>10}".format(
+        "keys", "add (s)", "build (s)", "query (s)"))
+    found = []
+    for (name, key) in KEYS:
+        intervals = [Interval(key(b.start.line, b.start.column),
+                              key(b.end.line, b.end.column), b) for b in blocks]
+        (added, tree) = timed(add_all, intervals)
+        (built, _) = timed(intervaltree.IntervalTree, intervals)
+        (queried, result) = timed(query, tree, [key(line, col) for (line, col) in positions])
+        found.append(result)
+        print("{0:>10} {1:>10.3f} {2:>10.3f} {3:>10.3f}".format(name, added, built, queried))
+    assert all(f == found[0] for f in found)
+
+    intervals = [Interval(b.start.offset, b.end.offset, b) for b in blocks]
+    print("")
+    print("{0:>18} {1:>10}".format("sort", "time (s)"))
+    for (name, func) in [
+            ("Interval.__cmp__", lambda: sorted(intervals)),
+            ("native key", lambda: sorted(intervals, key=attrgetter('begin', 'end')))]:
+        print("{0:>18} {1:>10.3f}".format(name, timed(func)[0]))
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_list_rules.py
+#
+# Parse time of AnnotParser against the number of blocks in the
+# annotation file. With the left-recursive list rules, both the
+# time per block and the depth of the LR stack stay constant.
+#-----------------------------------------------------------------
+from _common import synth_annot, best_of
+from mlfi.annotparser import AnnotParser
+
+
+class DepthAnnotParser(AnnotParser):
+    """ Records the deepest LR stack seen when reducing a block.
+    """
+    max_depth = 0
+
+    def p_block(self, p):
+        AnnotParser.p_block(self, p)
+        self.max_depth = max(self.max_depth, len(self.parser.statestack))
+    p_block.__doc__ = AnnotParser.p_block.__doc__
+
+
+if __name__ == "__main__":
+    parser = DepthAnnotParser(lex_optimize=True, yacc_optimize=True)
+
+    print("{0:>8} {1:>10} {2:>12} {3:>10}".format(
+        "blocks", "parse (s)", "us / block", "LR stack"))
+    for nblocks in (1000, 2000, 4000, 8000, 16000, 32000, 64000):
+        text = synth_annot(nblocks)
+        parser.max_depth = 0
+        elapsed, af = best_of(3, parser.parse, text, 'bench.annot')
+        assert len(af.blocks) == nblocks
+        print("{0:>8} {1:>10.3f} {2:>12.2f} {3:>10}".format(
+            nblocks, elapsed, elapsed / nblocks * 1e6, parser.max_depth))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_mmap.py
+#
+# Memory held by a type index built the way MlfiTypeCommand does
+# it, with the payloads kept as strings against the payloads kept
+# as references to their place in the mapped annotation file, read
+# from the file once it is unmapped.
+#-----------------------------------------------------------------
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _common import synth_blocks
+from mlfi.annotscanner import AnnotScanner, MappedAnnot
+from mlfi.intervaltree import intervaltree
+from mlfi.point import Point
+
+
+def build(blocks, join):
+    tree = intervaltree.IntervalTree()
+    for b in blocks:
+        start = Point(b.start.line, b.start.column)
+        end = Point(b.end.line, b.end.column)
+        data = [a.data for a in b.annotations if a.type == "type"]
+        if data:
+            tree[start:end] = join(data)
+    return tree
+
+
+def measure(func):
+    tracemalloc.start()
+    t0 = time.time()
+    result = func()
+    elapsed = time.time() - t0
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, size, result
+
+
+if __name__ == "__main__":
+    nblocks = 30000
+    fd, path = tempfile.mkstemp(suffix='.annot')
+    with os.fdopen(fd, 'w') as f:
+        for block in synth_blocks(nblocks):
+            f.write(block)
+
+    scanner = AnnotScanner()
+    mapped = MappedAnnot(path)
+    try:
+        def strings():
+            with open(path, 'r') as f:
+                return build(scanner.iter_blocks(f, path), "\n".join)
+
+        def refs():
+            return build(scanner.scan_mapped(mapped), mapped.join)
+
+        print("{0} blocks, {1:.1f} MB".format(nblocks, os.path.getsize(path) / 1e6))
+        print("{0:>8} {1:>10} {2:>12} {3:>14}".format(
+            "payload", "build (s)", "index (MB)", "payloads (MB)"))
+        trees = []
+        for (name, func) in [("str", strings), ("mmap", refs)]:
+            elapsed, size, tree = measure(func)
+            payloads = sum(sys.getsizeof(iv.data) for iv in tree)
+            trees.append(tree)
+            print("{0:>8} {1:>10.3f} {2:>12.1f} {3:>14.1f}".format(
+                name, elapsed, size / 1e6, payloads / 1e6))
+
+        mapped.close()
+        shown = dict(((iv.begin, iv.end), iv.data) for iv in trees[0])
+        for iv in trees[1]:
+            assert shown[(iv.begin, iv.end)] == mapped.payload(iv.data)
+    finally:
+        mapped.close()
+        os.remove(path)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_offsets.py
+#
+# Time to build and query the interval tree of a synthetic
+# annotation file keyed on (line, column) Points, against the
+# absolute offsets of the positions, and the cost of mapping byte
+# offsets to character offsets (annotindex.CharOffsets) for an
+# ASCII and a non-ASCII source.
+#-----------------------------------------------------------------
+import time
+
+from _common import synth_annot, LINE_WIDTH
+from mlfi.annotindex import CharOffsets
+from mlfi.annotstandalone import StandaloneAnnotParser
+from mlfi.intervaltree import intervaltree
+from mlfi.point import Point
+
+
+def build(blocks, key):
+    tree = intervaltree.IntervalTree()
+    for b in blocks:
+        tree[key(b.start):key(b.end)] = b
+    return tree
+
+
+if __name__ == "__main__":
+    nblocks = 30000
+    nlines = nblocks // 3
+    blocks = StandaloneAnnotParser().parse(synth_annot(nblocks), 'x.annot').blocks
+    lines = range(1, nlines, 7)
+
+    print("{0} blocks".format(nblocks))
+    print("{0:>10} {1:>10} {2:>10}".format("keys", "build (s)", "query (s)"))
+    found = []
+    for (name, key, query) in [
+            ("Point", lambda p: Point(p.line, p.column),
+             lambda line, col: Point(line, col)),
+            ("offset", lambda p: p.offset,
+             lambda line, col: (line - 1) * LINE_WIDTH + col)]:
+        t0 = time.time()
+        tree = build(blocks, key)
+        elapsed = time.time() - t0
+        t0 = time.time()
+        result = [sorted(id(i.data) for i in tree[query(line, col)])
+                  for line in lines for col in (3, 10, 14)]
+        qtime = time.time() - t0
+        found.append(result)
+        print("{0:>10} {1:>10.3f} {2:>10.3f}".format(name, elapsed, qtime))
+    assert found[0] == found[1]
+
+    # a source of nlines lines of LINE_WIDTH bytes, with one two-byte
+    # character on every other line
+    ascii_src = (b"x" * (LINE_WIDTH - 1) + b"\n") * nlines
+    wide_src = (b"x" * (LINE_WIDTH - 1) + b"\n" +
+                u"é".encode('utf-8') + b"x" * (LINE_WIDTH - 3) + b"\n") * (nlines // 2)
+    offsets = [b.start.offset for b in blocks] + [b.end.offset for b in blocks]
+    print("")
+    print("{0:>10} {1:>10} {2:>12} {3:>10}".format(
+        "source", "size (MB)", "table (ms)", "map (ms)"))
+    for (name, src) in [("ascii", ascii_src), ("non-ascii", wide_src)]:
+        t0 = time.time()
+        chars = CharOffsets(src)
+        table = time.time() - t0
+        t0 = time.time()
+        if not chars.is_identity():
+            char = chars.char_offset
+            for o in offsets:
+                char(o)
+        maptime = time.time() - t0
+        print("{0:>10} {1:>10.2f} {2:>12.2f} {3:>10.2f}".format(
+            name, len(src) / 1e6, table * 1e3, maptime * 1e3))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_overlap.py
+#
+# Latency of range overlap queries over the nested intervals of
+# bench_static within one spanning the whole file, for ranges of one
+# line up to the whole file: in an IntervalTree by a point search at
+# each boundary in the range, as search() did, and in a single
+# descent (Node.search_range), and in a new StaticIndex, then again
+# with the Intervals it gave kept.
+#-----------------------------------------------------------------
+import random
+import sys
+import time
+
+from _common import LINE_WIDTH
+from bench_static import synth_intervals
+from mlfi.annotindex import StaticIndex
+from mlfi.intervaltree import Interval, IntervalTree
+
+
+def per_boundary(tree, begin, end):
+    root = tree.top_node
+    result = root.search_point(begin, set())
+    table = tree.boundary_table
+    result.update(root.search_overlap(
+        table.iloc[index] for index in range(table.bisect_left(begin), table.bisect_left(end))))
+    return result
+
+
+def timed(func, *args):
+    t0 = time.time()
+    result = func(*args)
+    return (time.time() - t0, result)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    intervals = synth_intervals(n)
+    size = max(end for (_, end, _) in intervals)
+    intervals.append((0, size, (1, "module")))
+    nlines = size // LINE_WIDTH
+    tree = IntervalTree(Interval(*i) for i in intervals)
+    random.seed(0)
+
+    print("{0} intervals, {1} lines".format(len(intervals), nlines))
+    print("{0:>8} {1:>8} {2:>8} {3:>16} {4:>14} {5:>14} {6:>14}".format(
+        "lines", "queries", "found", "boundaries (ms)", "descent (ms)", "static (ms)", "cached (ms)"))
+    for lines in [1, 10, 100, 1000, 10000, nlines]:
+        lines = min(lines, nlines)
+        nqueries = max(1, min(200, 20000 // lines))
+        ranges = []
+        for _ in range(nqueries):
+            begin = random.randrange(nlines - lines + 1) * LINE_WIDTH + random.randrange(LINE_WIDTH)
+            ranges.append((begin, begin + lines * LINE_WIDTH))
+        # a new index, whose Intervals are built by the searches
+        # that give them first, and kept for the next ones
+        index = StaticIndex(intervals)
+        times = []
+        results = []
+        for search in [lambda b, e: per_boundary(tree, b, e),
+                       lambda b, e: tree.search(b, e),
+                       lambda b, e: index.search(b, e),
+                       lambda b, e: index.search(b, e)]:
+            (elapsed, result) = timed(lambda: [search(b, e) for (b, e) in ranges])
+            times.append(elapsed * 1e3 / nqueries)
+            results.append(result)
+        assert results[0] == results[1] == results[2] == results[3]
+        print("{0:>8} {1:>8} {2:>8} {3:>16.3f} {4:>14.3f} {5:>14.3f} {6:>14.3f}".format(
+            lines, nqueries, sum(len(r) for r in results[0]) // nqueries, *times))
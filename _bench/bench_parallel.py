@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_parallel.py
+#
+# Wall-clock time of parsing a synthetic annotation file into
+# block entries in one process, against annotparallel.parse_file
+# with an increasing number of processes: the first call, which
+# starts them, and the next one, which reuses them.
+#-----------------------------------------------------------------
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from _common import synth_blocks
+from mlfi import annotparallel
+from mlfi.annotindex import block_entries
+from mlfi.annotparser import AnnotParser
+from mlfi.annotscanner import AnnotScanner
+
+
+def single(parser, path):
+    with open(path, 'r') as f:
+        return list(block_entries(parser.iter_blocks(f, path)))
+
+
+if __name__ == "__main__":
+    nblocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    fd, path = tempfile.mkstemp(suffix='.annot')
+    with os.fdopen(fd, 'w') as f:
+        for block in synth_blocks(nblocks):
+            f.write(block)
+
+    try:
+        ncpu = multiprocessing.cpu_count()
+        print("{0} blocks, {1:.1f} MB, {2} CPUs".format(
+            nblocks, os.path.getsize(path) / 1e6, ncpu))
+        print("{0:>10} {1:>10} {2:>10} {3:>10} {4:>8}".format(
+            "parser", "processes", "first (s)", "time (s)", "speedup"))
+        counts = sorted(set([1, 2, 4, 8, ncpu]))
+        for (name, parser) in [
+                ("ply", AnnotParser(lex_optimize=True, yacc_optimize=True)),
+                ("scanner", AnnotScanner())]:
+            t0 = time.time()
+            expected = single(parser, path)
+            base = time.time() - t0
+            print("{0:>10} {1:>10} {2:>10} {3:>10.3f} {4:>8.2f}".format(name, "-", "-", base, 1))
+            for n in counts:
+                times = []
+                for _ in range(2):
+                    t0 = time.time()
+                    (records, skipped) = annotparallel.parse_file(path, name, n)
+                    times.append(time.time() - t0)
+                    assert records == expected and not skipped
+                print("{0:>10} {1:>10} {2:>10.3f} {3:>10.3f} {4:>8.2f}".format(
+                    name, n, times[0], times[1], base / times[1]))
+    finally:
+        annotparallel.close_pool()
+        os.remove(path)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_payload.py
+#
+# Lexing time of annotation files whose type payloads are large
+# records of about 10 KB, with the lazy t_VAL regex that AnnotLexer
+# used to have and with its current find() scan. Both must give
+# the same tokens.
+#-----------------------------------------------------------------
+import time
+
+from _common import _position
+from mlfi.annotlexer import AnnotLexer
+
+
+class RegexLexer(AnnotLexer):
+    """ AnnotLexer with the former t_VAL rule.
+    """
+    def t_VAL(self, t):
+        r"\(\n\s+(.|\n)+?\n\)"
+        t.lexer.lineno += t.value.count('\n')
+        t.value = t.value.strip('(').strip(')').strip()
+        return t
+
+
+def record_type(size):
+    """ A record type of about size bytes, one field per line.
+    """
+    fields = []
+    n = 0
+    while n < size:
+        field = "  mutable field_%d : (int * string) list;" % len(fields)
+        fields.append(field)
+        n += len(field) + 1
+    return "{\n%s\n  }" % "\n".join(fields)
+
+
+def synth_large(nblocks, size, filename="bench_unit.mf"):
+    payload = record_type(size)
+    blocks = []
+    for i in range(nblocks):
+        blocks.append("%s %s\ntype(\n  %s\n)\n" % (
+            _position(filename, i + 1, 40 * i),
+            _position(filename, i + 1, 40 * i + 5),
+            payload))
+    return "".join(blocks)
+
+
+def tokens(lexer, text):
+    lexer.input(text)
+    lexer.reset_lineno()
+    result = []
+    while True:
+        tok = lexer.token()
+        if tok is None:
+            return result
+        result.append((tok.type, tok.value, tok.lineno, tok.lexpos))
+
+
+if __name__ == "__main__":
+    def nothing(*args):
+        pass
+
+    lexers = []
+    for (name, cls) in [("regex", RegexLexer), ("find", AnnotLexer)]:
+        lexer = cls(nothing, nothing, nothing)
+        lexer.build(optimize=True, lextab=None)
+        lexers.append((name, lexer))
+
+    print("{0:>8} {1:>8} {2:>8} {3:>10} {4:>10} {5:>8}".format(
+        "payload", "blocks", "MB", "regex (s)", "find (s)", "speedup"))
+    for (size, nblocks) in [(100, 20000), (1000, 2000), (10000, 200)]:
+        text = synth_large(nblocks, size)
+        times = []
+        results = []
+        for (name, lexer) in lexers:
+            t0 = time.time()
+            results.append(tokens(lexer, text))
+            times.append(time.time() - t0)
+        assert results[0] == results[1]
+        print("{0:>8} {1:>8} {2:>8.2f} {3:>10.3f} {4:>10.3f} {5:>7.1f}x".format(
+            size, nblocks, len(text) / 1e6, times[0], times[1],
+            times[0] / times[1]))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_pool.py
+#
+# Cost of a clone against the construction of a parser, and time of
+# parsing from several threads at once through a ParserPool, which
+# must give each thread the blocks it parses alone.
+#-----------------------------------------------------------------
+import threading
+import time
+
+from _common import synth_annot, block_key
+from mlfi.annotparser import AnnotParser
+from mlfi.annotpool import ParserPool
+from mlfi.annotscanner import AnnotScanner
+from mlfi.annotstandalone import StandaloneAnnotParser
+
+_FACTORIES = [
+    ("AnnotParser", lambda: AnnotParser(yacc_debug=False, trusted=True)),
+    ("Standalone", StandaloneAnnotParser),
+    ("Scanner", AnnotScanner),
+]
+
+
+def best(func, repeat=20):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def parse_threads(pool, texts, expected):
+    errors = []
+
+    def work(text):
+        with pool.parser() as parser:
+            keys = [block_key(b) for b in parser.parse(text, 'x.annot').blocks]
+        if keys != expected:
+            errors.append(keys)
+
+    threads = [threading.Thread(target=work, args=(t,)) for t in texts]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    assert not errors
+    return elapsed
+
+
+if __name__ == "__main__":
+    print("{0:>12} {1:>12} {2:>12}".format("", "new (ms)", "clone (ms)"))
+    for (name, factory) in _FACTORIES:
+        parser = factory()
+        print("{0:>12} {1:>12.3f} {2:>12.3f}".format(
+            name, best(factory) * 1e3, best(parser.clone) * 1e3))
+
+    nthreads = 8
+    text = synth_annot(3000)
+    expected = [block_key(b) for b in StandaloneAnnotParser().parse(text, 'x.annot').blocks]
+    print("")
+    print("{0} threads, 3000 blocks each".format(nthreads))
+    print("{0:>12} {1:>12} {2:>12}".format("", "serial (s)", "pool (s)"))
+    for (name, factory) in _FACTORIES:
+        parser = factory()
+        t0 = time.perf_counter()
+        for _ in range(nthreads):
+            assert [block_key(b) for b in parser.parse(text, 'x.annot').blocks] == expected
+        serial = time.perf_counter() - t0
+        pool = ParserPool(factory)
+        pooled = parse_threads(pool, [text] * nthreads, expected)
+        print("{0:>12} {1:>12.3f} {2:>12.3f}".format(name, serial, pooled))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_reindex.py
+#
+# Time to bring the index of a synthetic annotation file up to date
+# after a few of its blocks changed: by parsing the file and building
+# its StaticIndex again, against parsing only the blocks a BlockIndex
+# found changed, and patching the StaticIndex with their records, as
+# mlfi does. Also the number of blocks reused, for edits that keep
+# the length of the source and for one that moves every block, and
+# whether the index was patched or built again.
+#-----------------------------------------------------------------
+import io
+import random
+import re
+import sys
+import time
+
+from _common import synth_annot
+from mlfi.annotindex import BlockIndex, StaticIndex, block_entries
+from mlfi.annotscanner import iter_chunks
+from mlfi.annotstandalone import StandaloneAnnotParser
+
+
+def parse(text):
+    parser = StandaloneAnnotParser()
+    blocks = parser.parse(text, 'x.annot', resilient=True).blocks
+    return (list(block_entries(blocks)), parser.skipped_regions)
+
+
+def rebuild(text):
+    return StaticIndex(parse(text)[0])
+
+
+def update(index, tree, text):
+    (added, removed) = index.update(iter_chunks(io.StringIO(text)), parse)
+    return tree.patched(added, removed)
+
+
+def edit_in_place(text, step):
+    """ Changes the int types of one block in step, keeping the
+        length of the source: the offsets do not move.
+    """
+    blocks = text.split('\n"')
+    for i in range(1, len(blocks), step):
+        blocks[i] = blocks[i].replace('int', 'u32', 1)
+    return '\n"'.join(blocks)
+
+
+def shift(text):
+    """ One more line at the top of the source: every block moves.
+    """
+    return re.sub(r'(\.mf" \d+) (\d+) (\d+)',
+                  lambda m: "%s %d %d" % (m.group(1), int(m.group(2)) + 1, int(m.group(3)) + 1),
+                  text)
+
+
+if __name__ == "__main__":
+    nblocks = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    text = synth_annot(nblocks)
+    print("{0} blocks".format(nblocks))
+    print("{0:>12} {1:>12} {2:>12} {3:>10} {4:>10} {5:>8}".format(
+        "edit", "rebuild (s)", "update (s)", "reused", "parsed", "patched"))
+    points = random.Random(0).sample(range(nblocks * 15), 1000)
+    for (name, new_text) in [
+            ("none", text),
+            ("1/3000", edit_in_place(text, 3000)),
+            ("1/100", edit_in_place(text, 100)),
+            ("1/10", edit_in_place(text, 10)),
+            ("shift", shift(text))]:
+        index = BlockIndex()
+        tree = StaticIndex(index.update(iter_chunks(io.StringIO(text)), parse)[0])
+
+        t0 = time.time()
+        expected = rebuild(new_text)
+        rebuilt = time.time() - t0
+        t0 = time.time()
+        updated_index = update(index, tree, new_text)
+        updated = time.time() - t0
+        assert sorted(updated_index) == sorted(expected)
+        for p in points:
+            assert updated_index.enclosing(p) == expected.enclosing(p)
+            assert updated_index.search(p, p + 20, strict=True) == expected.search(p, p + 20, strict=True)
+        print("{0:>12} {1:>12.3f} {2:>12.3f} {3:>10} {4:>10} {5:>8}".format(
+            name, rebuilt, updated, index.reused, index.parsed,
+            "yes" if updated_index.begins is tree.begins else "no"))
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_scanner.py
+#
+# AnnotScanner against the PLY based AnnotParser, on test.annot
+# and on synthetic annotation files of a few MB. Both must produce
+# the same blocks.
+#-----------------------------------------------------------------
+from _common import synth_annot, best_of, block_key, read_test_annot
+from mlfi.annotparser import AnnotParser
+from mlfi.annotscanner import AnnotScanner
+
+
+if __name__ == "__main__":
+    parser = AnnotParser(lex_optimize=True, yacc_optimize=True)
+    scanner = AnnotScanner()
+
+    inputs = [("test.annot", read_test_annot(), 5)]
+    for nblocks in (10000, 40000, 160000):
+        inputs.append(("synthetic", synth_annot(nblocks), 1))
+
+    print("{0:>12} {1:>8} {2:>8} {3:>10} {4:>12} {5:>8}".format(
+        "input", "MB", "blocks", "ply (s)", "scanner (s)", "speedup"))
+    for (name, text, repeat) in inputs:
+        t_ply, af_ply = best_of(repeat, parser.parse, text, name)
+        t_scan, af_scan = best_of(repeat, scanner.parse, text, name)
+        assert ([block_key(b) for b in af_ply.blocks] ==
+                [block_key(b) for b in af_scan.blocks])
+        print("{0:>12} {1:>8.2f} {2:>8} {3:>10.3f} {4:>12.3f} {5:>7.1f}x".format(
+            name, len(text) / 1e6, len(af_ply.blocks), t_ply, t_scan,
+            t_ply / t_scan))
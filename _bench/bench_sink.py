@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_sink.py
+#
+# Time and peak memory (traced with tracemalloc) of building the
+# records of a synthetic annotation file from the blocks of
+# AnnotParser.iter_blocks, against AnnotSinkParser feeding a sink.
+#-----------------------------------------------------------------
+import os
+import tempfile
+import time
+import tracemalloc
+
+from _common import block_records, synth_blocks
+from mlfi.annotparser import AnnotParser
+from mlfi.annotsinkparser import AnnotSinkParser
+
+
+def from_blocks(parser, path):
+    with open(path, 'r') as f:
+        return list(block_records(parser.iter_blocks(f, path)))
+
+
+def from_sink(parser, path):
+    records = []
+
+    def on_block(sline, scol, eline, ecol, kind, payload, soffset, eoffset):
+        if kind == "type":
+            records.append((sline, scol, eline, ecol, payload))
+
+    parser.on_block = on_block
+    with open(path, 'r') as f:
+        parser.parse_file(f, path)
+    return records
+
+
+def measure(func, parser, path):
+    tracemalloc.start()
+    t0 = time.time()
+    result = func(parser, path)
+    elapsed = time.time() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+if __name__ == "__main__":
+    nblocks = 100000
+    fd, path = tempfile.mkstemp(suffix='.annot')
+    with os.fdopen(fd, 'w') as f:
+        for block in synth_blocks(nblocks):
+            f.write(block)
+
+    try:
+        print("{0} blocks, {1:.1f} MB".format(nblocks, os.path.getsize(path) / 1e6))
+        print("{0:>10} {1:>10} {2:>10}".format("mode", "time (s)", "peak (MB)"))
+        results = []
+        for (mode, func, parser) in [
+                ("ast", from_blocks, AnnotParser(lex_optimize=True, yacc_optimize=True)),
+                ("sink", from_sink, AnnotSinkParser(None, lex_optimize=True, yacc_optimize=True))]:
+            elapsed, peak, result = measure(func, parser, path)
+            results.append(result)
+            print("{0:>10} {1:>10.3f} {2:>10.1f}".format(mode, elapsed, peak / 1e6))
+        # one type annotation per block, so the records are the same
+        assert results[0] == results[1]
+    finally:
+        os.remove(path)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_standalone.py
+#
+# Startup time (import and construction, in a fresh interpreter)
+# and parse time of AnnotParser, AnnotSinkParser and the generated
+# StandaloneAnnotParser.
+#-----------------------------------------------------------------
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import synth_annot, block_key
+from mlfi.annotparser import AnnotParser
+from mlfi.annotstandalone import StandaloneAnnotParser
+
+_STARTUP = r'''
+import sys, time
+sys.path.insert(0, %r)
+t0 = time.perf_counter()
+%s
+print(time.perf_counter() - t0)
+'''
+
+_PARSERS = [
+    ("AnnotParser",
+     "from mlfi.annotparser import AnnotParser\n"
+     "AnnotParser(lex_optimize=True, yacc_optimize=True)"),
+    ("AnnotSinkParser",
+     "from mlfi.annotsinkparser import AnnotSinkParser\n"
+     "AnnotSinkParser(None, lex_optimize=True, yacc_optimize=True)"),
+    ("Standalone",
+     "from mlfi.annotstandalone import StandaloneAnnotParser\n"
+     "StandaloneAnnotParser()"),
+]
+
+
+def startup(code, cwd, repeat=5):
+    """ Best time of code in a fresh interpreter started in cwd.
+    """
+    root = os.path.abspath("../..")
+    times = []
+    for _ in range(repeat):
+        out = subprocess.check_output(
+            [sys.executable, "-c", _STARTUP % (root, code)], cwd=cwd)
+        times.append(float(out.decode().split()[-1]))
+    return min(times)
+
+
+if __name__ == "__main__":
+    # ply imports its tables as top-level modules: they are found when
+    # the interpreter runs in the package directory, and rebuilt (and
+    # written to the working directory) anywhere else, like in the
+    # plugin host
+    scratch = tempfile.mkdtemp()
+    try:
+        print("{0:>16} {1:>18} {2:>18}".format(
+            "startup (ms)", "tables found", "tables rebuilt"))
+        for (name, code) in _PARSERS:
+            found = startup(code, "..")
+            rebuilt = startup(code, scratch)
+            print("{0:>16} {1:>18.1f} {2:>18.1f}".format(
+                name, found * 1e3, rebuilt * 1e3))
+    finally:
+        shutil.rmtree(scratch)
+
+    text = synth_annot(30000)
+    print("")
+    print("{0:>16} {1:>10}".format("parse 30k blocks", "time (s)"))
+    results = []
+    for (name, parser) in [
+            ("AnnotParser", AnnotParser(lex_optimize=True, yacc_optimize=True)),
+            ("Standalone", StandaloneAnnotParser())]:
+        t0 = time.time()
+        af = parser.parse(text, 'x.annot')
+        print("{0:>16} {1:>10.3f}".format(name, time.time() - t0))
+        results.append([block_key(b) for b in af.blocks])
+    assert results[0] == results[1]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_static.py
+#
+# Memory (traced with tracemalloc), build time and query latency of
+# an IntervalTree and of an annotindex.StaticIndex holding the same
+# nested intervals, laid out like the blocks of _common.synth_blocks
+# within definitions of 20 lines: stabbing queries at points, and
+# strict containment queries over ranges of a few lines. Memory is
+# also traced after a first query, for which a StaticIndex makes
+# the table it keeps the Intervals it gives in.
+#-----------------------------------------------------------------
+import random
+import sys
+import time
+import tracemalloc
+
+from _common import LINE_WIDTH
+from mlfi.annotindex import StaticIndex
+from mlfi.intervaltree import Interval, IntervalTree
+
+# lines of a definition
+DEF_LINES = 20
+
+
+def synth_intervals(n):
+    """ n nested intervals of shared data.
+    """
+    entries = [(1, "int"), (1, "unit"), (1, "t list")]
+    intervals = []
+    line = 0
+    while len(intervals) < n:
+        if line % DEF_LINES == 0:
+            end = min(line + DEF_LINES, (n // 3 + 1)) * LINE_WIDTH
+            intervals.append((line * LINE_WIDTH, end, entries[0]))
+        bol = line * LINE_WIDTH
+        for (k, (begin, end)) in enumerate([(2, 8), (9, 15), (2, 15)]):
+            intervals.append((bol + begin, bol + end, entries[(line + k) % 3]))
+        line += 1
+    return intervals[:n]
+
+
+def timed(func, *args):
+    t0 = time.time()
+    result = func(*args)
+    return (time.time() - t0, result)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    intervals = synth_intervals(n)
+    size = max(end for (_, end, _) in intervals)
+    random.seed(0)
+    points = [random.randrange(size) for _ in range(10000)]
+    ranges = [(p, p + random.randrange(1, 5) * LINE_WIDTH) for p in points[:2000]]
+
+    print("{0} intervals, {1} point and {2} range queries".format(n, len(points), len(ranges)))
+    print("{0:>12} {1:>10} {2:>10} {3:>10} {4:>12} {5:>12} {6:>12}".format(
+        "index", "build (s)", "size (MB)", "first (s)", "queried (MB)", "point (us)", "range (us)"))
+    results = []
+    for (name, build) in [
+            ("IntervalTree", lambda: IntervalTree(Interval(*i) for i in intervals)),
+            ("StaticIndex", lambda: StaticIndex(intervals))]:
+        index = None
+        tracemalloc.start()
+        (built, index) = timed(build)
+        size = tracemalloc.get_traced_memory()[0]
+        (first, _) = timed(index.search, points[0])
+        searched = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        (point, found) = timed(lambda: [index[p] for p in points])
+        (strict, contained) = timed(lambda: [index.search(b, e, strict=True) for (b, e) in ranges])
+        results.append((found, contained))
+        print("{0:>12} {1:>10.2f} {2:>10.1f} {3:>10.3f} {4:>12.1f} {5:>12.1f} {6:>12.1f}".format(
+            name, built, size / 1e6, first, searched / 1e6,
+            point * 1e6 / len(points), strict * 1e6 / len(ranges)))
+        index = None
+    assert results[0] == results[1]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_streaming.py
+#
+# Peak memory (traced with tracemalloc) and time of reading a
+# synthetic annotation file whole and parsing it, against
+# streaming its blocks with iter_blocks.
+#-----------------------------------------------------------------
+import os
+import tempfile
+import time
+import tracemalloc
+
+from _common import synth_blocks, block_key
+from mlfi.annotparser import AnnotParser
+from mlfi.annotscanner import AnnotScanner
+
+
+def whole(parser, path):
+    with open(path, 'r') as f:
+        af = parser.parse(f.read(), path)
+    return len(af.blocks), block_key(af.blocks[-1])
+
+
+def streamed(parser, path):
+    count = 0
+    with open(path, 'r') as f:
+        for block in parser.iter_blocks(f, path):
+            count += 1
+            last = block
+    return count, block_key(last)
+
+
+def measure(func, parser, path):
+    tracemalloc.start()
+    t0 = time.time()
+    result = func(parser, path)
+    elapsed = time.time() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+if __name__ == "__main__":
+    nblocks = 100000
+    fd, path = tempfile.mkstemp(suffix='.annot')
+    with os.fdopen(fd, 'w') as f:
+        for block in synth_blocks(nblocks):
+            f.write(block)
+
+    try:
+        print("{0} blocks, {1:.1f} MB".format(nblocks, os.path.getsize(path) / 1e6))
+        print("{0:>10} {1:>12} {2:>10} {3:>10}".format(
+            "parser", "mode", "time (s)", "peak (MB)"))
+        for (name, parser) in [
+                ("ply", AnnotParser(lex_optimize=True, yacc_optimize=True)),
+                ("scanner", AnnotScanner())]:
+            results = []
+            for (mode, func) in [("parse", whole), ("iter_blocks", streamed)]:
+                elapsed, peak, result = measure(func, parser, path)
+                results.append(result)
+                print("{0:>10} {1:>12} {2:>10.3f} {3:>10.1f}".format(
+                    name, mode, elapsed, peak / 1e6))
+            assert results[0] == results[1]
+    finally:
+        os.remove(path)
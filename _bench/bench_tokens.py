@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_tokens.py
+#
+# Token throughput of AnnotLexer on a synthetic annotation file:
+# one AnnotLexer.token() call per token, as yacc used to pull them,
+# against the bulk Lexer.iter_tokens() and tokenize_all(). Then
+# the time of AnnotParser.parse, which feeds yacc the bulk tokens.
+#-----------------------------------------------------------------
+from _common import synth_annot, best_of
+from mlfi.annotlexer import AnnotLexer
+from mlfi.annotparser import AnnotParser
+
+
+def by_call(lexer, text):
+    lexer.input(text)
+    token = lexer.token
+    tokens = []
+    while True:
+        tok = token()
+        if tok is None:
+            return tokens
+        tokens.append(tok)
+
+
+def by_iter(lexer, text):
+    lexer.input(text)
+    return list(lexer.iter_tokens())
+
+
+def by_list(lexer, text):
+    lexer.input(text)
+    return lexer.lexer.tokenize_all()
+
+
+def summary(tokens):
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in tokens]
+
+
+if __name__ == "__main__":
+    def nothing(*args):
+        pass
+
+    lexer = AnnotLexer(nothing, nothing, nothing)
+    lexer.build(optimize=True, lextab=None)
+    text = synth_annot(60000)
+
+    print("{0:>14} {1:>10} {2:>12}".format("mode", "time (s)", "Mtokens/s"))
+    expected = None
+    for (name, func) in [("token()", by_call),
+                         ("iter_tokens()", by_iter),
+                         ("tokenize_all()", by_list)]:
+        lexer.reset_lineno()
+        elapsed, tokens = best_of(3, func, lexer, text)
+        if expected is None:
+            expected = summary(tokens)
+        assert summary(tokens) == expected
+        print("{0:>14} {1:>10.3f} {2:>12.2f}".format(
+            name, elapsed, len(tokens) / elapsed / 1e6))
+
+    parser = AnnotParser(lex_optimize=True, yacc_optimize=True)
+    elapsed, af = best_of(3, parser.parse, text, 'x.annot')
+    print("{0:>14} {1:>10.3f} ({2} blocks)".format(
+        "parse", elapsed, len(af.blocks)))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_trusted.py
+#
+# Construction time of AnnotParser in a fresh interpreter started
+# outside the package, like the plugin host: the default optimized
+# mode, the trusted mode, and the trusted mode with a table cache
+# for tables missing from the package. Lists the files each mode
+# leaves behind.
+#-----------------------------------------------------------------
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+_STARTUP = r'''
+import sys, time
+sys.path.insert(0, %r)
+from mlfi.annotparser import AnnotParser
+t0 = time.perf_counter()
+AnnotParser(%s)
+print(time.perf_counter() - t0)
+'''
+
+_MODES = [
+    ("optimized", "lex_optimize=True, yacc_optimize=True"),
+    ("trusted", "trusted=True"),
+    ("cached", "lextab='nolextab', yacctab='noyacctab', "
+               "trusted=True, tabcache='cache'"),
+]
+
+
+def construct(args, cwd, repeat=5):
+    """ Best time of constructing a parser with args, in a fresh
+        interpreter started in cwd.
+    """
+    root = os.path.abspath("../..")
+    times = []
+    for _ in range(repeat):
+        out = subprocess.check_output(
+            [sys.executable, "-c", _STARTUP % (root, args)], cwd=cwd)
+        times.append(float(out.decode().split()[-1]))
+    return min(times)
+
+
+def written(top):
+    return sorted(os.path.relpath(os.path.join(d, f), top)
+                  for (d, _, files) in os.walk(top) for f in files)
+
+
+if __name__ == "__main__":
+    print("{0:>10} {1:>10}  {2}".format("mode", "time (ms)", "files written"))
+    for (name, args) in _MODES:
+        scratch = tempfile.mkdtemp()
+        try:
+            first = construct(args, scratch, 1)
+            best = construct(args, scratch)
+            print("{0:>10} {1:>10.1f}  {2} (first run {3:.1f} ms)".format(
+                name, best * 1e3, written(scratch) or "-", first * 1e3))
+        finally:
+            shutil.rmtree(scratch)
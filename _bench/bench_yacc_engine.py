@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# bench_yacc_engine.py
+#
+# Time of the ply LR engine on a synthetic annotation file, and the
+# pauses of the garbage collector during the parse (counted with
+# gc.callbacks): AnnotParser, which keeps an AST, and AnnotSinkParser,
+# which keeps nothing, so that only the churn of the parser remains.
+#-----------------------------------------------------------------
+import gc
+import time
+
+from _common import synth_annot
+from mlfi.annotparser import AnnotParser
+from mlfi.annotsinkparser import AnnotSinkParser
+
+
+class GCPauses(object):
+    """ Counts the collections of each generation and their time.
+    """
+    def __init__(self):
+        self.counts = [0, 0, 0]
+        self.total = 0.0
+        self.longest = 0.0
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        else:
+            pause = time.perf_counter() - self._start
+            self.counts[info["generation"]] += 1
+            self.total += pause
+            self.longest = max(self.longest, pause)
+
+
+def measure(parse, text):
+    gc.collect()
+    pauses = GCPauses()
+    gc.callbacks.append(pauses)
+    try:
+        t0 = time.perf_counter()
+        result = parse(text, 'x.annot')
+        elapsed = time.perf_counter() - t0
+    finally:
+        gc.callbacks.remove(pauses)
+    return elapsed, pauses, result
+
+
+if __name__ == "__main__":
+    text = synth_annot(150000)
+    print("{0} MB".format(len(text) // 10 ** 6))
+    print("{0:>8} {1:>9} {2:>18} {3:>10} {4:>12}".format(
+        "parser", "time (s)", "collections 0/1/2", "GC (ms)", "longest (ms)"))
+    for (name, parser) in [
+            ("ast", AnnotParser(lex_optimize=True, yacc_optimize=True)),
+            ("sink", AnnotSinkParser(lambda *args: None,
+                                     lex_optimize=True, yacc_optimize=True))]:
+        best = None
+        for _ in range(3):
+            run = measure(parser.parse, text)
+            if best is None or run[0] < best[0]:
+                best = run
+            del run
+        (elapsed, pauses, result) = best
+        print("{0:>8} {1:>9.3f} {2:>18} {3:>10.1f} {4:>12.1f}".format(
+            name, elapsed, "/".join(str(c) for c in pauses.counts),
+            pauses.total * 1e3, pauses.longest * 1e3))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# check_cmt.py
+#
+# Compiles sources with the ocamlc found in PATH, with -annot and
+# -bin-annot, and checks that the types annotcmt reads from each
+# .cmt are the ones of its .annot. bench_cmt.py only reads back the
+# typed trees it marshals itself; this is the check against the
+# ones a compiler writes, to be run with every compiler version the
+# reader is meant to support:
+#
+#   cd _bench && python check_cmt.py [source.mf ...]
+#
+# Without sources, a small module is compiled. No .cmt is kept in
+# the repository: they are only produced here, by a real compiler.
+#-----------------------------------------------------------------
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import _common  # the package on sys.path
+from mlfi.annotcmt import cmt_records
+from mlfi.annotindex import block_entries, entry_payload, has_kind
+from mlfi.annotstandalone import StandaloneAnnotParser
+
+# a module with polymorphic, recursive, tuple and list types
+SOURCE = """\
+let succ x = x + 1
+let pair a b = (a, b)
+let rec length = function [] -> 0 | _ :: l -> 1 + length l
+let swap (a, b) = (b, a)
+let () = print_int (length [succ 1; fst (swap (pair 2 "two"))])
+"""
+
+
+def normalize(payload):
+    return " ".join(payload.split())
+
+
+def annot_types(path):
+    with open(path, 'r') as f:
+        blocks = StandaloneAnnotParser().parse(f.read(), path).blocks
+    return dict(((start, end), normalize(entry_payload(entry, "type")))
+                for (start, end, entry) in block_entries(blocks)
+                if has_kind(entry, "type"))
+
+
+def cmt_types(path):
+    return dict(((start, end), normalize(entry_payload(entry, "type")))
+                for (start, end, entry) in cmt_records(path))
+
+
+def check(source, tmpdir):
+    """ Compiles source in tmpdir and returns the number of types
+        compared and the mismatches, (start, end, .annot, .cmt).
+    """
+    name = os.path.splitext(os.path.basename(source))[0]
+    shutil.copy(source, tmpdir)
+    subprocess.check_call(
+        ["ocamlc", "-c", "-annot", "-bin-annot", "-impl", os.path.basename(source)],
+        cwd=tmpdir)
+    expected = annot_types(os.path.join(tmpdir, name + ".annot"))
+    found = cmt_types(os.path.join(tmpdir, name + ".cmt"))
+    common = sorted(set(expected) & set(found))
+    mismatches = [(start, end, expected[start, end], found[start, end])
+                  for (start, end) in common
+                  if expected[start, end] != found[start, end]]
+    if len(common) < len(expected):
+        print("{0}: {1} types of the .annot are not in the .cmt".format(
+            source, len(expected) - len(common)))
+    return (len(common), mismatches)
+
+
+if __name__ == "__main__":
+    if not shutil.which("ocamlc"):
+        print("ocamlc not found in PATH")
+        sys.exit(2)
+    print(subprocess.check_output(["ocamlc", "-version"]).decode().strip())
+    tmpdir = tempfile.mkdtemp()
+    try:
+        sources = sys.argv[1:]
+        if not sources:
+            sources = [os.path.join(tmpdir, "src", "check_unit.mf")]
+            os.mkdir(os.path.dirname(sources[0]))
+            with open(sources[0], 'w') as f:
+                f.write(SOURCE)
+        failed = False
+        for source in sources:
+            (compared, mismatches) = check(source, tmpdir)
+            print("{0}: {1} types compared, {2} mismatches".format(
+                source, compared, len(mismatches)))
+            for (start, end, expected, found) in mismatches:
+                print("  {0}-{1}: {2!r} in the .annot, {3!r} in the .cmt".format(
+                    start, end, expected, found))
+            failed = failed or bool(mismatches) or not compared
+        sys.exit(1 if failed else 0)
+    finally:
+        shutil.rmtree(tmpdir)
@@ -15,12 +15,25 @@ from string import Template
 
 
 class ASTCodeGenerator(object):
-    def __init__(self, cfg_filename='_ast.cfg'):
+    def __init__(self, cfg_filename='_ast.cfg', layout='dict'):
         """ Initialize the code generator from a configuration
             file.
+
+            layout:
+                How the nodes hold their entries:
+                'dict'  - plain attributes, with the coord,
+                          bracketed and comments fields
+                'slots' - __slots__ attributes, without the
+                          coord, bracketed and comments fields
+                'tuple' - tuple subclasses with read-only
+                          properties, like namedtuple, without
+                          those fields either
         """
+        if layout not in _LAYOUTS:
+            raise ValueError("Unknown layout: %r" % layout)
         self.cfg_filename = cfg_filename
-        self.node_cfg = [NodeCfg(name, contents)
+        self.layout = layout
+        self.node_cfg = [NodeCfg(name, contents, layout)
             for (name, contents) in self.parse_cfgfile(cfg_filename)]
 
     def generate(self, file=None):
@@ -29,7 +42,10 @@ class ASTCodeGenerator(object):
         src = Template(_PROLOGUE_COMMENT).substitute(
             cfg_filename=self.cfg_filename)
 
-        src += _PROLOGUE_CODE
+        (imports, node_fields) = _LAYOUTS[self.layout]
+        src += Template(_PROLOGUE_CODE).substitute(
+            imports=imports,
+            node_fields=node_fields)
         for node_cfg in self.node_cfg:
             src += node_cfg.generate_source() + '\n\n'
 
@@ -62,9 +78,11 @@ class NodeCfg(object):
         name: node name
         contents: a list of contents - attributes and child nodes
         See comment at the top of the configuration file for details.
+        layout: see ASTCodeGenerator
     """
-    def __init__(self, name, contents):
+    def __init__(self, name, contents, layout='dict'):
         self.name = name
+        self.layout = layout
         self.all_entries = []
         self.attr = []
         self.child = []
@@ -88,6 +106,11 @@ class NodeCfg(object):
         return src
 
     def _gen_init(self):
+        if self.layout == 'slots':
+            return self._gen_slots_init()
+        if self.layout == 'tuple':
+            return self._gen_tuple_init()
+
         src = "class %s(Node):\n" % self.name
 
         if self.all_entries:
@@ -103,6 +126,32 @@ class NodeCfg(object):
 
         return src
 
+    def _gen_slots_init(self):
+        src = "class %s(Node):\n" % self.name
+        src += "    __slots__ = (" + ''.join("%r," % nm for nm in self.all_entries) + ')\n\n'
+        src += "    def __init__(%s):\n" % ', '.join(['self'] + self.all_entries)
+
+        for name in self.all_entries:
+            src += "        self.%s = %s\n" % (name, name)
+        if not self.all_entries:
+            src += "        pass\n"
+
+        return src
+
+    def _gen_tuple_init(self):
+        src = "class %s(Node, tuple):\n" % self.name
+        src += "    __slots__ = ()\n\n"
+        src += "    def __new__(%s):\n" % ', '.join(['cls'] + self.all_entries)
+        src += "        return tuple.__new__(cls, (%s))\n\n" % ''.join(
+            "%s," % nm for nm in self.all_entries)
+        src += "    def __getnewargs__(self):\n"
+        src += "        return tuple(self)\n\n"
+
+        for (i, name) in enumerate(self.all_entries):
+            src += "    %s = property(itemgetter(%d))\n" % (name, i)
+
+        return src
+
     def _gen_children(self):
         src = '    def children(self):\n'
 
@@ -128,10 +177,25 @@ class NodeCfg(object):
         return src
 
     def _gen_attr_names(self):
-        src = "    attr_names = (" + ''.join("%r," % nm for nm in self.attr + ['bracketed','comments']) + ')'
+        attr = self.attr
+        if self.layout == 'dict':
+            attr = attr + ['bracketed','comments']
+        src = "    attr_names = (" + ''.join("%r," % nm for nm in attr) + ')'
         return src
 
 
+# Extra imports and fields of the Node base class, for each layout.
+# Slotted and tuple nodes have no instance dict, so their base class
+# must not have one either; coord is kept as a class attribute for
+# Node.show.
+_LAYOUTS = {
+    'dict': ('', ''),
+    'slots': ('', '    __slots__ = ()\n    coord = None\n\n'),
+    'tuple': ('from operator import itemgetter\n',
+              '    __slots__ = ()\n    coord = None\n\n'),
+}
+
+
 _PROLOGUE_COMMENT = \
 r'''#-----------------------------------------------------------------
 # ** ATTENTION **
@@ -153,12 +217,12 @@ r'''#-----------------------------------------------------------------
 
 _PROLOGUE_CODE = r'''
 import sys
-
+${imports}
 
 class Node(object):
     """ Abstract base class for AST nodes.
     """
-    def children(self):
+${node_fields}    def children(self):
         """ A sequence of all children that are Nodes
         """
         pass
@@ -267,7 +331,7 @@ class NodeVisitor(object):
 
 if __name__ == "__main__":
     import sys
-    ast_gen = ASTCodeGenerator('_ast.cfg')
+    ast_gen = ASTCodeGenerator('_ast.cfg', layout='slots')
     ast_gen.generate(open('../annotast.py', 'w'))
 
 
@@ -9,12 +9,15 @@
 #-------------------------------------------------------------------------
 # Description: Generate parser from a configuration file
 #=========================================================================
+import hashlib
 import pprint
 import re
 from string import Template
 import sys
 sys.path.insert(0, "../..")
 from mlfi.yply.yparser import YParser
+from mlfi.ply import yacc
+from mlfi.annotlexer import AnnotLexer
 
 
 class ParserCodeGenerator(object):
@@ -32,8 +35,10 @@ class ParserCodeGenerator(object):
                                              'parser_gen.y', debuglevel=0)
 
     def _gen_rule(self, rule, indent):
-        cs = ["def p_%s(self,p):" % (rule.name)]
-        cs.append('{0}""" {1} \n    {0}"""'.format(" " * self.tabsize, rule.prod))
+        return self._gen_method(
+            "p_%s" % rule.name, rule.prod, self._rule_code(rule), indent)
+
+    def _rule_code(self, rule):
         codelines = rule.code.splitlines()
         # a bit tweaking, ignore the first indent if all lines are 
         # indented with tabsize. This makes the config file more readable
@@ -43,16 +48,28 @@ class ParserCodeGenerator(object):
                 for i in codelines]
         if codelines and codelines[0] == "":
             codelines = codelines[1:]
+        return codelines
+
+    def _gen_method(self, name, prod, codelines, indent):
+        cs = ["def %s(self,p):" % (name)]
+        cs.append('{0}""" {1} \n    {0}"""'.format(" " * self.tabsize, prod))
         for c in codelines:
             cs.append("%s%s" % (" " * self.tabsize, c))
         cs = ["%s%s" % (" " * indent * self.tabsize, i) for i in cs]
         return "\n".join(cs)
 
-    def generate(self, file=None):
+    def generate(self, file=None, code=None, module='annotparser.py'):
         """ Generates the code into file, an open file buffer.
+
+            code:
+                Template of the module, _PROLOGUE_CODE by default
+
+            module:
+                Name of the generated module, for its header
         """
         src = Template(_PROLOGUE_COMMENT).substitute(
-            cfg_filename=self.cfg_filename)
+            cfg_filename=self.cfg_filename,
+            module=module)
         _precs = '\n'.join(
             ["%s%s," % (' ' * self.tabsize * 2, i) 
                                 for i in self.cfg.precs])
@@ -69,16 +86,146 @@ class ParserCodeGenerator(object):
         _productions = '\n\n'.join(
             [self._gen_rule(r, 1) for r in self.cfg.rules])
 
-        src += Template(_PROLOGUE_CODE).substitute(
+        src += Template(code or _PROLOGUE_CODE).substitute(
             start=self.cfg.start,
             precs=_precs,
             opt_rules=_opt_rules,
             list_rules=_list_rules,
             string_rules=_string_rules,
-            productions=_productions)
+            productions=_productions,
+            chunk_methods=_CHUNK_CODE,
+            tables_version=self._tables_version())
+
+        file.write(src)
+
+    def _tables_version(self):
+        """ A digest of everything PLY signs in the grammar, and of
+            the lexer regex: a parser whose grammar or lexer changes
+            gets new cached tables.
+        """
+        sig = hashlib.md5()
+        for part in ([self._lexer_spec()[0], self.cfg.start] + list(self.cfg.precs) +
+                     list(AnnotLexer.tokens) +
+                     [r.prod for r in self.cfg.rules] +
+                     sorted(self.cfg.list_rules) +
+                     sorted(self.cfg.string_rules) +
+                     sorted(self.cfg.opt_rules)):
+            sig.update(part.encode('utf-8'))
+        return sig.hexdigest()[:12]
+
+    def generate_standalone(self, file=None, module='annotstandalone.py'):
+        """ Generates into file a parser module that does not need
+            PLY: the LALR tables and the lexer regex are computed now
+            and written as literals, next to a small LR driver and the
+            productions, so that loading the module introspects
+            nothing.
+        """
+        rules = self._standalone_rules()
+        (productions, action, goto) = self._lr_tables(rules)
+        (lexre, lexignore, keywords) = self._lexer_spec()
+
+        src = Template(_PROLOGUE_COMMENT).substitute(
+            cfg_filename=self.cfg_filename,
+            module=module)
+        indent = ' ' * self.tabsize
+        _action = '\n'.join(
+            "%s%s,  # %d" % (indent, _dict_literal(action[i]), i)
+                for i in range(len(action)))
+        _goto = '\n'.join(
+            "%s%s,  # %d" % (indent, _dict_literal(goto[i]), i)
+                for i in range(len(goto)))
+        _productions = '\n\n'.join(
+            [self._gen_method(name, prod, code, 1)
+                for (name, prod, code) in rules])
+        _production_table = '\n'.join(
+            ["%s(%d, %r, %s)," % (indent, plen, lhs,
+                'StandaloneAnnotParser.' + func if func else None)
+                for (plen, lhs, func) in productions])
+
+        src += Template(_STANDALONE_CODE).substitute(
+            lexre=repr(lexre),
+            lexignore=repr(lexignore),
+            keywords=_dict_literal(keywords),
+            action=_action,
+            goto=_goto,
+            productions=_productions,
+            production_table=_production_table,
+            chunk_methods=_CHUNK_CODE)
 
         file.write(src)
 
+    def _standalone_rules(self):
+        """ The (function name, grammar, action code) of every
+            production function, including the ones that PLYParser
+            creates for the optional, list and string rules.
+        """
+        if self.cfg.list_rules:
+            raise RuntimeError(
+                "Standalone parsers do not lex the ',' of list rules")
+        rules = [("p_%s" % r.name, r.prod, self._rule_code(r))
+                    for r in self.cfg.rules]
+        # the same rules as PLYParser, list rules being left recursive
+        for name in sorted(self.cfg.string_rules):
+            rules.append(("p_%s_string_1" % name,
+                          "%s_string : %s" % (name, name),
+                          ["p[0] = [p[1]]"]))
+            rules.append(("p_%s_string_2" % name,
+                          "%s_string : %s_string %s" % (name, name, name),
+                          ["p[1].append(p[2])", "p[0] = p[1]"]))
+        for name in sorted(self.cfg.opt_rules):
+            # '|' under ':' in the docstring
+            pad = ' ' * (2 * self.tabsize + len('""" %s_opt ' % name))
+            rules.append(("p_%s_opt" % name,
+                          "%s_opt : empty\n%s| %s" % (name, pad, name),
+                          ["p[0] = p[1]"]))
+        rules.append(("p_empty", "empty : ", ["p[0] = None"]))
+        return rules
+
+    def _lr_tables(self, rules):
+        """ Builds the LALR tables of the grammar with PLY, and
+            returns them as (productions, action, goto): the
+            (length, left-hand side, function name) of every
+            production, by number, and the action and goto dicts
+            of every state.
+        """
+        grammar = yacc.Grammar(AnnotLexer.tokens)
+        for (level, prec) in enumerate(self.cfg.precs, 1):
+            prec = eval(prec)
+            for term in prec[1:]:
+                grammar.set_precedence(term, prec[0], level)
+        for (name, prod, code) in rules:
+            for (file, line, prodname, syms) in yacc.parse_grammar(
+                    prod, self.cfg_filename, 0):
+                grammar.add_production(prodname, syms, name, file, line)
+        grammar.set_start(self.cfg.start)
+        lr = yacc.LRGeneratedTable(grammar, 'LALR')
+        if lr.sr_conflicts or lr.rr_conflicts:
+            raise RuntimeError("The grammar has conflicts, see yacc.py")
+
+        productions = [(p.len, p.name, p.func) for p in lr.lr_productions]
+        nstates = max(lr.lr_action) + 1
+        action = [lr.lr_action.get(i, {}) for i in range(nstates)]
+        goto = [lr.lr_goto.get(i, {}) for i in range(nstates)]
+        return (productions, action, goto)
+
+    def _lexer_spec(self):
+        """ The master regex, the ignored characters and the
+            keywords of AnnotLexer.
+        """
+        def nothing(*args):
+            pass
+        lexer = AnnotLexer(nothing, nothing, nothing)
+        lexer.build(optimize=False)
+        if len(lexer.lexer.lexre) != 1:
+            raise RuntimeError("The lexer regex is split, see lex.py")
+        lexre = lexer.lexer.lexre[0][0]
+        # the rules handled by _tokens() in _STANDALONE_CODE
+        if set(lexre.groupindex) != set(_STANDALONE_LEXER_RULES):
+            raise RuntimeError("The lexer rules are not those of _tokens(): %s"
+                               % sorted(lexre.groupindex))
+        return (lexre.pattern, lexer.lexer.lexignore,
+                dict(AnnotLexer.keyword_map))
+
 _PROLOGUE_COMMENT = \
     r'''#!/usr/bin/env python
 # -*- coding:utf-8 -*-
@@ -91,26 +238,70 @@ _PROLOGUE_COMMENT = \
 # run the generator again.
 # ** ** *** ** **
 #
-# pymlannot: annotparser.py
+# pymlannot: $module
 #
 # Copyright (C) 2014, Linh Vu Hong
 #-----------------------------------------------------------------
 '''
 
+# Methods reading blocks chunk by chunk, shared by the parser templates
+_CHUNK_CODE = \
+r'''    def _iter_chunk_blocks(self, chunks, debuglevel, resilient, lineno):
+        for chunk in chunks:
+            for block in self._parse_chunk(chunk, lineno, debuglevel, resilient):
+                yield block
+            lineno += chunk.count('\n')
+
+    def _parse_chunk(self, chunk, lineno, debuglevel, resilient):
+        """ Parses a piece of text holding complete blocks, starting
+            at line lineno, and returns its blocks.
+
+            In resilient mode, a chunk that does not parse is parsed
+            again block by block: only that chunk is parsed twice,
+            and each run of blocks that still do not parse counts as
+            one skipped region.
+        """
+        try:
+            return self._parse_text(chunk, lineno, debuglevel).blocks
+        except ParseError:
+            if not resilient:
+                raise
+        blocks = []
+        skipping = False
+        for piece in split_chunks(chunk, 0):
+            try:
+                blocks.extend(self._parse_text(piece, lineno, debuglevel).blocks)
+                skipping = False
+            except ParseError:
+                if not skipping:
+                    self.skipped_regions += 1
+                skipping = True
+            lineno += piece.count('\n')
+        return blocks
+
+'''
+
 _PROLOGUE_CODE = r'''
+import copy
 import re
 try:
     from .ply import yacc
     from .intervaltree import intervaltree
     from . import annotast as ast
     from .annotlexer import AnnotLexer
-    from .plyparser import PLYParser, Coord, ParseError
+    from .plyparser import PLYParser, Coord, ParseError, load_tables
+    from .annotscanner import iter_chunks, split_chunks
 except SystemError:
     from ply import yacc
     from intervaltree import intervaltree
     import annotast as ast
     from annotlexer import AnnotLexer
-    from plyparser import PLYParser, Coord, ParseError
+    from plyparser import PLYParser, Coord, ParseError, load_tables
+    from annotscanner import iter_chunks, split_chunks
+
+# Digest of the grammar, naming the tables built in trusted mode
+_tables_version = '$tables_version'
+
 class AnnotParser(PLYParser):
     def __init__(
             self,
@@ -118,7 +309,9 @@ class AnnotParser(PLYParser):
             lextab='annotlextab',
             yacc_optimize=False,
             yacctab='annotyacctab',
-            yacc_debug=False):
+            yacc_debug=False,
+            trusted=False,
+            tabcache=None):
         """ Create a new pyAnnotparser.
 
             Some arguments for controlling the debug/optimization
@@ -159,15 +352,35 @@ class AnnotParser(PLYParser):
             yacc_debug:
                 Generate a parser.out file that explains how yacc
                 built the parsing table from the grammar.
+
+            trusted:
+                Set to True when the parser is installed, maybe
+                zipped, and its tables match the grammar: lextab
+                and yacctab are imported from this package and used
+                without being checked against the grammar, and no
+                table is ever written next to the parser. Tables
+                that are missing are built on each run, or once
+                per grammar version if tabcache is given.
+
+            tabcache:
+                Directory where trusted mode keeps the tables it
+                had to build, under names versioned with the
+                grammar.
         """
         self.lex = AnnotLexer(
             error_func=self._lex_error_func,
             on_scope_begin_func=self._lex_on_scope_begin_func,
             on_scope_end_func=self._lex_on_scope_end_func)
 
+        if trusted:
+            lextab = load_tables(lextab, __package__, tabcache, _tables_version)
+            yacctab = load_tables(yacctab, __package__, tabcache, _tables_version)
+
         self.lex.build(
-            optimize=lex_optimize,
-            lextab=lextab)
+            optimize=lex_optimize or trusted,
+            lextab=lextab,
+            outputdir=tabcache or '',
+            trusted=trusted)
         self.tokens = self.lex.tokens
 
         rules_with_list = { 
@@ -175,14 +388,14 @@ $list_rules
         }
 
         for rule in rules_with_list:
-            self._create_list_rule(rule)
+            self._create_list_rule(rule, left_recursive=True)
 
         rules_with_string = { 
 $string_rules
         }
 
         for rule in rules_with_string:
-            self._create_list_rule(rule,"",'_string')
+            self._create_list_rule(rule,"",'_string', left_recursive=True)
 
         rules_with_opt = {
 $opt_rules
@@ -195,8 +408,11 @@ $opt_rules
             module=self,
             start='$start',
             debug=yacc_debug,
-            optimize=yacc_optimize,
-            tabmodule=yacctab)
+            optimize=yacc_optimize or trusted,
+            tabmodule=yacctab,
+            write_tables=not trusted or isinstance(yacctab, str),
+            outputdir=tabcache or '',
+            trusted=trusted)
 
         # Stack of scopes for keeping track of symbols. _scope_stack[-1] is
         # the current (topmost) scope. Each scope is a dictionary that
@@ -211,7 +427,27 @@ $opt_rules
         # Keeps track of the last token given to yacc (the lookahead token)
         self._last_yielded_token = None
 
-    def parse(self, text, filename='', debuglevel=0):
+        # Number of regions skipped by the last resilient parse
+        self.skipped_regions = 0
+
+    def clone(self):
+        """ Returns a parser that shares the lexing and parsing
+            tables of this one, without building or loading them.
+            A parser must not be used by two threads at once; give
+            each thread its own clone instead.
+        """
+        c = copy.copy(self)
+        c.lex = self.lex.clone(
+            error_func=c._lex_error_func,
+            on_scope_begin_func=c._lex_on_scope_begin_func,
+            on_scope_end_func=c._lex_on_scope_end_func)
+        c.parser = self.parser.clone(c)
+        c._scope_stack = [dict()]
+        c._last_yielded_token = None
+        c.skipped_regions = 0
+        return c
+
+    def parse(self, text, filename='', debuglevel=0, resilient=False):
         """ Parses code and returns an AST.
 
             text:
@@ -223,18 +459,75 @@ $opt_rules
 
             debuglevel:
                 Debug level to yacc
+
+            resilient:
+                If True, parse errors do not raise a ParseError.
+                The text is parsed in chunks, and a chunk that does
+                not parse is parsed again block by block, skipping
+                the blocks that still do not parse. The number of
+                skipped regions is left in skipped_regions.
         """
         self.lex.filename = filename
+        self.skipped_regions = 0
+        if resilient:
+            return ast.File(list(self._iter_chunk_blocks(
+                split_chunks(text), debuglevel, resilient, 1)))
         self.lex.reset_lineno()
         self._scope_stack = [dict()]
         self._last_yielded_token = None
+        self.lex.input(text)
         return self.parser.parse(
-                input=text,
                 lexer=self.lex,
-                debug=debuglevel)
+                debug=debuglevel,
+                tokens=self.lex.iter_tokens())
+
+    def iter_blocks(self, fileobj, filename='', chunksize=65536, debuglevel=0,
+                    resilient=False, lineno=1):
+        """ Parses an annotation file chunk by chunk and yields its
+            blocks one at a time.
+
+            The file is cut at block boundaries into chunks of about
+            chunksize characters, and each chunk is parsed on its
+            own, so only one chunk and its blocks are held in memory
+            at any time.
+
+            fileobj:
+                A file object opened in text mode
+
+            filename:
+                Name of the file being parsed (for meaningful
+                error messages)
+
+            chunksize:
+                Number of characters read from fileobj at a time
+
+            debuglevel:
+                Debug level to yacc
+
+            resilient:
+                Skip the blocks that do not parse, see parse()
+
+            lineno:
+                Line number of the first line of fileobj, when it
+                is read from the middle of a file
+        """
+        self.lex.filename = filename
+        self.skipped_regions = 0
+        return self._iter_chunk_blocks(
+            iter_chunks(fileobj, chunksize), debuglevel, resilient, lineno)
 
     ######################--   PRIVATE   --######################
 
+$chunk_methods    def _parse_text(self, text, lineno, debuglevel):
+        self.lex.input(text)
+        self.lex.lexer.lineno = lineno
+        self._scope_stack = [dict()]
+        self._last_yielded_token = None
+        return self.parser.parse(
+                lexer=self.lex,
+                debug=debuglevel,
+                tokens=self.lex.iter_tokens())
+
     def _push_scope(self):
         self._scope_stack.append(dict())
 
@@ -365,7 +658,346 @@ if __name__ == "__main__":
 '''
 
 
+def _dict_literal(d):
+    # sorted, so that the output does not depend on the hash seed
+    return '{' + ', '.join('%r: %r' % kv for kv in sorted(d.items())) + '}'
+
+
+# The lexer rules that _tokens() of _STANDALONE_CODE implements
+_STANDALONE_LEXER_RULES = ('t_ID', 't_FILENAME', 't_VAL', 't_newline', 't_NUMBER')
+
+_STANDALONE_CODE = r'''
+import re
+try:
+    from . import annotast as ast
+    from .plyparser import Coord, ParseError
+    from .annotscanner import iter_chunks, split_chunks
+except SystemError:
+    import annotast as ast
+    from plyparser import Coord, ParseError
+    from annotscanner import iter_chunks, split_chunks
+
+# The rules of AnnotLexer, in a single regex with a named group
+# per rule (see lex.py)
+_lexre = re.compile($lexre)
+_lexignore = $lexignore
+_keywords = $keywords
+# the rules whose tokens are returned as they are
+_plain = {'t_NUMBER': 'NUMBER', 't_FILENAME': 'FILENAME'}
+
+# LALR tables: _action[state][token] is n > 0 to shift the token and
+# go to state n, -n < 0 to reduce by production n, or 0 to accept.
+# _goto[state][nonterminal] is the state after a reduction.
+_action = (
+$action
+)
+
+_goto = (
+$goto
+)
+
+
+class StandaloneAnnotParser(object):
+    """ An AnnotParser that does not need PLY.
+
+    The lexer rules and the LALR tables of AnnotParser are embedded
+    as literals, so creating the parser builds and checks nothing.
+    It accepts the same input and returns the same AST.
+    """
+    def __init__(self):
+        self.filename = ''
+
+        # Number of regions skipped by the last resilient parse
+        self.skipped_regions = 0
+
+    def clone(self):
+        """ Returns a new parser, for another thread. The tables are
+            module constants, so this is as cheap as construction.
+        """
+        return StandaloneAnnotParser()
+
+    def parse(self, text, filename='', debuglevel=0, resilient=False):
+        """ Parses code and returns an AST, see AnnotParser.parse.
+            debuglevel is ignored.
+        """
+        self.filename = filename
+        self.skipped_regions = 0
+        if resilient:
+            return ast.File(list(self._iter_chunk_blocks(
+                split_chunks(text), debuglevel, resilient, 1)))
+        return self._parse_text(text, 1, debuglevel)
+
+    def iter_blocks(self, fileobj, filename='', chunksize=65536, debuglevel=0,
+                    resilient=False, lineno=1):
+        """ Parses an annotation file chunk by chunk and yields its
+            blocks one at a time, see AnnotParser.iter_blocks.
+        """
+        self.filename = filename
+        self.skipped_regions = 0
+        return self._iter_chunk_blocks(
+            iter_chunks(fileobj, chunksize), debuglevel, resilient, lineno)
+
+    ######################--   PRIVATE   --######################
+
+$chunk_methods    def _parse_text(self, text, lineno, debuglevel):
+        action = _action
+        goto = _goto
+        productions = self._productions
+        next_token = self._tokens(text, lineno).__next__
+        statestack = [0]
+        # values of the symbols, above a bottom entry that lets
+        # reductions take their arguments with a single slice
+        symstack = [None]
+        state = 0
+        token = next_token()
+        while True:
+            t = action[state].get(token[0])
+            if t is None:
+                self._syntax_error(text, token)
+            if t > 0:
+                statestack.append(t)
+                symstack.append(token[1])
+                state = t
+                token = next_token()
+            elif t < 0:
+                (plen, name, func) = productions[-t]
+                # p[0] is a copy of the entry below the arguments,
+                # overwritten by the production
+                p = symstack[-plen - 1:]
+                if plen:
+                    del symstack[-plen:]
+                    del statestack[-plen:]
+                func(self, p)
+                state = goto[statestack[-1]][name]
+                statestack.append(state)
+                symstack.append(p[0])
+            else:
+                return symstack[-1]
+
+    def _tokens(self, text, lineno):
+        """ Yields the tokens of text as (type, value, lineno, lexpos),
+            like AnnotLexer, and then an end token.
+        """
+        match = _lexre.match
+        ignore = _lexignore
+        keywords = _keywords
+        plain = _plain
+        pos = 0
+        size = len(text)
+        while pos < size:
+            if text[pos] in ignore:
+                pos += 1
+                continue
+            m = match(text, pos)
+            if m is None:
+                self._lex_error(text, pos, lineno)
+            rule = m.lastgroup
+            value = m.group()
+            if rule in plain:
+                yield (plain[rule], value, lineno, pos)
+            elif rule == 't_newline':
+                lineno += len(value)
+            elif rule == 't_VAL':
+                # the regex only matches the opening of the payload,
+                # which ends at the first ')' opening a line
+                close = text.find('\n)', pos + 4)
+                if close < 0:
+                    self._lex_error(text, pos, lineno)
+                yield ('VAL', text[pos + 1:close].strip(), lineno, pos)
+                lineno += text.count('\n', pos, close + 1)
+                pos = close + 2
+                continue
+            else:
+                # t_ID, only keywords are tokens of the grammar
+                yield (keywords.get(value, 'ID'), value, lineno, pos)
+            pos = m.end()
+        yield ('$$end', None, lineno, pos)
+
+    def _column(self, text, pos):
+        return pos - text.rfind('\n', 0, pos)
+
+    def _lex_error(self, text, pos, lineno):
+        coord = Coord(self.filename, lineno, self._column(text, pos))
+        raise ParseError("%s: Illegal character %r" % (coord, text[pos]))
+
+    def _syntax_error(self, text, token):
+        (ttype, value, lineno, pos) = token
+        if ttype == '$$end':
+            raise ParseError(": At end of input")
+        coord = Coord(self.filename, lineno, self._column(text, pos))
+        raise ParseError("%s: before: %s" % (coord, value))
+
+    ##
+    ## Grammar productions
+    ##
+
+$productions
+
+
+# (length, left-hand side, action) of the productions, by number
+StandaloneAnnotParser._productions = (
+$production_table
+)
+'''
+
+_SINK_CODE = r'''
+try:
+    from .annotparser import AnnotParser
+    from .annotscanner import iter_chunks, split_chunks
+    from .plyparser import ParseError
+except SystemError:
+    from annotparser import AnnotParser
+    from annotscanner import iter_chunks, split_chunks
+    from plyparser import ParseError
+class AnnotSinkParser(object):
+    """ A parser of annotation files that builds no AST: it calls
+        on_block(start_line, start_col, end_line, end_col, kind, payload,
+                 start_offset, end_offset)
+        for every annotation of every block, in file order. The
+        offsets are the absolute ones of the positions, in bytes.
+
+        It parses with the grammar of AnnotParser, so both share the
+        same parsing tables, but it is not an AnnotParser: it has no
+        blocks to give, and parse() returns their number.
+    """
+    def __init__(
+            self,
+            on_block,
+            lex_optimize=False,
+            lextab='annotlextab',
+            yacc_optimize=False,
+            yacctab='annotyacctab',
+            yacc_debug=False,
+            trusted=False,
+            tabcache=None):
+        """ Create a new sink parser, see AnnotParser.
+
+            on_block:
+                The sink, called for every annotation. It may be
+                replaced between two parses.
+        """
+        self._parser = _SinkParser(
+            on_block,
+            lex_optimize=lex_optimize,
+            lextab=lextab,
+            yacc_optimize=yacc_optimize,
+            yacctab=yacctab,
+            yacc_debug=yacc_debug,
+            trusted=trusted,
+            tabcache=tabcache)
+
+    @property
+    def on_block(self):
+        return self._parser.on_block
+
+    @on_block.setter
+    def on_block(self, on_block):
+        self._parser.on_block = on_block
+
+    @property
+    def block_count(self):
+        """ Number of blocks given to the sink by the last parse.
+        """
+        return self._parser.block_count
+
+    @property
+    def skipped_regions(self):
+        """ Number of regions skipped by the last resilient parse.
+        """
+        return self._parser.skipped_regions
+
+    def clone(self):
+        """ Returns a sink parser feeding the same sink, that shares
+            the tables of this one, see AnnotParser.clone.
+        """
+        c = AnnotSinkParser.__new__(AnnotSinkParser)
+        c._parser = self._parser.clone()
+        return c
+
+    def parse(self, text, filename='', debuglevel=0, resilient=False):
+        """ Parses text into the sink and returns the number of
+            blocks, see AnnotParser.parse.
+        """
+        return self._parser.feed(split_chunks(text), filename, debuglevel,
+                                 resilient, 1)
+
+    def parse_file(self, fileobj, filename='', chunksize=65536, debuglevel=0,
+                   resilient=False, lineno=1):
+        """ Parses an annotation file chunk by chunk into the sink
+            and returns the number of blocks, see
+            AnnotParser.iter_blocks.
+        """
+        return self._parser.feed(iter_chunks(fileobj, chunksize), filename,
+                                 debuglevel, resilient, lineno)
+
+
+######################--   PRIVATE   --######################
+
+class _SinkParser(AnnotParser):
+    """ The AnnotParser of an AnnotSinkParser, whose productions
+        feed the sink instead of building blocks.
+    """
+    def __init__(self, on_block, **kwargs):
+        self.on_block = on_block
+        self.block_count = 0
+        super(_SinkParser, self).__init__(**kwargs)
+
+    def clone(self):
+        c = super(_SinkParser, self).clone()
+        c.block_count = 0
+        return c
+
+    def feed(self, chunks, filename, debuglevel, resilient, lineno):
+        self.lex.filename = filename
+        self.skipped_regions = 0
+        self.block_count = 0
+        for _ in self._iter_chunk_blocks(chunks, debuglevel, resilient, lineno):
+            pass
+        return self.block_count
+
+    def _parse_chunk(self, chunk, lineno, debuglevel, resilient):
+        """ Parses a chunk into the sink, see AnnotParser._parse_chunk.
+
+            Blocks reach the sink as soon as they are reduced, so when
+            the chunk does not parse, the blocks before the error have
+            been given to the sink already. Those are not parsed again.
+        """
+        count = self.block_count
+        try:
+            self._parse_text(chunk, lineno, debuglevel)
+            return ()
+        except ParseError:
+            if not resilient:
+                raise
+        done = self.block_count - count
+        skipping = False
+        for piece in split_chunks(chunk, 0):
+            if done:
+                done -= 1
+            else:
+                try:
+                    self._parse_text(piece, lineno, debuglevel)
+                    skipping = False
+                except ParseError:
+                    if not skipping:
+                        self.skipped_regions += 1
+                    skipping = True
+            lineno += piece.count('\n')
+        return ()
+
+    ##
+    ## Grammar productions, feeding the sink
+    ##
+
+$productions
+'''
+
 if __name__ == "__main__":
     import sys
     ast_gen = ParserCodeGenerator('./annotparser_yacc.ypp')
     ast_gen.generate(open('../annotparser.py', 'w'))
+    sink_gen = ParserCodeGenerator('./annotsink_yacc.ypp')
+    sink_gen.generate(open('../annotsinkparser.py', 'w'),
+                      _SINK_CODE, 'annotsinkparser.py')
+    ast_gen.generate_standalone(open('../annotstandalone.py', 'w'),
+                                'annotstandalone.py')
@@ -21,6 +21,9 @@ import sys
 class Node(object):
     """ Abstract base class for AST nodes.
     """
+    __slots__ = ()
+    coord = None
+
     def children(self):
         """ A sequence of all children that are Nodes
         """
@@ -126,11 +129,10 @@ class NodeVisitor(object):
 
 
 class File(Node):
-    def __init__(self, blocks, coord=None, bracketed=False, comments=None):
+    __slots__ = ('blocks',)
+
+    def __init__(self, blocks):
         self.blocks = blocks
-        self.coord = coord
-        self.bracketed = bracketed
-        self.comments = comments
 
     def children(self):
         nodelist = []
@@ -138,16 +140,15 @@ class File(Node):
             nodelist.append(("blocks[%d]" % i, child))
         return tuple(nodelist)
 
-    attr_names = ('bracketed','comments',)
+    attr_names = ()
 
 class Block(Node):
-    def __init__(self, start, end, annotations, coord=None, bracketed=False, comments=None):
+    __slots__ = ('start','end','annotations',)
+
+    def __init__(self, start, end, annotations):
         self.start = start
         self.end = end
         self.annotations = annotations
-        self.coord = coord
-        self.bracketed = bracketed
-        self.comments = comments
 
     def children(self):
         nodelist = []
@@ -157,34 +158,33 @@ class Block(Node):
             nodelist.append(("annotations[%d]" % i, child))
         return tuple(nodelist)
 
-    attr_names = ('bracketed','comments',)
+    attr_names = ()
 
 class Position(Node):
-    def __init__(self, filename, line, column, coord=None, bracketed=False, comments=None):
+    __slots__ = ('filename','line','column','offset',)
+
+    def __init__(self, filename, line, column, offset):
         self.filename = filename
         self.line = line
         self.column = column
-        self.coord = coord
-        self.bracketed = bracketed
-        self.comments = comments
+        self.offset = offset
 
     def children(self):
         nodelist = []
         return tuple(nodelist)
 
-    attr_names = ('filename','line','column','bracketed','comments',)
+    attr_names = ('filename','line','column','offset',)
 
 class Annotation(Node):
-    def __init__(self, type, data, coord=None, bracketed=False, comments=None):
+    __slots__ = ('type','data',)
+
+    def __init__(self, type, data):
         self.type = type
         self.data = data
-        self.coord = coord
-        self.bracketed = bracketed
-        self.comments = comments
 
     def children(self):
         nodelist = []
         return tuple(nodelist)
 
-    attr_names = ('type','data','bracketed','comments',)
+    attr_names = ('type','data',)
 
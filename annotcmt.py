@@ -0,0 +1,474 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# annotcmt.py
+#
+# Reads the types of expressions and patterns from the typed trees
+# of .cmt/.cmti files, which are values in the Marshal format of
+# OCaml, into the records of annotindex.
+#
+# Copyright (C) 2014, Linh Vu Hong
+#-----------------------------------------------------------------
+import struct
+try:
+    from .annotindex import make_entry
+    from .plyparser import ParseError
+except SystemError:
+    from annotindex import make_entry
+    from plyparser import ParseError
+
+
+class Block(object):
+    """ A block of an unmarshaled value: a record, a tuple or a
+        constructor with arguments.
+    """
+    __slots__ = ('tag', 'fields')
+
+    def __init__(self, tag, size):
+        self.tag = tag
+        self.fields = [None] * size
+
+
+_MAGIC_SMALL = 0x8495A6BE
+_MAGIC_BIG = 0x8495A6BF
+_MAGIC_COMPRESSED = 0x8495A6BD
+
+# code: struct of the integer, shared offset or string length
+_INT = dict((c, struct.Struct(f)) for (c, f) in [
+    (0x0, '>b'), (0x1, '>h'), (0x2, '>i'), (0x3, '>q')])
+_SHARED = dict((c, struct.Struct(f)) for (c, f) in [
+    (0x4, '>B'), (0x5, '>H'), (0x6, '>I'), (0x14, '>Q')])
+_STRING = dict((c, struct.Struct(f)) for (c, f) in [
+    (0x9, '>B'), (0xA, '>I'), (0x15, '>Q')])
+_BLOCK = {0x8: struct.Struct('>I'), 0x13: struct.Struct('>Q')}
+_DOUBLE = {0xB: '>d', 0xC: '<d'}
+# code: (format of the length, format of an item)
+_DOUBLE_ARRAY = {
+    0xD: ('>B', '>d'), 0xE: ('>B', '<d'),
+    0xF: ('>I', '>d'), 0x7: ('>I', '<d'),
+    0x16: ('>Q', '>d'), 0x17: ('>Q', '<d'),
+}
+_CUSTOM, _CUSTOM_LEN, _CUSTOM_FIXED = 0x12, 0x18, 0x19
+
+
+def marshal_header(data, pos=0):
+    """ Returns (header size, data size) of the marshaled value at pos.
+    """
+    if len(data) < pos + 20:
+        raise ParseError("Truncated marshaled value")
+    magic = struct.unpack_from('>I', data, pos)[0]
+    if magic == _MAGIC_SMALL:
+        return (20, struct.unpack_from('>I', data, pos + 4)[0])
+    if magic == _MAGIC_BIG:
+        return (32, struct.unpack_from('>Q', data, pos + 8)[0])
+    if magic == _MAGIC_COMPRESSED:
+        raise ParseError("Compressed marshaled values are not supported")
+    raise ParseError("Bad marshal magic number %#x" % magic)
+
+
+def unmarshal(data, pos=0):
+    """ Reads the marshaled value at pos of data, and returns it with
+        the position after it. Integers and floats are read as int
+        and float, strings as bytes, arrays of floats as lists, and
+        other blocks as Blocks, shared as they were marshaled.
+
+        The value is read without recursion: OCaml lists and typed
+        trees are much deeper than the Python stack.
+    """
+    (header, size) = marshal_header(data, pos)
+    pos += header
+    end = pos + size
+    if len(data) < end:
+        raise ParseError("Truncated marshaled value")
+    unpack = struct.unpack_from
+    objects = []
+    # the blocks being filled: (fields, index of the next field,
+    # number of fields left)
+    stack = []
+    result = [None]
+    fields = result
+    index = 0
+    remaining = 1
+    while True:
+        if pos >= end:
+            raise ParseError("Marshaled value runs past %d" % end)
+        code = data[pos]
+        pos += 1
+        # the number of fields of a new block
+        size = 0
+        if code >= 0x80:
+            size = (code >> 4) & 0x7
+            v = Block(code & 0xF, size)
+            if size:
+                objects.append(v)
+        elif code >= 0x40:
+            v = code & 0x3F
+        elif code >= 0x20:
+            n = code & 0x1F
+            v = data[pos:pos + n]
+            pos += n
+            objects.append(v)
+        elif code in _SHARED:
+            st = _SHARED[code]
+            v = objects[len(objects) - st.unpack_from(data, pos)[0]]
+            pos += st.size
+        elif code in _INT:
+            st = _INT[code]
+            v = st.unpack_from(data, pos)[0]
+            pos += st.size
+        elif code in _BLOCK:
+            st = _BLOCK[code]
+            hd = st.unpack_from(data, pos)[0]
+            pos += st.size
+            size = hd >> 10
+            v = Block(hd & 0xFF, size)
+            if size:
+                objects.append(v)
+        elif code in _STRING:
+            st = _STRING[code]
+            n = st.unpack_from(data, pos)[0]
+            pos += st.size
+            v = data[pos:pos + n]
+            pos += n
+            objects.append(v)
+        elif code in _DOUBLE:
+            v = unpack(_DOUBLE[code], data, pos)[0]
+            pos += 8
+            objects.append(v)
+        elif code in _DOUBLE_ARRAY:
+            (lenfmt, fmt) = _DOUBLE_ARRAY[code]
+            n = unpack(lenfmt, data, pos)[0]
+            pos += struct.calcsize(lenfmt)
+            v = [unpack(fmt, data, pos + 8 * i)[0] for i in range(n)]
+            pos += 8 * n
+            objects.append(v)
+        elif code in (_CUSTOM, _CUSTOM_LEN, _CUSTOM_FIXED):
+            (v, pos) = _read_custom(data, pos, code)
+            objects.append(v)
+        else:
+            raise ParseError("Unsupported marshal code %#x at %d" % (code, pos - 1))
+
+        fields[index] = v
+        index += 1
+        remaining -= 1
+        if size:
+            if remaining:
+                stack.append((fields, index, remaining))
+            (fields, index, remaining) = (v.fields, 0, size)
+        while not remaining:
+            if not stack:
+                return _end(result, pos, end)
+            (fields, index, remaining) = stack.pop()
+
+
+def _end(result, pos, end):
+    if pos != end:
+        raise ParseError("Marshaled value ends at %d, not %d" % (pos, end))
+    return (result[0], pos)
+
+
+def _read_custom(data, pos, code):
+    # the boxed integers, the only custom blocks of typed trees
+    name_end = data.find(b'\0', pos)
+    if name_end < 0:
+        raise ParseError("Unterminated custom block name at %d" % pos)
+    name = data[pos:name_end]
+    pos = name_end + 1
+    if code == _CUSTOM_LEN:
+        # sizes of the value once read, not of its data
+        pos += 12
+    if name == b'_j':
+        return (struct.unpack_from('>q', data, pos)[0], pos + 8)
+    if name == b'_i':
+        return (struct.unpack_from('>i', data, pos)[0], pos + 4)
+    if name == b'_n':
+        if data[pos] == 1:
+            return (struct.unpack_from('>i', data, pos + 1)[0], pos + 5)
+        return (struct.unpack_from('>q', data, pos + 1)[0], pos + 9)
+    raise ParseError("Unsupported custom block %r" % name)
+
+
+def read_cmt(filename):
+    """ Reads the cmt_infos record of a .cmt or .cmti file, skipping
+        the .cmi the compiler may have written first.
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    pos = 0
+    if data[:9] == b'Caml1999I':
+        # the signature, the crcs and the flags of the .cmi
+        pos = 12
+        for _ in range(3):
+            (header, size) = marshal_header(data, pos)
+            pos += header + size
+    if data[pos:pos + 9] != b'Caml1999T':
+        raise ParseError("{0} is not a .cmt file".format(filename))
+    return unmarshal(data, pos + 12)[0]
+
+
+def cmt_records(filename, printer=None):
+    """ The records (start offset, end offset, entry) of the types of
+        the expressions, patterns and type expressions of a .cmt or
+        .cmti file, see annotindex.block_entries. The types at the
+        same location make a single entry, like in .annot files.
+    """
+    infos = read_cmt(filename)
+    if not isinstance(infos, Block) or len(infos.fields) < 2:
+        raise ParseError("{0}: unknown cmt_infos".format(filename))
+    printer = printer or TypePrinter()
+    types = {}
+    # in the order of the tree, sorted offsets make the interval tree
+    # rotate on every insertion
+    locations = []
+    # the nodes share their types
+    texts = {}
+    for (loc, ty) in typed_nodes(infos.fields[1]):
+        (start, end) = (loc.fields[0].fields[3], loc.fields[1].fields[3])
+        text = texts.get(id(ty))
+        if text is None:
+            text = texts[id(ty)] = printer.type_expr(ty)
+        same = types.get((start, end))
+        if same is None:
+            same = types[(start, end)] = []
+            locations.append((start, end))
+        if text not in same:
+            same.append(text)
+    return [(start, end, make_entry({"type": types[(start, end)]}))
+            for (start, end) in locations]
+
+
+######################--   TYPED TREES   --######################
+
+# The records of the typed tree that carry a type, by the indexes
+# of their location, of their type and of their environment, which
+# is not walked:
+#   expression, pattern:
+#       {exp_desc; exp_loc; exp_extra; exp_type; exp_env; ...}
+#   core_type:
+#       {ctyp_desc; ctyp_type; ctyp_env; ctyp_loc; ...}
+_TYPED_RECORDS = [(1, 3, 4), (3, 1, 2)]
+
+
+def _is_position(v):
+    return (type(v) is Block and v.tag == 0 and len(v.fields) == 4 and
+            type(v.fields[0]) is bytes and type(v.fields[3]) is int)
+
+
+def _is_location(v):
+    return (type(v) is Block and v.tag == 0 and len(v.fields) == 3 and
+            _is_position(v.fields[0]) and _is_position(v.fields[1]))
+
+
+def _is_type_expr(v):
+    # {desc; level; id} or {desc; level; scope; id}
+    if type(v) is not Block or v.tag != 0 or len(v.fields) not in (3, 4):
+        return False
+    f = v.fields
+    return (type(f[0]) in (int, Block) and
+            all(type(x) is int for x in f[1:]))
+
+
+def typed_nodes(tree):
+    """ Yields (location, type_expr) for the typed records of tree
+        whose location is not ghost.
+    """
+    seen = set()
+    stack = [tree]
+    while stack:
+        v = stack.pop()
+        if type(v) is not Block or id(v) in seen:
+            continue
+        seen.add(id(v))
+        fields = v.fields
+        skip = ()
+        if v.tag == 0 and len(fields) >= 5:
+            for (iloc, itype, ienv) in _TYPED_RECORDS:
+                if _is_location(fields[iloc]) and _is_type_expr(fields[itype]):
+                    if not fields[iloc].fields[2]:
+                        yield (fields[iloc], fields[itype])
+                    skip = (iloc, itype, ienv)
+                    break
+        for (i, f) in enumerate(fields):
+            if type(f) is Block and i not in skip:
+                stack.append(f)
+
+
+######################--   TYPES   --######################
+
+class TypePrinter(object):
+    """ Prints the type_expr values of Types like the compiler prints
+        them in .annot files, for the types of typed trees.
+    """
+    # constructors of Types.type_desc
+    (TVAR, TARROW, TTUPLE, TCONSTR, TOBJECT, TFIELD, TLINK, TSUBST,
+     TVARIANT, TUNIVAR, TPOLY, TPACKAGE) = range(12)
+
+    def type_expr(self, ty):
+        self.names = {}
+        self.visiting = set()
+        return self._type(ty, 0)
+
+    def path(self, p):
+        """ The name of a Path.t.
+        """
+        if type(p) is not Block:
+            return '?'
+        f = p.fields
+        if p.tag == 0:
+            return self._ident(f[0])
+        if p.tag == 1:
+            return self.path(f[0]) + '.' + _str(f[1])
+        if p.tag == 2:
+            return '%s(%s)' % (self.path(f[0]), self.path(f[1]))
+        return self.path(f[0])
+
+    ######################--   PRIVATE   --######################
+
+    def _ident(self, ident):
+        # Local/Scoped/Global/Predef of OCaml >= 4.08 start with the
+        # name, the {stamp; name; flags} records before with a stamp
+        if type(ident) is bytes:
+            return _str(ident)
+        for f in ident.fields[:2]:
+            if type(f) is bytes:
+                return _str(f)
+        return '?'
+
+    def _repr(self, ty):
+        while type(ty) is Block and type(ty.fields[0]) is Block and \
+                ty.fields[0].tag in (self.TLINK, self.TSUBST):
+            ty = ty.fields[0].fields[0]
+        return ty
+
+    def _var(self, ty, name):
+        if type(name) is Block:
+            return "'" + _str(name.fields[0])
+        if id(ty) not in self.names:
+            n = len(self.names)
+            self.names[id(ty)] = "'" + chr(ord('a') + n % 26) + (str(n // 26) if n >= 26 else '')
+        return self.names[id(ty)]
+
+    def _type(self, ty, prec):
+        """ prec: 0 at the top, 1 left of an arrow, 2 in a tuple or as
+            the argument of a type constructor.
+        """
+        ty = self._repr(ty)
+        if type(ty) is not Block:
+            return '_'
+        desc = ty.fields[0]
+        if type(desc) is not Block:
+            # Tnil
+            return '< >'
+        if id(ty) in self.visiting:
+            return self._var(ty, None)
+        self.visiting.add(id(ty))
+        try:
+            text = self._desc(ty, desc, prec)
+        finally:
+            self.visiting.discard(id(ty))
+        return text
+
+    def _desc(self, ty, desc, prec):
+        tag = desc.tag
+        f = desc.fields
+        if tag in (self.TVAR, self.TUNIVAR):
+            return self._var(ty, f[0])
+        if tag == self.TARROW:
+            (label, arg) = (f[0], f[1])
+            if type(label) is Block:
+                label = (b'?' if label.tag == 1 else b'') + label.fields[0]
+            elif type(label) is not bytes:
+                label = b''
+            if label.startswith(b'?'):
+                # the type of an optional argument is an option
+                opt = self._repr(arg)
+                if type(opt) is Block and type(opt.fields[0]) is Block and \
+                        opt.fields[0].tag == self.TCONSTR and _list(opt.fields[0].fields[1]):
+                    arg = _list(opt.fields[0].fields[1])[0]
+            text = "%s%s -> %s" % (
+                _str(label) + ':' if label else '',
+                self._type(arg, 1), self._type(f[2], 0))
+            return '(' + text + ')' if prec > 0 else text
+        if tag == self.TTUPLE:
+            text = ' * '.join([self._type(t, 2) for t in _list(f[0])])
+            return '(' + text + ')' if prec > 1 else text
+        if tag == self.TCONSTR:
+            return self._constr(self.path(f[0]), _list(f[1]))
+        if tag == self.TOBJECT:
+            return self._object(f[0])
+        if tag == self.TVARIANT:
+            return self._variant(f[0])
+        if tag == self.TPOLY:
+            names = [self._type(t, 0) for t in _list(f[1])]
+            text = self._type(f[0], 0)
+            if not names:
+                return text
+            text = "%s. %s" % (' '.join(names), text)
+            return '(' + text + ')' if prec > 0 else text
+        if tag == self.TPACKAGE:
+            return '(module %s)' % self.path(f[0])
+        if tag == self.TFIELD:
+            return self._object(ty)
+        return '_'
+
+    def _constr(self, name, args):
+        if not args:
+            return name
+        if len(args) == 1:
+            return "%s %s" % (self._type(args[0], 2), name)
+        return "(%s) %s" % (', '.join([self._type(t, 0) for t in args]), name)
+
+    def _object(self, fields):
+        methods = []
+        ty = self._repr(fields)
+        while type(ty) is Block and type(ty.fields[0]) is Block and \
+                ty.fields[0].tag == self.TFIELD:
+            (name, kind, t, ty) = ty.fields[0].fields
+            name = _str(name)
+            # Fabsent is 1 in every version, and dummy methods
+            # start with a star
+            if kind != 1 and not name.startswith('*'):
+                methods.append("%s : %s" % (name, self._type(t, 0)))
+            ty = self._repr(ty)
+        is_open = type(ty) is Block and type(ty.fields[0]) is Block
+        if is_open:
+            methods.append('..')
+        return '< ' + '; '.join(methods) + ' >'
+
+    def _variant(self, row):
+        # {row_fields; row_more; row_bound; row_closed; row_fixed;
+        #  row_name}
+        f = row.fields
+        name = f[5] if len(f) > 5 else 0
+        if type(name) is Block:
+            (path, args) = name.fields[0].fields
+            return self._constr(self.path(path), _list(args))
+        tags = []
+        for pair in _list(f[0]):
+            (label, field) = pair.fields
+            if type(field) is not Block:
+                # Rabsent
+                continue
+            arg = field.fields[0] if field.tag == 0 else None
+            text = '`' + _str(label)
+            if type(arg) is Block and arg.tag == 0 and arg.fields and \
+                    type(arg.fields[0]) is Block:
+                # Rpresent (Some ty)
+                text += ' of ' + self._type(arg.fields[0], 1)
+            tags.append(text)
+        closed = len(f) > 3 and f[3] == 1
+        return '[%s %s ]' % ('' if closed else '>', ' | '.join(tags))
+
+
+def _str(b):
+    return b.decode('utf-8', 'replace') if type(b) is bytes else str(b)
+
+
+def _list(v):
+    """ The items of an OCaml list.
+    """
+    items = []
+    while type(v) is Block:
+        items.append(v.fields[0])
+        v = v.fields[1]
+    return items
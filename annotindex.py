@@ -0,0 +1,667 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# annotindex.py
+#
+# Index entries holding every kind of annotation of a block, so a
+# single parse of an annotation file serves queries on any kind,
+# the index of the blocks of a file that updates them when the file
+# is written again, and the read-only interval index they are
+# queried from.
+#
+# Copyright (C) 2014, Linh Vu Hong
+#-----------------------------------------------------------------
+import bisect
+import hashlib
+import re
+import sys
+import threading
+from array import array
+from itertools import chain, repeat
+try:
+    from .annotscanner import AnnotScanner, split_chunks
+    from .intervaltree import Interval
+except SystemError:
+    from annotscanner import AnnotScanner, split_chunks
+    from intervaltree import Interval
+
+# bits of the kinds of annotations, in the order of their payloads
+# in an entry
+KIND_BITS = {"type": 1, "ident": 2, "call": 4}
+
+_KINDS = sorted(KIND_BITS, key=KIND_BITS.get)
+
+# _SLOTS[kinds][kind] is the index of the payload of kind in an entry
+# with the bitmap kinds
+_SLOTS = []
+for _mask in range(1 << len(_KINDS)):
+    _slots = {}
+    for _kind in _KINDS:
+        if _mask & KIND_BITS[_kind]:
+            _slots[_kind] = len(_slots) + 1
+    _SLOTS.append(_slots)
+
+
+def make_entry(payloads, join="\n".join):
+    """ The entry of a block whose payloads is a dict from kinds to
+        the lists of their payloads: a tuple (kinds, data...), where
+        kinds is the bitmap of the kinds of the block and data the
+        join of the payloads of each of these kinds, in bit order.
+    """
+    kinds = 0
+    data = [0]
+    for kind in _KINDS:
+        if kind in payloads:
+            kinds |= KIND_BITS[kind]
+            data.append(join(payloads[kind]))
+    data[0] = kinds
+    return tuple(data)
+
+
+def block_entries(blocks, join="\n".join):
+    """ Turns blocks into records (start offset, end offset, entry),
+        see make_entry, the offsets being the absolute byte offsets
+        of the positions of the blocks. Blocks without annotations
+        are left out.
+    """
+    for b in blocks:
+        payloads = {}
+        for a in b.annotations:
+            payloads.setdefault(a.type, []).append(a.data)
+        if payloads:
+            yield (b.start.offset, b.end.offset, make_entry(payloads, join))
+
+
+def has_kind(entry, kind):
+    """ Whether the block of entry has annotations of kind.
+    """
+    return entry[0] & KIND_BITS[kind] != 0
+
+
+def entry_payload(entry, kind):
+    """ The payload of kind in entry, None if the block has none.
+    """
+    slot = _SLOTS[entry[0]].get(kind)
+    return entry[slot] if slot else None
+
+
+def entry_kinds(entry):
+    """ The kinds of annotations in entry, in bit order.
+    """
+    return [k for k in _KINDS if entry[0] & KIND_BITS[k]]
+
+
+class CharOffsets(object):
+    """ Maps the byte offsets of the positions of a source file, as
+        OCaml gives them, to the character offsets of its text once
+        decoded from UTF-8 with its \r\n line ends read as \n, as
+        Sublime Text shows it.
+
+        Both are the same for most sources, which are ASCII with \n
+        line ends. Otherwise, the table holds the byte offset after
+        each character that takes more bytes than characters, and the
+        number of bytes in excess up to there.
+    """
+    # characters of several bytes (or undecodable bytes), and \r\n
+    _WIDE = re.compile(b'[\xc0-\xff][\x80-\xbf]*|[\x80-\xbf]|\r\n')
+
+    def __init__(self, data):
+        self.ends = [0]
+        self.excess = [0]
+        for m in self._WIDE.finditer(data):
+            if m.end() - m.start() > 1:
+                self.ends.append(m.end())
+                self.excess.append(self.excess[-1] + m.end() - m.start() - 1)
+
+    @classmethod
+    def of_file(cls, filename):
+        with open(filename, 'rb') as f:
+            return cls(f.read())
+
+    def is_identity(self):
+        return len(self.ends) == 1
+
+    def __eq__(self, other):
+        return self.ends == other.ends and self.excess == other.excess
+
+    def __ne__(self, other):
+        return not self == other
+
+    def char_offset(self, offset):
+        """ The character offset of the byte offset offset.
+        """
+        return offset - self.excess[bisect.bisect_right(self.ends, offset) - 1]
+
+
+class StaticIndex(object):
+    """ A read-only index of intervals with int bounds, queried like
+        an IntervalTree: search() and [] give the set of the Intervals
+        containing a point, overlapping a range or contained in it.
+
+        Annotations are written once, so instead of the nodes, sets
+        and boundary table of an IntervalTree, the index is a nested
+        containment list (Alekseyenko and Lee, 2007) in arrays: the
+        intervals contained in an interval are in its sublist, so the
+        intervals of a list are sorted both by begin and by end, and
+        each list is searched by bisection. Spans of expressions are
+        nested, so a point is searched in a list per level of nesting,
+        and the lists make the forest of the spans, see enclosing().
+
+        patched() gives the index of a few changes to the intervals,
+        which shares the arrays of this one: the intervals removed are
+        left out of the results of queries, and the ones added are in
+        a small index of their own, searched too.
+    """
+    # the part of the intervals of an index that a patched index can
+    # add or remove, beyond which patched() builds a new index
+    PATCH_RATIO = 1.0 / 16
+    def __init__(self, intervals=()):
+        """ intervals: (begin, end, data) tuples, such as records
+            or Intervals. Equal ones are only indexed once.
+        """
+        # sorted by begin, and by end backwards: intervals come after
+        # the ones that contain them
+        items = []
+        # the first of the items of the same bounds as the last one
+        same = 0
+        for (begin, end, data) in sorted(intervals, key=lambda i: (i[0], -i[1])):
+            if begin >= end:
+                raise ValueError(
+                    "StaticIndex: null interval {0}".format((begin, end, data)))
+            if items and items[same][0] == begin and items[same][1] == end:
+                if (begin, end, data) in items[same:]:
+                    continue
+            else:
+                same = len(items)
+            items.append((begin, end, data))
+
+        # the children of each interval, at index + 1 of its parent,
+        # the top list at 0
+        children = [[] for _ in range(len(items) + 1)]
+        parents = []
+        for (i, (begin, end, _)) in enumerate(items):
+            while parents and items[parents[-1]][1] < end:
+                parents.pop()
+            children[parents[-1] + 1 if parents else 0].append(i)
+            parents.append(i)
+
+        # the lists one after the other, each one after its parent's
+        order = children[0]
+        self.top = (0, len(order))
+        self.sublists = array('q', [0]) * (2 * len(items))
+        # the index of the parent of each interval, -1 at the top
+        self.parents = array('q', [-1]) * len(items)
+        for k in range(len(items)):
+            sub = children[order[k] + 1]
+            self.sublists[2 * k] = len(order)
+            for j in range(len(order), len(order) + len(sub)):
+                self.parents[j] = k
+            order.extend(sub)
+            self.sublists[2 * k + 1] = len(order)
+        self.begins = array('q', [items[i][0] for i in order])
+        self.ends = array('q', [items[i][1] for i in order])
+        self.data = [items[i][2] for i in order]
+        # the Intervals given by search() by index, None until given
+        self._intervals = None
+        # the indexes of the intervals removed by patched(), and the
+        # index of the ones added
+        self.removed = frozenset()
+        self.overlay = None
+
+    def __len__(self):
+        added = len(self.overlay) if self.overlay else 0
+        return len(self.data) - len(self.removed) + added
+
+    def __iter__(self):
+        removed = self.removed
+        for i in range(len(self.data)):
+            if i not in removed:
+                yield self._interval(i)
+        if self.overlay:
+            for interval in self.overlay:
+                yield interval
+
+    def __getitem__(self, index):
+        """ The intervals containing the point index, or overlapping
+            the slice index.
+        """
+        if isinstance(index, slice):
+            indexes = [i for i in (self, self.overlay) if i and i.data]
+            start = min(min(i.begins) for i in indexes) if index.start is None and indexes else index.start
+            stop = max(max(i.ends) for i in indexes) if index.stop is None and indexes else index.stop
+            return self.search(start, stop)
+        return self.search(index)
+
+    def values(self):
+        """ The data of the intervals.
+        """
+        removed = self.removed
+        data = [d for (i, d) in enumerate(self.data) if i not in removed] if removed else self.data
+        return data + self.overlay.data if self.overlay else data
+
+    def patched(self, added, removed):
+        """ The index of the intervals of this one, without the ones
+            of removed and with the ones of added, (begin, end, data)
+            tuples.
+
+            The index shares the arrays of this one while the changes
+            are at most PATCH_RATIO of its intervals, otherwise it is
+            built again from all of them.
+        """
+        (added, removed) = (set(added), set(removed))
+        (added, removed) = (added - removed, removed - added)
+        overlay = set(self.overlay._records()) if self.overlay else set()
+        gone = set(self.removed)
+        for record in removed:
+            i = -1 if record in overlay else self._find(*record)
+            if i < 0:
+                overlay.discard(record)
+            else:
+                gone.add(i)
+        for record in added:
+            i = self._find(*record)
+            if i < 0:
+                overlay.add(record)
+            else:
+                gone.discard(i)
+        if len(overlay) + len(gone) > len(self.data) * self.PATCH_RATIO:
+            return StaticIndex(chain(
+                (r for (i, r) in enumerate(self._records()) if i not in gone), overlay))
+        index = object.__new__(StaticIndex)
+        index.__dict__.update(self.__dict__)
+        index.removed = frozenset(gone)
+        index.overlay = StaticIndex(overlay) if overlay else None
+        return index
+
+    def search(self, begin, end=None, strict=False):
+        """ The set of the intervals containing the point begin, or
+            overlapping [begin, end), or if strict is True, contained
+            in [begin, end].
+        """
+        if end is None:
+            (begin, end) = (begin, begin + 1)
+        elif begin >= end:
+            return set()
+        if strict:
+            indexes = self._contained(begin, end)
+        else:
+            indexes = self._overlapping(begin, end)
+        intervals = self._intervals
+        if intervals is None:
+            # finding the intervals of a range takes much less than
+            # building them, so the ones given are kept for the next
+            # searches, like the nodes of an IntervalTree
+            intervals = self._intervals = [None] * len(self.data)
+        if self.removed:
+            indexes = [i for i in indexes if i not in self.removed]
+        missing = [i for i in indexes if intervals[i] is None]
+        if missing:
+            # built together, like _interval does one
+            built = map(tuple.__new__, repeat(Interval), zip(
+                map(self.begins.__getitem__, missing),
+                map(self.ends.__getitem__, missing),
+                map(self.data.__getitem__, missing)))
+            for (i, interval) in zip(missing, built):
+                intervals[i] = interval
+        result = set(map(intervals.__getitem__, indexes))
+        if self.overlay:
+            result |= self.overlay.search(begin, end, strict)
+        return result
+
+    def enclosing(self, point):
+        """ The intervals containing point, from the innermost one
+            outwards, if the intervals are nested. Otherwise, only
+            the innermost interval of the last of the intervals of a
+            list that contain point, and its ancestors.
+        """
+        result = []
+        i = self._innermost(point)
+        while i >= 0:
+            if i not in self.removed:
+                result.append(self._interval(i))
+            i = self.parents[i]
+        if self.overlay:
+            # nested intervals are sorted by length
+            result = sorted(result + self.overlay.enclosing(point), key=Interval.length)
+        return result
+
+    ######################--   PRIVATE   --######################
+
+    def _records(self):
+        # the (begin, end, data) tuples of the arrays, the removed
+        # ones included
+        return zip(self.begins, self.ends, self.data)
+
+    def _find(self, begin, end, data):
+        # the index of the interval (begin, end, data), found down the
+        # lists like _innermost, -1 if there is none: the lists are
+        # sorted by end too, so only the last interval of a list that
+        # begins at begin at most can contain it
+        begins = self.begins
+        ends = self.ends
+        sublists = self.sublists
+        (lo, hi) = self.top
+        while lo < hi:
+            i = bisect.bisect_right(begins, begin, lo, hi) - 1
+            if i < lo or ends[i] < end:
+                break
+            if begins[i] == begin and ends[i] == end and self.data[i] == data:
+                return i
+            (lo, hi) = (sublists[2 * i], sublists[2 * i + 1])
+        return -1
+
+    def _interval(self, i):
+        # Interval.__new__ and the one of its namedtuple base are
+        # Python functions, tuple.__new__ builds the same Interval
+        return tuple.__new__(Interval, (self.begins[i], self.ends[i], self.data[i]))
+
+    def _innermost(self, point):
+        # the index of the innermost interval containing point, found
+        # down the lists, -1 if there is none
+        begins = self.begins
+        ends = self.ends
+        sublists = self.sublists
+        found = -1
+        (lo, hi) = self.top
+        while lo < hi:
+            # the last interval of the list beginning at point at most
+            i = bisect.bisect_right(begins, point, lo, hi) - 1
+            if i < lo or ends[i] <= point:
+                break
+            found = i
+            (lo, hi) = (sublists[2 * i], sublists[2 * i + 1])
+        return found
+
+    def _overlapping(self, begin, end):
+        # the indexes of the intervals overlapping [begin, end): the
+        # ones of a list are the ones from the first ending after
+        # begin, up to the first beginning at end, and the whole
+        # subtrees of the ones within [begin, end)
+        begins = self.begins
+        ends = self.ends
+        sublists = self.sublists
+        result = []
+        lists = [self.top]
+        while lists:
+            (lo, hi) = lists.pop()
+            i = bisect.bisect_right(ends, begin, lo, hi)
+            while i < hi and begins[i] < end:
+                if begins[i] >= begin and ends[i] <= end:
+                    self._append_subtree(i, result)
+                else:
+                    result.append(i)
+                    if sublists[2 * i] < sublists[2 * i + 1]:
+                        lists.append((sublists[2 * i], sublists[2 * i + 1]))
+                i += 1
+        return result
+
+    def _contained(self, begin, end):
+        # the indexes of the intervals contained in [begin, end]: the
+        # intervals of the sublists of the ones that are, and of the
+        # ones that overlap [begin, end], of which there are at most
+        # two per list
+        begins = self.begins
+        ends = self.ends
+        sublists = self.sublists
+        result = []
+        lists = [self.top]
+        while lists:
+            (lo, hi) = lists.pop()
+            i = bisect.bisect_right(ends, begin, lo, hi)
+            while i < hi and begins[i] < end:
+                if begins[i] >= begin and ends[i] <= end:
+                    self._append_subtree(i, result)
+                elif sublists[2 * i] < sublists[2 * i + 1]:
+                    lists.append((sublists[2 * i], sublists[2 * i + 1]))
+                i += 1
+        return result
+
+    def _append_subtree(self, i, result):
+        # the lists are laid out level by level, each one after the
+        # one of the previous interval, so the intervals of a level
+        # of the subtree are together
+        sublists = self.sublists
+        (lo, hi) = (i, i + 1)
+        while lo < hi:
+            result.extend(range(lo, hi))
+            (lo, hi) = (sublists[2 * lo], sublists[2 * hi - 1])
+
+
+class BlockIndex(object):
+    """ The records of the blocks of an annotation file (see
+        block_entries) by the digests of the text of the blocks.
+
+        When the file is written again, update() only parses the
+        blocks whose text changed, and entries() gives the records of
+        every block to build the StaticIndex of the new version from.
+        The digest of a block leaves its absolute positions out: it
+        covers the columns of its span on their lines, its length and
+        its annotations, and its records are kept relative to its
+        start. A block moved by an edit of the source before it keeps
+        its records, which are shifted to its new start.
+    """
+    # the positions heading a block, see AnnotScanner
+    _HEADER = re.compile(AnnotScanner.blank + AnnotScanner.header)
+
+    def __init__(self):
+        # the records of the blocks by their digests, with offsets
+        # relative to the start of their block
+        self.records = {}
+        # the digests and start offsets of the blocks, in file order
+        self.digests = []
+        self.starts = array('q')
+        # Number of blocks kept and parsed by the last update
+        self.reused = 0
+        self.parsed = 0
+        # Number of regions that could not be read in the last
+        # version, runs of blocks that do not parse, see AnnotParser
+        self.skipped = 0
+        # the digests of the blocks that do not parse
+        self.unreadable = set()
+
+    def update(self, chunks, parse, batchsize=1 << 20):
+        """ Reads the new version of the file from chunks, pieces of
+            its text holding whole blocks (see iter_chunks).
+
+            parse(text) returns (records, skipped), the records of
+            text, a run of new blocks, read resiliently, and the number
+            of regions skipped. Runs are parsed as soon as they reach
+            batchsize characters.
+
+            Returns (added, removed), the records of the new version
+            that were not in the last one and the other way round.
+            Every record is added by the first update.
+        """
+        (old, old_unreadable) = (self.records, self.unreadable)
+        (self.records, self.unreadable) = ({}, set())
+        (first, old_blocks) = (not self.digests, zip(self.digests, self.starts))
+        (self.digests, self.starts) = ([], array('q'))
+        self.reused = self.parsed = 0
+        pending = []
+        pending_size = 0
+        for chunk in chunks:
+            for text in split_chunks(chunk, 0):
+                (digest, start) = self._digest(text)
+                self.digests.append(digest)
+                self.starts.append(start)
+                if digest in self.records:
+                    # the same block again, it is already indexed
+                    self.reused += 1
+                elif digest in old:
+                    self.records[digest] = old.pop(digest)
+                    if digest in old_unreadable:
+                        self.unreadable.add(digest)
+                    self.reused += 1
+                else:
+                    # parsed with the next batch
+                    self.records[digest] = None
+                    pending.append((digest, start, text))
+                    pending_size += len(text)
+                    if pending_size >= batchsize:
+                        self._parse(pending, parse)
+                        pending = []
+                        pending_size = 0
+        self._parse(pending, parse)
+
+        self.skipped = 0
+        previous = False
+        for digest in self.digests:
+            unreadable = digest in self.unreadable
+            if unreadable and not previous:
+                self.skipped += 1
+            previous = unreadable
+
+        if first:
+            return (list(self.entries()), [])
+        # the blocks moved or changed, with the records they had
+        (before, after) = (set(old_blocks), set(zip(self.digests, self.starts)))
+        added = self._block_records(after - before, self.records)
+        removed = self._block_records(before - after, self.records, old)
+        added.update(self.records.get(None, ()))
+        removed.update(old.get(None, ()))
+        return (list(added - removed), list(removed - added))
+
+    def entries(self):
+        """ The records of every block of the last version, in file
+            order.
+        """
+        records = self.records
+        for (digest, start) in zip(self.digests, self.starts):
+            # blocks without records are parsed again by the next
+            # update, see _parse
+            for (begin, end, entry) in records.get(digest, ()):
+                yield (start + begin, start + end, entry)
+        # records that could not be matched to their block, see _parse
+        for record in records.get(None, ()):
+            yield record
+
+    ######################--   PRIVATE   --######################
+
+    def _block_records(self, blocks, *tables):
+        # the records of the blocks (digest, start), read from the
+        # first of tables that has the digest
+        records = set()
+        for (digest, start) in blocks:
+            for table in tables:
+                if digest in table:
+                    for (begin, end, entry) in table[digest]:
+                        records.add((start + begin, start + end, entry))
+                    break
+        return records
+
+    def _digest(self, text):
+        # the digest of a block and its start offset: the line, the
+        # beginning of line and the offset of its positions are
+        # replaced by the columns and the length of its span
+        m = self._HEADER.match(text)
+        if not m:
+            (start, key) = (0, text)
+        else:
+            (sfile, _, sbol, start, efile, _, ebol, end) = m.groups()
+            (start, end) = (int(start), int(end))
+            key = "%s %d %s %d %d" % (
+                sfile, start - int(sbol), efile, end - int(ebol), end - start) + text[m.end():]
+        return (hashlib.md5(key.encode('utf-8', 'surrogateescape')).digest(), start)
+
+    def _parse(self, pending, parse):
+        if not pending:
+            return
+        (records, skipped) = parse("".join([text for (_, _, text) in pending]))
+        self.parsed += len(pending)
+        # blocks give at most one record each, in file order, so the
+        # records are matched to the blocks by their offsets
+        i = 0
+        unmatched = []
+        for (digest, start, text) in pending:
+            m = self._HEADER.match(text)
+            key = m and (start, int(m.group(8)))
+            if key and i < len(records) and records[i][:2] == key:
+                (begin, end, entry) = records[i]
+                self.records[digest] = [(0, end - start, entry)]
+                i += 1
+            else:
+                self.records[digest] = []
+                unmatched.append((digest, text))
+        if skipped:
+            # the blocks without records are either unreadable or
+            # without annotations: the ones that still skip a region
+            # on their own are the unreadable ones
+            for (digest, text) in unmatched:
+                if parse(text)[1]:
+                    self.unreadable.add(digest)
+        if i < len(records):
+            # some records were not matched to their blocks: they are
+            # removed by the next update, which parses these blocks
+            # again
+            self.records[None] = self.records.get(None, []) + records[i:]
+            for (digest, _) in unmatched:
+                del self.records[digest]
+                self.unreadable.discard(digest)
+
+
+class PayloadTable(object):
+    """ Interns the payloads of entries, so the trees of all the
+        annotation files loaded by a process share one string per
+        distinct payload: types like int or unit recur thousands of
+        times in a file and across the files of a project.
+
+        Strings are interned with sys.intern, and freed once no tree
+        holds them anymore. The counts behind stats() are the ones of
+        the payloads of the last index of every file, see count(), so
+        loading a file again replaces its counts.
+    """
+    def __init__(self):
+        # indexes may be built by several threads, see ParserPool
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # the occurrences of every payload, by file
+            self.files = {}
+
+    def intern_entry(self, entry):
+        """ entry with its payloads interned, see make_entry.
+        """
+        return (entry[0],) + tuple([sys.intern(p) for p in entry[1:]])
+
+    def count(self, name, entries):
+        """ Counts the payloads of entries, the ones of the index of
+            the file name, in place of the ones of its last index.
+        """
+        occurrences = {}
+        for entry in entries:
+            for p in entry[1:]:
+                occurrences[p] = occurrences.get(p, 0) + 1
+        with self.lock:
+            self.files[name] = occurrences
+
+    def forget(self, name):
+        """ Drops the counts of the file name, see count().
+        """
+        with self.lock:
+            self.files.pop(name, None)
+
+    def stats(self):
+        """ A dict of the counts of the table: payloads, distinct
+            payloads, ratio of payloads to distinct payloads, and the
+            bytes the payloads would take unshared and of the copies
+            that sharing saves.
+        """
+        with self.lock:
+            files = list(self.files.values())
+        (lookups, total_bytes, sizes) = (0, 0, {})
+        for occurrences in files:
+            for (p, n) in occurrences.items():
+                if p not in sizes:
+                    sizes[p] = sys.getsizeof(p)
+                lookups += n
+                total_bytes += n * sizes[p]
+        distinct = len(sizes)
+        return {
+            'lookups': lookups,
+            'distinct': distinct,
+            'ratio': float(lookups) / distinct if distinct else 1.0,
+            'total_bytes': total_bytes,
+            'saved_bytes': total_bytes - sum(sizes.values()),
+        }
@@ -66,6 +66,15 @@ class AnnotLexer(object):
         """
         self.lexer = lex.lex(object=self, **kwargs)
 
+    def clone(self, error_func, on_scope_begin_func, on_scope_end_func):
+        """ Returns a new lexer with the given functions that shares
+        the built lexing tables of this one, see build.
+        """
+        c = AnnotLexer(error_func, on_scope_begin_func, on_scope_end_func)
+        c.filename = self.filename
+        c.lexer = self.lexer.clone(c)
+        return c
+
     def reset_lineno(self):
         """ Resets the internal line number counter of the lexer.
         """
@@ -78,6 +87,13 @@ class AnnotLexer(object):
         self.last_token = self.lexer.token()
         return self.last_token
 
+    def iter_tokens(self):
+        """ Iterates over the tokens of the input, for yacc's tokens
+            argument. Faster than calling token() for each of them,
+            but last_token is not updated.
+        """
+        return self.lexer.iter_tokens()
+
     def find_tok_column(self, token):
         """ Find the column of the token in its line.
         """
@@ -138,9 +154,20 @@ class AnnotLexer(object):
         return t
 
     def t_VAL(self, t):
-        r"\(\n\s+(.|\n)+?\n\)"
-        t.lexer.lineno += t.value.count('\n')
-        t.value = t.value.strip('(').strip(')').strip()
+        r"\(\n\s"
+        # The payload ends at the first ')' that opens a line. It is
+        # found with one scan of the text, where a lazy regex over
+        # (.|\n) backtracks on every character of the payload.
+        data = t.lexer.lexdata
+        close = data.find('\n)', t.lexpos + 4)
+        if close < 0:
+            # an unterminated '(' is an illegal character, as before
+            t.lexer.lexpos = t.lexpos
+            self._error('Illegal character %s' % repr('('), t)
+            return
+        t.lexer.lineno += data.count('\n', t.lexpos, close + 1)
+        t.lexer.lexpos = close + 2
+        t.value = data[t.lexpos + 1:close].strip()
         return t
 
     def t_newline(self, t):
@@ -1,9 +1,9 @@
 # annotlextab.py. This file automatically created by PLY (version 3.4). Don't edit!
 _tabversion   = '3.4'
-_lextokens    = {'TYPE': 1, 'VAL': 1, 'FILENAME': 1, 'IDENT': 1, 'CALL': 1, 'NUMBER': 1}
+_lextokens    = {'FILENAME': 1, 'NUMBER': 1, 'VAL': 1, 'TYPE': 1, 'IDENT': 1, 'CALL': 1}
 _lexreflags   = 0
 _lexliterals  = ''
 _lexstateinfo = {'INITIAL': 'inclusive'}
-_lexstatere   = {'INITIAL': [('(?P<t_ID>[a-zA-Z_][0-9a-zA-Z_]*)|(?P<t_FILENAME>"[a-zA-Z_][0-9a-zA-Z_]*\\.mf[i]?")|(?P<t_VAL>\\(\\n\\s+(.|\\n)+?\\n\\))|(?P<t_newline>\\n+)|(?P<t_NUMBER>[0-9]+)', [None, ('t_ID', 'ID'), ('t_FILENAME', 'FILENAME'), ('t_VAL', 'VAL'), None, ('t_newline', 'newline'), (None, 'NUMBER')])]}
+_lexstatere   = {'INITIAL': [('(?P<t_ID>[a-zA-Z_][0-9a-zA-Z_]*)|(?P<t_FILENAME>"[a-zA-Z_][0-9a-zA-Z_]*\\.mf[i]?")|(?P<t_VAL>\\(\\n\\s)|(?P<t_newline>\\n+)|(?P<t_NUMBER>[0-9]+)', [None, ('t_ID', 'ID'), ('t_FILENAME', 'FILENAME'), ('t_VAL', 'VAL'), ('t_newline', 'newline'), (None, 'NUMBER')])]}
 _lexstateignore = {'INITIAL': ' \t'}
 _lexstateerrorf = {'INITIAL': 't_error'}
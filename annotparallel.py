@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# annotparallel.py
+#
+# Parses a large annotation file in a pool of processes, each one
+# parsing a range of the file.
+#
+# Copyright (C) 2014, Linh Vu Hong
+#-----------------------------------------------------------------
+import io
+import locale
+import mmap
+import multiprocessing
+import os
+try:
+    from .annotindex import block_entries
+    from .annotscanner import AnnotScanner
+    from .annotstandalone import StandaloneAnnotParser
+except SystemError:
+    from annotindex import block_entries
+    from annotscanner import AnnotScanner
+    from annotstandalone import StandaloneAnnotParser
+
+
+def block_ranges(filename, parts):
+    """ Splits an annotation file into at most parts byte ranges of
+        about the same size, cut at block boundaries. Returns a list of
+        (start, end, lineno) triples, lineno being the line number of
+        the first line of the range.
+    """
+    with open(filename, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return []
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            cuts = [0]
+            for i in range(1, parts):
+                # blocks start at lines that begin with a quoted filename
+                cut = buf.find(b'\n"', max(size * i // parts, cuts[-1])) + 1
+                if cut <= 0:
+                    break
+                cuts.append(cut)
+            cuts.append(size)
+
+            ranges = []
+            lineno = 1
+            for (start, end) in zip(cuts, cuts[1:]):
+                ranges.append((start, end, lineno))
+                for pos in range(start, end, 1 << 20):
+                    lineno += buf[pos:min(pos + (1 << 20), end)].count(b'\n')
+            return ranges
+        finally:
+            buf.close()
+
+
+def parse_file(filename, parser='ply', processes=None, resilient=False):
+    """ Parses an annotation file in a pool of processes and returns
+        (records, skipped), where records is the list of the block
+        records of the file (see block_entries of annotindex) in file
+        order, and skipped the number of regions skipped by a
+        resilient parse.
+
+        parser:
+            'ply' for AnnotParser, 'standalone' for
+            StandaloneAnnotParser, 'scanner' for AnnotScanner
+
+        processes:
+            Number of processes, defaults to the number of CPUs
+
+        The processes are started by the first call, and kept for the
+        next ones until close_pool() is called.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    # the text is decoded like open_annot does, with the encoding of
+    # this process
+    encoding = locale.getpreferredencoding(False)
+    ranges = block_ranges(filename, processes)
+    args = [(filename, start, end, lineno, encoding, parser, resilient)
+            for (start, end, lineno) in ranges]
+    results = _get_pool(processes).map(_parse_range, args) if args else []
+
+    records = []
+    skipped = 0
+    for (recs, skips) in results:
+        records.extend(recs)
+        skipped += skips
+    return (records, skipped)
+
+
+def close_pool():
+    """ Stops the processes of parse_file.
+    """
+    global _pool
+    if _pool:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+
+######################--   PRIVATE   --######################
+
+# the pool of parse_file and its number of processes
+_pool = None
+_pool_size = 0
+
+
+def _get_pool(processes):
+    global _pool, _pool_size
+    if _pool and _pool_size != processes:
+        close_pool()
+    if not _pool:
+        (_pool, _pool_size) = (multiprocessing.Pool(processes), processes)
+    return _pool
+
+# parsers of a worker process, created on first use
+_parsers = {}
+
+
+def _get_parser(kind):
+    if kind not in _parsers:
+        if kind == 'scanner':
+            _parsers[kind] = AnnotScanner()
+        elif kind == 'standalone':
+            _parsers[kind] = StandaloneAnnotParser()
+        else:
+            # PLY is only imported when asked for
+            try:
+                from .annotparser import AnnotParser
+            except SystemError:
+                from annotparser import AnnotParser
+            _parsers[kind] = AnnotParser(yacc_debug=False, trusted=True)
+    return _parsers[kind]
+
+
+def _parse_range(args):
+    (filename, start, end, lineno, encoding, kind, resilient) = args
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # the same decoding as a file opened in text mode, see parse_file
+    text = io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+    parser = _get_parser(kind)
+    blocks = parser.iter_blocks(text, filename, resilient=resilient, lineno=lineno)
+    records = list(block_entries(blocks))
+    return (records, parser.skipped_regions)
@@ -14,19 +14,26 @@
 # Copyright (C) 2014, Linh Vu Hong
 #-----------------------------------------------------------------
 
+import copy
 import re
 try:
     from .ply import yacc
     from .intervaltree import intervaltree
     from . import annotast as ast
     from .annotlexer import AnnotLexer
-    from .plyparser import PLYParser, Coord, ParseError
+    from .plyparser import PLYParser, Coord, ParseError, load_tables
+    from .annotscanner import iter_chunks, split_chunks
 except SystemError:
     from ply import yacc
     from intervaltree import intervaltree
     import annotast as ast
     from annotlexer import AnnotLexer
-    from plyparser import PLYParser, Coord, ParseError
+    from plyparser import PLYParser, Coord, ParseError, load_tables
+    from annotscanner import iter_chunks, split_chunks
+
+# Digest of the grammar, naming the tables built in trusted mode
+_tables_version = 'ac3c73f027e7'
+
 class AnnotParser(PLYParser):
     def __init__(
             self,
@@ -34,7 +41,9 @@ class AnnotParser(PLYParser):
             lextab='annotlextab',
             yacc_optimize=False,
             yacctab='annotyacctab',
-            yacc_debug=False):
+            yacc_debug=False,
+            trusted=False,
+            tabcache=None):
         """ Create a new pyAnnotparser.
 
             Some arguments for controlling the debug/optimization
@@ -75,15 +84,35 @@ class AnnotParser(PLYParser):
             yacc_debug:
                 Generate a parser.out file that explains how yacc
                 built the parsing table from the grammar.
+
+            trusted:
+                Set to True when the parser is installed, maybe
+                zipped, and its tables match the grammar: lextab
+                and yacctab are imported from this package and used
+                without being checked against the grammar, and no
+                table is ever written next to the parser. Tables
+                that are missing are built on each run, or once
+                per grammar version if tabcache is given.
+
+            tabcache:
+                Directory where trusted mode keeps the tables it
+                had to build, under names versioned with the
+                grammar.
         """
         self.lex = AnnotLexer(
             error_func=self._lex_error_func,
             on_scope_begin_func=self._lex_on_scope_begin_func,
             on_scope_end_func=self._lex_on_scope_end_func)
 
+        if trusted:
+            lextab = load_tables(lextab, __package__, tabcache, _tables_version)
+            yacctab = load_tables(yacctab, __package__, tabcache, _tables_version)
+
         self.lex.build(
-            optimize=lex_optimize,
-            lextab=lextab)
+            optimize=lex_optimize or trusted,
+            lextab=lextab,
+            outputdir=tabcache or '',
+            trusted=trusted)
         self.tokens = self.lex.tokens
 
         rules_with_list = { 
@@ -91,7 +120,7 @@ class AnnotParser(PLYParser):
         }
 
         for rule in rules_with_list:
-            self._create_list_rule(rule)
+            self._create_list_rule(rule, left_recursive=True)
 
         rules_with_string = { 
             'annotation',
@@ -99,7 +128,7 @@ class AnnotParser(PLYParser):
         }
 
         for rule in rules_with_string:
-            self._create_list_rule(rule,"",'_string')
+            self._create_list_rule(rule,"",'_string', left_recursive=True)
 
         rules_with_opt = {
             'block_string',
@@ -113,8 +142,11 @@ class AnnotParser(PLYParser):
             module=self,
             start='file',
             debug=yacc_debug,
-            optimize=yacc_optimize,
-            tabmodule=yacctab)
+            optimize=yacc_optimize or trusted,
+            tabmodule=yacctab,
+            write_tables=not trusted or isinstance(yacctab, str),
+            outputdir=tabcache or '',
+            trusted=trusted)
 
         # Stack of scopes for keeping track of symbols. _scope_stack[-1] is
         # the current (topmost) scope. Each scope is a dictionary that
@@ -129,7 +161,27 @@ class AnnotParser(PLYParser):
         # Keeps track of the last token given to yacc (the lookahead token)
         self._last_yielded_token = None
 
-    def parse(self, text, filename='', debuglevel=0):
+        # Number of regions skipped by the last resilient parse
+        self.skipped_regions = 0
+
+    def clone(self):
+        """ Returns a parser that shares the lexing and parsing
+            tables of this one, without building or loading them.
+            A parser must not be used by two threads at once; give
+            each thread its own clone instead.
+        """
+        c = copy.copy(self)
+        c.lex = self.lex.clone(
+            error_func=c._lex_error_func,
+            on_scope_begin_func=c._lex_on_scope_begin_func,
+            on_scope_end_func=c._lex_on_scope_end_func)
+        c.parser = self.parser.clone(c)
+        c._scope_stack = [dict()]
+        c._last_yielded_token = None
+        c.skipped_regions = 0
+        return c
+
+    def parse(self, text, filename='', debuglevel=0, resilient=False):
         """ Parses code and returns an AST.
 
             text:
@@ -141,18 +193,108 @@ class AnnotParser(PLYParser):
 
             debuglevel:
                 Debug level to yacc
+
+            resilient:
+                If True, parse errors do not raise a ParseError.
+                The text is parsed in chunks, and a chunk that does
+                not parse is parsed again block by block, skipping
+                the blocks that still do not parse. The number of
+                skipped regions is left in skipped_regions.
         """
         self.lex.filename = filename
+        self.skipped_regions = 0
+        if resilient:
+            return ast.File(list(self._iter_chunk_blocks(
+                split_chunks(text), debuglevel, resilient, 1)))
         self.lex.reset_lineno()
         self._scope_stack = [dict()]
         self._last_yielded_token = None
+        self.lex.input(text)
         return self.parser.parse(
-                input=text,
                 lexer=self.lex,
-                debug=debuglevel)
+                debug=debuglevel,
+                tokens=self.lex.iter_tokens())
+
+    def iter_blocks(self, fileobj, filename='', chunksize=65536, debuglevel=0,
+                    resilient=False, lineno=1):
+        """ Parses an annotation file chunk by chunk and yields its
+            blocks one at a time.
+
+            The file is cut at block boundaries into chunks of about
+            chunksize characters, and each chunk is parsed on its
+            own, so only one chunk and its blocks are held in memory
+            at any time.
+
+            fileobj:
+                A file object opened in text mode
+
+            filename:
+                Name of the file being parsed (for meaningful
+                error messages)
+
+            chunksize:
+                Number of characters read from fileobj at a time
+
+            debuglevel:
+                Debug level to yacc
+
+            resilient:
+                Skip the blocks that do not parse, see parse()
+
+            lineno:
+                Line number of the first line of fileobj, when it
+                is read from the middle of a file
+        """
+        self.lex.filename = filename
+        self.skipped_regions = 0
+        return self._iter_chunk_blocks(
+            iter_chunks(fileobj, chunksize), debuglevel, resilient, lineno)
 
     ######################--   PRIVATE   --######################
 
+    def _iter_chunk_blocks(self, chunks, debuglevel, resilient, lineno):
+        for chunk in chunks:
+            for block in self._parse_chunk(chunk, lineno, debuglevel, resilient):
+                yield block
+            lineno += chunk.count('\n')
+
+    def _parse_chunk(self, chunk, lineno, debuglevel, resilient):
+        """ Parses a piece of text holding complete blocks, starting
+            at line lineno, and returns its blocks.
+
+            In resilient mode, a chunk that does not parse is parsed
+            again block by block: only that chunk is parsed twice,
+            and each run of blocks that still do not parse counts as
+            one skipped region.
+        """
+        try:
+            return self._parse_text(chunk, lineno, debuglevel).blocks
+        except ParseError:
+            if not resilient:
+                raise
+        blocks = []
+        skipping = False
+        for piece in split_chunks(chunk, 0):
+            try:
+                blocks.extend(self._parse_text(piece, lineno, debuglevel).blocks)
+                skipping = False
+            except ParseError:
+                if not skipping:
+                    self.skipped_regions += 1
+                skipping = True
+            lineno += piece.count('\n')
+        return blocks
+
+    def _parse_text(self, text, lineno, debuglevel):
+        self.lex.input(text)
+        self.lex.lexer.lineno = lineno
+        self._scope_stack = [dict()]
+        self._last_yielded_token = None
+        return self.parser.parse(
+                lexer=self.lex,
+                debug=debuglevel,
+                tokens=self.lex.iter_tokens())
+
     def _push_scope(self):
         self._scope_stack.append(dict())
 
@@ -237,7 +379,7 @@ class AnnotParser(PLYParser):
     def p_position(self,p):
         """ position : FILENAME NUMBER NUMBER NUMBER 
         """
-        p[0] = ast.Position(p[1],int(p[2]),int(p[4]) - int(p[3])) 
+        p[0] = ast.Position(p[1],int(p[2]),int(p[4]) - int(p[3]),int(p[4]))
 
     def p_annotation_1(self,p):
         """ annotation : TYPE VAL 
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# annotpool.py
+#
+# A pool of annotation parsers shared by threads. The parsers keep
+# state while parsing, so a thread takes one out of the pool for
+# the length of a parse; new parsers are clones of the first one
+# and share its tables.
+#
+# Copyright (C) 2014, Linh Vu Hong
+#-----------------------------------------------------------------
+import contextlib
+import threading
+
+
+class ParserPool(object):
+    """ A pool of parsers made by factory, any of AnnotParser,
+        AnnotSinkParser, StandaloneAnnotParser or AnnotScanner.
+
+        with pool.parser() as parser:
+            tree = parser.parse(text, filename)
+
+        The factory is only called once, on first use; the parsers
+        needed by concurrent parses are made with clone().
+    """
+    def __init__(self, factory):
+        self._factory = factory
+        self._prototype = None
+        self._free = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def parser(self):
+        """ Takes a parser out of the pool for the with block.
+        """
+        parser = self._acquire()
+        try:
+            yield parser
+        finally:
+            with self._lock:
+                self._free.append(parser)
+
+    ######################--   PRIVATE   --######################
+
+    def _acquire(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            if self._prototype is None:
+                # building the tables is done once, under the lock
+                self._prototype = self._factory()
+                return self._prototype
+        return self._prototype.clone()
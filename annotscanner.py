@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# annotscanner.py
+#
+# A fast scanner for mlfi annotation files, producing the same
+# AST as AnnotParser.
+#
+# Copyright (C) 2014, Linh Vu Hong
+#-----------------------------------------------------------------
+import copy
+import gzip
+import locale
+import mmap
+import os
+import re
+try:
+    import lzma
+except ImportError:
+    # not built in every Python
+    lzma = None
+try:
+    from . import annotast as ast
+    from .plyparser import Coord, ParseError
+except SystemError:
+    import annotast as ast
+    from plyparser import Coord, ParseError
+
+# names of an annotation file, plain or compressed, after the name
+# of its source file without extension, in order of preference
+ANNOT_SUFFIXES = ('.annot', '.annot.gz', '.annot.xz')
+
+
+def open_annot(filename):
+    """ Opens an annotation file in text mode. .gz and .xz files are
+        decompressed while they are read, so the text of the whole
+        file is never held at once (see iter_chunks).
+    """
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rt')
+    if filename.endswith('.xz'):
+        if lzma is None:
+            raise IOError("Cannot decompress {0}: no lzma module".format(filename))
+        return lzma.open(filename, 'rt')
+    return open(filename, 'r')
+
+
+def iter_chunks(fileobj, chunksize=65536):
+    """ Reads an annotation file and yields pieces of its text,
+        of about chunksize characters each, that only hold complete
+        blocks.
+
+        Blocks start at lines that begin with a quoted filename
+        (payload lines are always indented), so the text can be cut
+        safely just before such a line.
+    """
+    rest = ''
+    while True:
+        data = fileobj.read(chunksize)
+        if not data:
+            break
+        buf = rest + data
+        cut = buf.rfind('\n"') + 1
+        if cut > 0:
+            yield buf[:cut]
+            rest = buf[cut:]
+        else:
+            rest = buf
+    if rest:
+        yield rest
+
+
+def split_chunks(text, chunksize=65536):
+    """ Cuts text into pieces of at least chunksize characters that
+        only hold complete blocks, like iter_chunks. With a chunksize
+        of 0, every piece holds a single block.
+    """
+    start = 0
+    size = len(text)
+    while start < size:
+        cut = text.find('\n"', start + chunksize) + 1
+        if cut <= 0:
+            cut = size
+        yield text[start:cut]
+        start = cut
+
+
+class MappedAnnot(object):
+    """ An annotation file mapped in memory.
+
+    Payloads scanned from a mapped file (see AnnotScanner.scan_mapped)
+    are references to their offset and length in the file instead of
+    strings, and are only read from the file and decoded when asked for
+    with payload().
+
+    Reading the mapping of a file that was truncated since it was mapped
+    kills the process (SIGBUS), and the mapping locks the file on
+    Windows: it is closed once scanned, payload() reads the file again
+    and refuses to if its size or time changed since.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.encoding = locale.getpreferredencoding(False)
+        self.file = open(filename, 'rb')
+        st = os.fstat(self.file.fileno())
+        self.stamp = (st.st_size, st.st_mtime)
+        if st.st_size:
+            self.buf = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # empty files cannot be mapped
+            self.buf = b''
+
+    def close(self):
+        if self.buf:
+            self.buf.close()
+            self.buf = b''
+        self.file.close()
+
+    @staticmethod
+    def ref(offset, length):
+        """ Packs the offset and length of a payload in a single int.
+        """
+        return offset << 32 | length
+
+    def join(self, refs):
+        """ The data of a block holding the payloads refs, see payload().
+        """
+        return refs[0] if len(refs) == 1 else tuple(refs)
+
+    def payload(self, ref):
+        """ Reads and decodes the payload referenced by ref, or the
+            payloads joined with newlines if ref is a tuple of references.
+        """
+        refs = ref if isinstance(ref, tuple) else (ref,)
+        texts = []
+        with open(self.filename, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if (st.st_size, st.st_mtime) != self.stamp:
+                raise IOError("{0} changed since it was scanned".format(self.filename))
+            for r in refs:
+                f.seek(r >> 32)
+                data = f.read(r & 0xffffffff)
+                texts.append(data.decode(self.encoding).replace('\r\n', '\n').strip())
+        return "\n".join(texts)
+
+
+class AnnotScanner(object):
+    """ A scanner for mlfi annotation files.
+
+    An annotation file is a flat sequence of blocks, each made of two
+    positions followed by any number of kind(payload) annotations.
+    Instead of going through the PLY lexer and LR parser, the scanner
+    walks the text once with a few compiled regexes and builds the
+    blocks directly. It accepts the same input as AnnotParser and
+    returns the same AST.
+    """
+
+    # FILENAME NUMBER NUMBER NUMBER, see AnnotLexer
+    position = (r'("[a-zA-Z_][0-9a-zA-Z_]*\.mf[i]?")'
+                r'[ \t\n]*([0-9]+)[ \t\n]+([0-9]+)[ \t\n]+([0-9]+)')
+
+    blank = r'[ \t\n]*'
+    header = position + r'[ \t\n]*' + position
+    # the payload itself is found with find(), see _scan()
+    annotation = r'[ \t\n]*(type|ident|call)[ \t\n]*\(\n\s'
+
+    keyword_map = {b'type': 'type', b'ident': 'ident', b'call': 'call'}
+
+    def __init__(self):
+        self.filename = ''
+        # Number of regions skipped by the last resilient scan
+        self.skipped_regions = 0
+        patterns = (self.blank, self.header, self.annotation)
+        self.text_res = [re.compile(p) for p in patterns]
+        # mapped files are read raw, so they may have \r\n line ends
+        self.bytes_res = [
+            re.compile(p.replace(r'\t\n', r'\t\r\n').replace(r'\(\n', r'\(\r?\n').encode('ascii'))
+            for p in patterns]
+
+    def clone(self):
+        """ Returns a scanner sharing the compiled regexes of this
+            one, for another thread.
+        """
+        c = copy.copy(self)
+        c.filename = ''
+        c.skipped_regions = 0
+        return c
+
+    def parse(self, text, filename='', debuglevel=0, resilient=False):
+        """ Scans the text and returns an AST, like AnnotParser.parse.
+
+            text:
+                A string containing the annotations
+
+            filename:
+                Name of the file being scanned (for meaningful
+                error messages)
+
+            debuglevel:
+                Ignored, for compatibility with AnnotParser.parse
+
+            resilient:
+                If True, malformed blocks are skipped instead of
+                raising a ParseError, see AnnotParser.parse
+        """
+        return ast.File(list(self.scan(text, filename, resilient)))
+
+    def scan(self, text, filename='', resilient=False):
+        """ Scans the text and yields its blocks one by one.
+        """
+        self.skipped_regions = 0
+        return self._scan(text, filename, False, resilient)
+
+    def scan_mapped(self, annot, filename='', resilient=False):
+        """ Scans a MappedAnnot and yields its blocks one by one. The
+            data of their annotations are payload references, to be
+            decoded with annot.payload().
+        """
+        self.skipped_regions = 0
+        return self._scan(annot.buf, filename or annot.filename, True, resilient)
+
+    def iter_blocks(self, fileobj, filename='', chunksize=65536,
+                    resilient=False, lineno=1):
+        """ Scans an annotation file chunk by chunk and yields its
+            blocks one at a time, see AnnotParser.iter_blocks.
+        """
+        self.skipped_regions = 0
+        for chunk in iter_chunks(fileobj, chunksize):
+            for block in self._scan(chunk, filename, False, resilient, lineno):
+                yield block
+            lineno += chunk.count('\n')
+
+    ######################--   PRIVATE   --######################
+
+    def _scan(self, text, filename, mapped, resilient, lineno=1):
+        self.filename = filename
+        (blank, header, annotation) = [
+            r.match for r in (self.bytes_res if mapped else self.text_res)]
+        find = text.find
+        close_mark = b'\n)' if mapped else '\n)'
+        (quote, block_mark) = (b'"', b'\n"') if mapped else ('"', '\n"')
+        ref = MappedAnnot.ref
+        keyword_map = self.keyword_map
+        Position = ast.Position
+        Annotation = ast.Annotation
+        Block = ast.Block
+
+        size = len(text)
+        pos = blank(text).end()
+        skipping = False
+        while pos < size:
+            m = header(text, pos)
+            if m is None:
+                if not resilient:
+                    self._error(text, pos, lineno)
+                # resume at the next line starting a block
+                if not skipping:
+                    self.skipped_regions += 1
+                    skipping = True
+                pos = find(block_mark, pos) + 1 or size
+                continue
+            (sfile, sline, sbol, scnum, efile, eline, ebol, ecnum) = m.groups()
+            if mapped:
+                (sfile, efile) = (sfile.decode('ascii'), efile.decode('ascii'))
+            scnum = int(scnum)
+            ecnum = int(ecnum)
+            start = Position(sfile, int(sline), scnum - int(sbol), scnum)
+            end = Position(efile, int(eline), ecnum - int(ebol), ecnum)
+            pos = m.end()
+
+            annotations = []
+            close = 0
+            m = annotation(text, pos)
+            while m is not None:
+                # the payload ends at the first line starting with ')'
+                close = find(close_mark, m.end() + 1)
+                if close < 0:
+                    if not resilient:
+                        self._error(text, m.start(1), lineno)
+                    # unterminated payload: drop the end of the text
+                    pos = size
+                    break
+                if mapped:
+                    annotations.append(Annotation(
+                        keyword_map[m.group(1)],
+                        ref(m.end() - 1, close - m.end() + 1)))
+                else:
+                    annotations.append(Annotation(
+                        m.group(1), text[m.end() - 1:close].strip()))
+                pos = close + 2
+                m = annotation(text, pos)
+
+            pos = blank(text, pos).end()
+            if resilient and (close < 0 or
+                              pos < size and text[pos:pos + 1] != quote):
+                # the block is cut short or followed by garbage: skip
+                # it, the next loop skips what is left of it
+                if not skipping:
+                    self.skipped_regions += 1
+                    skipping = True
+                continue
+            skipping = False
+            yield Block(start, end, annotations)
+
+    def _error(self, text, pos, lineno):
+        # text is bytes when scanning a mapped file
+        newline = '\n' if isinstance(text, str) else b'\n'
+        head = text[:pos]
+        line = head.count(newline) + lineno
+        column = pos - head.rfind(newline)
+        near = text[pos:pos + 40]
+        if not isinstance(near, str):
+            near = near.decode('utf-8', 'replace')
+        coord = Coord(file=self.filename, line=line, column=column)
+        raise ParseError("%s: before: %s" % (coord, near.split('\n')[0]))
+
+
+if __name__ == "__main__":
+    scanner = AnnotScanner()
+
+    buf = ''
+    try:
+        f = open('test.annot','r')
+        buf = f.read()
+    except:
+        print("cannot read file")
+    finally:
+        f.close()
+
+    t = scanner.parse(buf, 'x.annot')
+    t.show(showcoord=False)
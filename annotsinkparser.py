@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# ** ATTENTION **
+# This code was automatically generated from the file:
+# ./annotsink_yacc.ypp
+#
+# Do not modify it directly. Modify the configuration file and
+# run the generator again.
+# ** ** *** ** **
+#
+# pymlannot: annotsinkparser.py
+#
+# Copyright (C) 2014, Linh Vu Hong
+#-----------------------------------------------------------------
+
+try:
+    from .annotparser import AnnotParser
+    from .annotscanner import iter_chunks, split_chunks
+    from .plyparser import ParseError
+except SystemError:
+    from annotparser import AnnotParser
+    from annotscanner import iter_chunks, split_chunks
+    from plyparser import ParseError
+class AnnotSinkParser(object):
+    """ A parser of annotation files that builds no AST: it calls
+        on_block(start_line, start_col, end_line, end_col, kind, payload,
+                 start_offset, end_offset)
+        for every annotation of every block, in file order. The
+        offsets are the absolute ones of the positions, in bytes.
+
+        It parses with the grammar of AnnotParser, so both share the
+        same parsing tables, but it is not an AnnotParser: it has no
+        blocks to give, and parse() returns their number.
+    """
+    def __init__(
+            self,
+            on_block,
+            lex_optimize=False,
+            lextab='annotlextab',
+            yacc_optimize=False,
+            yacctab='annotyacctab',
+            yacc_debug=False,
+            trusted=False,
+            tabcache=None):
+        """ Create a new sink parser, see AnnotParser.
+
+            on_block:
+                The sink, called for every annotation. It may be
+                replaced between two parses.
+        """
+        self._parser = _SinkParser(
+            on_block,
+            lex_optimize=lex_optimize,
+            lextab=lextab,
+            yacc_optimize=yacc_optimize,
+            yacctab=yacctab,
+            yacc_debug=yacc_debug,
+            trusted=trusted,
+            tabcache=tabcache)
+
+    @property
+    def on_block(self):
+        return self._parser.on_block
+
+    @on_block.setter
+    def on_block(self, on_block):
+        self._parser.on_block = on_block
+
+    @property
+    def block_count(self):
+        """ Number of blocks given to the sink by the last parse.
+        """
+        return self._parser.block_count
+
+    @property
+    def skipped_regions(self):
+        """ Number of regions skipped by the last resilient parse.
+        """
+        return self._parser.skipped_regions
+
+    def clone(self):
+        """ Returns a sink parser feeding the same sink, that shares
+            the tables of this one, see AnnotParser.clone.
+        """
+        c = AnnotSinkParser.__new__(AnnotSinkParser)
+        c._parser = self._parser.clone()
+        return c
+
+    def parse(self, text, filename='', debuglevel=0, resilient=False):
+        """ Parses text into the sink and returns the number of
+            blocks, see AnnotParser.parse.
+        """
+        return self._parser.feed(split_chunks(text), filename, debuglevel,
+                                 resilient, 1)
+
+    def parse_file(self, fileobj, filename='', chunksize=65536, debuglevel=0,
+                   resilient=False, lineno=1):
+        """ Parses an annotation file chunk by chunk into the sink
+            and returns the number of blocks, see
+            AnnotParser.iter_blocks.
+        """
+        return self._parser.feed(iter_chunks(fileobj, chunksize), filename,
+                                 debuglevel, resilient, lineno)
+
+
+######################--   PRIVATE   --######################
+
+class _SinkParser(AnnotParser):
+    """ The AnnotParser of an AnnotSinkParser, whose productions
+        feed the sink instead of building blocks.
+    """
+    def __init__(self, on_block, **kwargs):
+        self.on_block = on_block
+        self.block_count = 0
+        super(_SinkParser, self).__init__(**kwargs)
+
+    def clone(self):
+        c = super(_SinkParser, self).clone()
+        c.block_count = 0
+        return c
+
+    def feed(self, chunks, filename, debuglevel, resilient, lineno):
+        self.lex.filename = filename
+        self.skipped_regions = 0
+        self.block_count = 0
+        for _ in self._iter_chunk_blocks(chunks, debuglevel, resilient, lineno):
+            pass
+        return self.block_count
+
+    def _parse_chunk(self, chunk, lineno, debuglevel, resilient):
+        """ Parses a chunk into the sink, see AnnotParser._parse_chunk.
+
+            Blocks reach the sink as soon as they are reduced, so when
+            the chunk does not parse, the blocks before the error have
+            been given to the sink already. Those are not parsed again.
+        """
+        count = self.block_count
+        try:
+            self._parse_text(chunk, lineno, debuglevel)
+            return ()
+        except ParseError:
+            if not resilient:
+                raise
+        done = self.block_count - count
+        skipping = False
+        for piece in split_chunks(chunk, 0):
+            if done:
+                done -= 1
+            else:
+                try:
+                    self._parse_text(piece, lineno, debuglevel)
+                    skipping = False
+                except ParseError:
+                    if not skipping:
+                        self.skipped_regions += 1
+                    skipping = True
+            lineno += piece.count('\n')
+        return ()
+
+    ##
+    ## Grammar productions, feeding the sink
+    ##
+
+    def p_file(self,p):
+        """ file : block_string_opt 
+        """
+        p[0] = None
+
+    def p_block(self,p):
+        """ block : position position annotation_string_opt 
+        """
+        (sline, scol, soffset) = p[1]
+        (eline, ecol, eoffset) = p[2]
+        for (kind, payload) in p[3] or ():
+            self.on_block(sline, scol, eline, ecol, kind, payload, soffset, eoffset)
+        self.block_count += 1
+
+    def p_position(self,p):
+        """ position : FILENAME NUMBER NUMBER NUMBER 
+        """
+        p[0] = (int(p[2]), int(p[4]) - int(p[3]), int(p[4]))
+
+    def p_annotation_1(self,p):
+        """ annotation : TYPE VAL 
+        """
+        p[0] = (p[1], p[2])
+
+    def p_annotation_2(self,p):
+        """ annotation : IDENT VAL 
+        """
+        p[0] = (p[1], p[2])
+
+    def p_annotation_3(self,p):
+        """ annotation : CALL VAL 
+        """
+        p[0] = (p[1], p[2])
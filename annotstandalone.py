@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+#-----------------------------------------------------------------
+# ** ATTENTION **
+# This code was automatically generated from the file:
+# ./annotparser_yacc.ypp
+#
+# Do not modify it directly. Modify the configuration file and
+# run the generator again.
+# ** ** *** ** **
+#
+# pymlannot: annotstandalone.py
+#
+# Copyright (C) 2014, Linh Vu Hong
+#-----------------------------------------------------------------
+
+import re
+try:
+    from . import annotast as ast
+    from .plyparser import Coord, ParseError
+    from .annotscanner import iter_chunks, split_chunks
+except SystemError:
+    import annotast as ast
+    from plyparser import Coord, ParseError
+    from annotscanner import iter_chunks, split_chunks
+
+# The rules of AnnotLexer, in a single regex with a named group
+# per rule (see lex.py)
+_lexre = re.compile('(?P<t_ID>[a-zA-Z_][0-9a-zA-Z_]*)|(?P<t_FILENAME>"[a-zA-Z_][0-9a-zA-Z_]*\\.mf[i]?")|(?P<t_VAL>\\(\\n\\s)|(?P<t_newline>\\n+)|(?P<t_NUMBER>[0-9]+)')
+_lexignore = ' \t'
+_keywords = {'call': 'CALL', 'ident': 'IDENT', 'type': 'TYPE'}
+# the rules whose tokens are returned as they are
+_plain = {'t_NUMBER': 'NUMBER', 't_FILENAME': 'FILENAME'}
+
+# LALR tables: _action[state][token] is n > 0 to shift the token and
+# go to state n, -n < 0 to reduce by production n, or 0 to accept.
+# _goto[state][nonterminal] is the state after a reduction.
+_action = (
+    {'$end': -15, 'FILENAME': 7},  # 0
+    {'$end': 0},  # 1
+    {'$end': -1},  # 2
+    {'$end': -13},  # 3
+    {'$end': -14, 'FILENAME': 7},  # 4
+    {'$end': -9, 'FILENAME': -9},  # 5
+    {'FILENAME': 7},  # 6
+    {'NUMBER': 10},  # 7
+    {'$end': -10, 'FILENAME': -10},  # 8
+    {'$end': -15, 'CALL': 17, 'FILENAME': -15, 'IDENT': 16, 'TYPE': 15},  # 9
+    {'NUMBER': 18},  # 10
+    {'$end': -2, 'FILENAME': -2},  # 11
+    {'$end': -11, 'FILENAME': -11},  # 12
+    {'$end': -12, 'CALL': 17, 'FILENAME': -12, 'IDENT': 16, 'TYPE': 15},  # 13
+    {'$end': -7, 'CALL': -7, 'FILENAME': -7, 'IDENT': -7, 'TYPE': -7},  # 14
+    {'VAL': 20},  # 15
+    {'VAL': 21},  # 16
+    {'VAL': 22},  # 17
+    {'NUMBER': 23},  # 18
+    {'$end': -8, 'CALL': -8, 'FILENAME': -8, 'IDENT': -8, 'TYPE': -8},  # 19
+    {'$end': -4, 'CALL': -4, 'FILENAME': -4, 'IDENT': -4, 'TYPE': -4},  # 20
+    {'$end': -5, 'CALL': -5, 'FILENAME': -5, 'IDENT': -5, 'TYPE': -5},  # 21
+    {'$end': -6, 'CALL': -6, 'FILENAME': -6, 'IDENT': -6, 'TYPE': -6},  # 22
+    {'$end': -3, 'CALL': -3, 'FILENAME': -3, 'IDENT': -3, 'TYPE': -3},  # 23
+)
+
+_goto = (
+    {'block': 5, 'block_string': 4, 'block_string_opt': 2, 'empty': 3, 'file': 1, 'position': 6},  # 0
+    {},  # 1
+    {},  # 2
+    {},  # 3
+    {'block': 8, 'position': 6},  # 4
+    {},  # 5
+    {'position': 9},  # 6
+    {},  # 7
+    {},  # 8
+    {'annotation': 14, 'annotation_string': 13, 'annotation_string_opt': 11, 'empty': 12},  # 9
+    {},  # 10
+    {},  # 11
+    {},  # 12
+    {'annotation': 19},  # 13
+    {},  # 14
+    {},  # 15
+    {},  # 16
+    {},  # 17
+    {},  # 18
+    {},  # 19
+    {},  # 20
+    {},  # 21
+    {},  # 22
+    {},  # 23
+)
+
+
+class StandaloneAnnotParser(object):
+    """ An AnnotParser that does not need PLY.
+
+    The lexer rules and the LALR tables of AnnotParser are embedded
+    as literals, so creating the parser builds and checks nothing.
+    It accepts the same input and returns the same AST.
+    """
+    def __init__(self):
+        self.filename = ''
+
+        # Number of regions skipped by the last resilient parse
+        self.skipped_regions = 0
+
+    def clone(self):
+        """ Returns a new parser, for another thread. The tables are
+            module constants, so this is as cheap as construction.
+        """
+        return StandaloneAnnotParser()
+
+    def parse(self, text, filename='', debuglevel=0, resilient=False):
+        """ Parses code and returns an AST, see AnnotParser.parse.
+            debuglevel is ignored.
+        """
+        self.filename = filename
+        self.skipped_regions = 0
+        if resilient:
+            return ast.File(list(self._iter_chunk_blocks(
+                split_chunks(text), debuglevel, resilient, 1)))
+        return self._parse_text(text, 1, debuglevel)
+
+    def iter_blocks(self, fileobj, filename='', chunksize=65536, debuglevel=0,
+                    resilient=False, lineno=1):
+        """ Parses an annotation file chunk by chunk and yields its
+            blocks one at a time, see AnnotParser.iter_blocks.
+        """
+        self.filename = filename
+        self.skipped_regions = 0
+        return self._iter_chunk_blocks(
+            iter_chunks(fileobj, chunksize), debuglevel, resilient, lineno)
+
+    ######################--   PRIVATE   --######################
+
+    def _iter_chunk_blocks(self, chunks, debuglevel, resilient, lineno):
+        for chunk in chunks:
+            for block in self._parse_chunk(chunk, lineno, debuglevel, resilient):
+                yield block
+            lineno += chunk.count('\n')
+
+    def _parse_chunk(self, chunk, lineno, debuglevel, resilient):
+        """ Parses a piece of text holding complete blocks, starting
+            at line lineno, and returns its blocks.
+
+            In resilient mode, a chunk that does not parse is parsed
+            again block by block: only that chunk is parsed twice,
+            and each run of blocks that still do not parse counts as
+            one skipped region.
+        """
+        try:
+            return self._parse_text(chunk, lineno, debuglevel).blocks
+        except ParseError:
+            if not resilient:
+                raise
+        blocks = []
+        skipping = False
+        for piece in split_chunks(chunk, 0):
+            try:
+                blocks.extend(self._parse_text(piece, lineno, debuglevel).blocks)
+                skipping = False
+            except ParseError:
+                if not skipping:
+                    self.skipped_regions += 1
+                skipping = True
+            lineno += piece.count('\n')
+        return blocks
+
+    def _parse_text(self, text, lineno, debuglevel):
+        action = _action
+        goto = _goto
+        productions = self._productions
+        next_token = self._tokens(text, lineno).__next__
+        statestack = [0]
+        # values of the symbols, above a bottom entry that lets
+        # reductions take their arguments with a single slice
+        symstack = [None]
+        state = 0
+        token = next_token()
+        while True:
+            t = action[state].get(token[0])
+            if t is None:
+                self._syntax_error(text, token)
+            if t > 0:
+                statestack.append(t)
+                symstack.append(token[1])
+                state = t
+                token = next_token()
+            elif t < 0:
+                (plen, name, func) = productions[-t]
+                # p[0] is a copy of the entry below the arguments,
+                # overwritten by the production
+                p = symstack[-plen - 1:]
+                if plen:
+                    del symstack[-plen:]
+                    del statestack[-plen:]
+                func(self, p)
+                state = goto[statestack[-1]][name]
+                statestack.append(state)
+                symstack.append(p[0])
+            else:
+                return symstack[-1]
+
+    def _tokens(self, text, lineno):
+        """ Yields the tokens of text as (type, value, lineno, lexpos),
+            like AnnotLexer, and then an end token.
+        """
+        match = _lexre.match
+        ignore = _lexignore
+        keywords = _keywords
+        plain = _plain
+        pos = 0
+        size = len(text)
+        while pos < size:
+            if text[pos] in ignore:
+                pos += 1
+                continue
+            m = match(text, pos)
+            if m is None:
+                self._lex_error(text, pos, lineno)
+            rule = m.lastgroup
+            value = m.group()
+            if rule in plain:
+                yield (plain[rule], value, lineno, pos)
+            elif rule == 't_newline':
+                lineno += len(value)
+            elif rule == 't_VAL':
+                # the regex only matches the opening of the payload,
+                # which ends at the first ')' opening a line
+                close = text.find('\n)', pos + 4)
+                if close < 0:
+                    self._lex_error(text, pos, lineno)
+                yield ('VAL', text[pos + 1:close].strip(), lineno, pos)
+                lineno += text.count('\n', pos, close + 1)
+                pos = close + 2
+                continue
+            else:
+                # t_ID, only keywords are tokens of the grammar
+                yield (keywords.get(value, 'ID'), value, lineno, pos)
+            pos = m.end()
+        yield ('$end', None, lineno, pos)
+
+    def _column(self, text, pos):
+        return pos - text.rfind('\n', 0, pos)
+
+    def _lex_error(self, text, pos, lineno):
+        coord = Coord(self.filename, lineno, self._column(text, pos))
+        raise ParseError("%s: Illegal character %r" % (coord, text[pos]))
+
+    def _syntax_error(self, text, token):
+        (ttype, value, lineno, pos) = token
+        if ttype == '$end':
+            raise ParseError(": At end of input")
+        coord = Coord(self.filename, lineno, self._column(text, pos))
+        raise ParseError("%s: before: %s" % (coord, value))
+
+    ##
+    ## Grammar productions
+    ##
+
+    def p_file(self,p):
+        """ file : block_string_opt 
+        """
+        p[0] = ast.File(p[1] or [])
+
+    def p_block(self,p):
+        """ block : position position annotation_string_opt 
+        """
+        p[0] = ast.Block(p[1], p[2], p[3] or [])    
+
+    def p_position(self,p):
+        """ position : FILENAME NUMBER NUMBER NUMBER 
+        """
+        p[0] = ast.Position(p[1],int(p[2]),int(p[4]) - int(p[3]),int(p[4]))
+
+    def p_annotation_1(self,p):
+        """ annotation : TYPE VAL 
+        """
+        p[0] = ast.Annotation(p[1], p[2])
+
+    def p_annotation_2(self,p):
+        """ annotation : IDENT VAL 
+        """
+        p[0] = ast.Annotation(p[1], p[2])
+
+    def p_annotation_3(self,p):
+        """ annotation : CALL VAL 
+        """
+        p[0] = ast.Annotation(p[1], p[2])
+
+    def p_annotation_string_1(self,p):
+        """ annotation_string : annotation 
+        """
+        p[0] = [p[1]]
+
+    def p_annotation_string_2(self,p):
+        """ annotation_string : annotation_string annotation 
+        """
+        p[1].append(p[2])
+        p[0] = p[1]
+
+    def p_block_string_1(self,p):
+        """ block_string : block 
+        """
+        p[0] = [p[1]]
+
+    def p_block_string_2(self,p):
+        """ block_string : block_string block 
+        """
+        p[1].append(p[2])
+        p[0] = p[1]
+
+    def p_annotation_string_opt(self,p):
+        """ annotation_string_opt : empty
+                                  | annotation_string 
+        """
+        p[0] = p[1]
+
+    def p_block_string_opt(self,p):
+        """ block_string_opt : empty
+                             | block_string 
+        """
+        p[0] = p[1]
+
+    def p_empty(self,p):
+        """ empty :  
+        """
+        p[0] = None
+
+
+# (length, left-hand side, action) of the productions, by number
+StandaloneAnnotParser._productions = (
+    (1, "S'", None),
+    (1, 'file', StandaloneAnnotParser.p_file),
+    (3, 'block', StandaloneAnnotParser.p_block),
+    (4, 'position', StandaloneAnnotParser.p_position),
+    (2, 'annotation', StandaloneAnnotParser.p_annotation_1),
+    (2, 'annotation', StandaloneAnnotParser.p_annotation_2),
+    (2, 'annotation', StandaloneAnnotParser.p_annotation_3),
+    (1, 'annotation_string', StandaloneAnnotParser.p_annotation_string_1),
+    (2, 'annotation_string', StandaloneAnnotParser.p_annotation_string_2),
+    (1, 'block_string', StandaloneAnnotParser.p_block_string_1),
+    (2, 'block_string', StandaloneAnnotParser.p_block_string_2),
+    (1, 'annotation_string_opt', StandaloneAnnotParser.p_annotation_string_opt),
+    (1, 'annotation_string_opt', StandaloneAnnotParser.p_annotation_string_opt),
+    (1, 'block_string_opt', StandaloneAnnotParser.p_block_string_opt),
+    (1, 'block_string_opt', StandaloneAnnotParser.p_block_string_opt),
+    (0, 'empty', StandaloneAnnotParser.p_empty),
+)
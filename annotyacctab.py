@@ -5,9 +5,9 @@ _tabversion = '3.2'
 
 _lr_method = 'LALR'
 
-_lr_signature = b'|{\x96<\xc74\xb4\xc0\xc2_Z#A\x81\xe0\x0f'
+_lr_signature = b'\xf9\xad\x0c \x16D\x93\xbc\x1bS\xd0\x0f\xe3\x94\x95\xea'
     
-_lr_action_items = {'TYPE':([8,14,19,21,22,23,],[12,12,-12,-13,-14,-11,]),'$end':([0,3,4,5,6,7,8,10,11,13,14,15,19,20,21,22,23,],[-15,-3,-4,-6,0,-9,-15,-8,-10,-1,-5,-2,-12,-7,-13,-14,-11,]),'VAL':([12,16,17,],[19,21,22,]),'FILENAME':([0,1,5,8,11,13,14,15,19,20,21,22,23,],[2,2,2,-15,-10,-1,-5,-2,-12,-7,-13,-14,-11,]),'IDENT':([8,14,19,21,22,23,],[16,16,-12,-13,-14,-11,]),'CALL':([8,14,19,21,22,23,],[17,17,-12,-13,-14,-11,]),'NUMBER':([2,9,18,],[9,18,23,]),}
+_lr_action_items = {'$end':([0,1,2,3,4,5,8,9,11,12,13,14,19,20,21,22,23,],[-15,0,-9,-3,-4,-6,-8,-15,-10,-1,-2,-5,-7,-12,-13,-14,-11,]),'FILENAME':([0,4,5,6,8,9,11,12,13,14,19,20,21,22,23,],[7,7,-6,7,-8,-15,-10,-1,-2,-5,-7,-12,-13,-14,-11,]),'NUMBER':([7,10,18,],[10,18,23,]),'TYPE':([9,13,14,19,20,21,22,23,],[15,15,-5,-7,-12,-13,-14,-11,]),'IDENT':([9,13,14,19,20,21,22,23,],[16,16,-5,-7,-12,-13,-14,-11,]),'CALL':([9,13,14,19,20,21,22,23,],[17,17,-5,-7,-12,-13,-14,-11,]),'VAL':([15,16,17,],[20,21,22,]),}
 
 _lr_action = { }
 for _k, _v in _lr_action_items.items():
@@ -16,7 +16,7 @@ for _k, _v in _lr_action_items.items():
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
-_lr_goto_items = {'annotation_string':([8,14,],[15,20,]),'annotation_string_opt':([8,],[11,]),'position':([0,1,5,],[1,8,1,]),'empty':([0,8,],[3,13,]),'annotation':([8,14,],[14,14,]),'block_string':([0,5,],[4,10,]),'block':([0,5,],[5,5,]),'file':([0,],[6,]),'block_string_opt':([0,],[7,]),}
+_lr_goto_items = {'file':([0,],[1,]),'block_string_opt':([0,],[2,]),'empty':([0,9,],[3,12,]),'block_string':([0,],[4,]),'block':([0,4,],[5,8,]),'position':([0,4,6,],[6,6,9,]),'annotation_string_opt':([9,],[11,]),'annotation_string':([9,],[13,]),'annotation':([9,13,],[14,19,]),}
 
 _lr_goto = { }
 for _k, _v in _lr_goto_items.items():
@@ -26,19 +26,19 @@ for _k, _v in _lr_goto_items.items():
 del _lr_goto_items
 _lr_productions = [
   ("S' -> file","S'",1,None,None,None),
-  ('annotation_string_opt -> empty','annotation_string_opt',1,'p_annotation_string_opt','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\plyparser.py',41),
-  ('annotation_string_opt -> annotation_string','annotation_string_opt',1,'p_annotation_string_opt','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\plyparser.py',42),
-  ('block_string_opt -> empty','block_string_opt',1,'p_block_string_opt','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\plyparser.py',41),
-  ('block_string_opt -> block_string','block_string_opt',1,'p_block_string_opt','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\plyparser.py',42),
-  ('annotation_string -> annotation','annotation_string',1,'p_annotation_string_1','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\plyparser.py',54),
-  ('block_string -> block','block_string',1,'p_block_string_1','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\plyparser.py',54),
-  ('annotation_string -> annotation annotation_string','annotation_string',2,'p_annotation_string_2','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\plyparser.py',61),
-  ('block_string -> block block_string','block_string',2,'p_block_string_2','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\plyparser.py',61),
-  ('file -> block_string_opt','file',1,'p_file','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\annotparser.py',228),
-  ('block -> position position annotation_string_opt','block',3,'p_block','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\annotparser.py',233),
-  ('position -> FILENAME NUMBER NUMBER NUMBER','position',4,'p_position','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\annotparser.py',238),
-  ('annotation -> TYPE VAL','annotation',2,'p_annotation_1','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\annotparser.py',243),
-  ('annotation -> IDENT VAL','annotation',2,'p_annotation_2','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\annotparser.py',248),
-  ('annotation -> CALL VAL','annotation',2,'p_annotation_3','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\annotparser.py',253),
-  ('empty -> <empty>','empty',0,'p_empty','C:\\cygwin\\home\\lhhv\\dev\\dev-misc\\sublime\\mlfi\\annotparser.py',258),
+  ('annotation_string_opt -> empty','annotation_string_opt',1,'p_annotation_string_opt','/root/mlfi/plyparser.py',78),
+  ('annotation_string_opt -> annotation_string','annotation_string_opt',1,'p_annotation_string_opt','/root/mlfi/plyparser.py',79),
+  ('block_string_opt -> empty','block_string_opt',1,'p_block_string_opt','/root/mlfi/plyparser.py',78),
+  ('block_string_opt -> block_string','block_string_opt',1,'p_block_string_opt','/root/mlfi/plyparser.py',79),
+  ('annotation_string -> annotation','annotation_string',1,'p_annotation_string_1','/root/mlfi/plyparser.py',100),
+  ('block_string -> block','block_string',1,'p_block_string_1','/root/mlfi/plyparser.py',100),
+  ('annotation_string -> annotation_string annotation','annotation_string',2,'p_annotation_string_2','/root/mlfi/plyparser.py',108),
+  ('block_string -> block_string block','block_string',2,'p_block_string_2','/root/mlfi/plyparser.py',108),
+  ('file -> block_string_opt','file',1,'p_file','/root/mlfi/annotparser.py',370),
+  ('block -> position position annotation_string_opt','block',3,'p_block','/root/mlfi/annotparser.py',375),
+  ('position -> FILENAME NUMBER NUMBER NUMBER','position',4,'p_position','/root/mlfi/annotparser.py',380),
+  ('annotation -> TYPE VAL','annotation',2,'p_annotation_1','/root/mlfi/annotparser.py',385),
+  ('annotation -> IDENT VAL','annotation',2,'p_annotation_2','/root/mlfi/annotparser.py',390),
+  ('annotation -> CALL VAL','annotation',2,'p_annotation_3','/root/mlfi/annotparser.py',395),
+  ('empty -> <empty>','empty',0,'p_empty','/root/mlfi/annotparser.py',400),
 ]
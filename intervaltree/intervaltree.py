@@ -783,10 +783,13 @@ class IntervalTree(collections.MutableSet):
         if strict is True, returns the set of all intervals fully
         contained in the range [begin, end].
         
-        Completes in O(m + k*log n) time, where:
+        Completes in O(m + log n) time, where:
           * n = size of the tree
-          * m = number of matches
-          * k = size of the search range (this is 1 for a point)
+          * m = number of matches, and of the intervals of the nodes
+            at the bounds of the range, which are filtered
+        Searches only visit the nodes whose intervals may overlap or
+        be contained in the range, see Node.search_range() and
+        Node.search_contained().
         :rtype: set of Interval
         """
         root = self.top_node
@@ -800,24 +803,10 @@ class IntervalTree(collections.MutableSet):
                 return root.search_point(begin, set())
         elif begin >= end:
             return set()
+        elif strict:
+            return root.search_contained(begin, end, set())
         else:
-            result = root.search_point(begin, set())
-
-            boundary_table = self.boundary_table
-            bound_begin = boundary_table.bisect_left(begin)
-            bound_end = boundary_table.bisect_left(end)  # exclude final end bound
-            result.update(root.search_overlap(
-                # slice notation is slightly slower
-                boundary_table.iloc[index] for index in xrange(bound_begin, bound_end)
-            ))
-
-            # TODO: improve strict search to use node info instead of less-efficient filtering
-            if strict:
-                result = set(
-                    iv for iv in result
-                    if iv.begin >= begin and iv.end <= end
-                )
-            return result
+            return root.search_range(begin, end, set())
     
     def begin(self):
         """
@@ -986,10 +975,9 @@ class IntervalTree(collections.MutableSet):
         Returns a set of all intervals overlapping the given index or 
         slice.
         
-        Completes in O(k * log(n) + m) time, where:
+        Completes in O(m + log n) time, where:
           * n = size of the tree
-          * m = number of matches
-          * k = size of the search range (this is 1 for a point)
+          * m = number of matches, see search()
         :rtype: set of Interval
         """
         try:
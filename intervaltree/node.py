@@ -61,7 +61,9 @@ class Node(object):
         if not intervals:
             return None
         node = Node()
-        node = node.init_from_sorted(sorted(intervals))
+        # only the order of the begins matters, and a key of native
+        # values sorts without calling Interval.__cmp__
+        node = node.init_from_sorted(sorted(intervals, key=attrgetter('begin', 'end')))
         return node
 
     def init_from_sorted(self, intervals):
@@ -299,6 +301,46 @@ class Node(object):
             return self[1].search_point(point, result)
         return result
 
+    def search_range(self, begin, end, result):
+        """
+        Returns all intervals overlapping [begin, end), in a single
+        descent: the intervals of s_center contain x_center, so they
+        all overlap the range if x_center is in it, and only the
+        branches that can hold overlapping intervals are visited.
+        """
+        if begin <= self.x_center < end:
+            result.update(self.s_center)
+        elif self.x_center < begin:
+            for k in self.s_center:
+                if k.end > begin:
+                    result.add(k)
+        else:
+            for k in self.s_center:
+                if k.begin < end:
+                    result.add(k)
+        if begin < self.x_center and self[0]:
+            self[0].search_range(begin, end, result)
+        if end > self.x_center and self[1]:
+            self[1].search_range(begin, end, result)
+        return result
+
+    def search_contained(self, begin, end, result):
+        """
+        Returns all intervals contained in [begin, end]. The intervals
+        of s_center contain x_center, the ones of the left branch end
+        by x_center and the ones of the right branch begin after it,
+        so only the nodes that can hold such intervals are visited.
+        """
+        if begin <= self.x_center < end:
+            for k in self.s_center:
+                if begin <= k.begin and k.end <= end:
+                    result.add(k)
+        if begin < self.x_center and self[0]:
+            self[0].search_contained(begin, end, result)
+        if end > self.x_center and self[1]:
+            self[1].search_contained(begin, end, result)
+        return result
+
     def prune(self):
         """
         On a subtree where the root node's s_center is empty,
@@ -8,23 +8,72 @@ import sys,os, time
 import tempfile
 import re
 try:
-    from .intervaltree import intervaltree
-    from .annotparser import AnnotParser
-    from .point import Point
+    from .annotstandalone import StandaloneAnnotParser
+    from .annotscanner import AnnotScanner, MappedAnnot, ANNOT_SUFFIXES, open_annot, iter_chunks
+    from .annotpool import ParserPool
+    from .annotindex import block_entries, make_entry, has_kind, entry_payload, PayloadTable, CharOffsets, BlockIndex, StaticIndex
+    from .annotcmt import cmt_records
+    from . import annotparallel
 except SystemError:
-    from intervaltree import intervaltree
-    from annotparser import AnnotParser
-    from point import Point
+    from annotstandalone import StandaloneAnnotParser
+    from annotscanner import AnnotScanner, MappedAnnot, ANNOT_SUFFIXES, open_annot, iter_chunks
+    from annotpool import ParserPool
+    from annotindex import block_entries, make_entry, has_kind, entry_payload, PayloadTable, CharOffsets, BlockIndex, StaticIndex
+    from annotcmt import cmt_records
+    import annotparallel
 
 try:
-    annot_parser
+    annot_pools
+    payload_table
+    source_offsets
     mlfitype_view_name
     mlfitype_panel_name
 except NameError:
-    annot_parser = AnnotParser(lex_optimize=True, yacc_debug=False, yacc_optimize=True)
+    # parsers are created on first use, see get_annot_pool()
+    annot_pools = {}
+    # payloads are shared by the trees of all annotation files
+    payload_table = PayloadTable()
+    # character offsets of the sources, see get_char_offsets()
+    source_offsets = {}
     mlfitype_view_name = "** mlfi types **"
     mlfitype_panel_name = 'mlfi_type_st3_output'
 
+def new_annot_parser(kind):
+    """ A new parser for the mlfi_annot_parser setting kind.
+        PLY is only imported when the "ply" parser is asked for.
+    """
+    if kind == 'ply':
+        try:
+            from .annotsinkparser import AnnotSinkParser
+        except SystemError:
+            from annotsinkparser import AnnotSinkParser
+        # the tables of the package are used as they are, the ones
+        # it lacks are built once in the cache
+        return AnnotSinkParser(None, yacc_debug=False, trusted=True,
+            tabcache=os.path.join(sublime.cache_path(), 'mlfi'))
+    elif kind == 'standalone':
+        return StandaloneAnnotParser()
+    else:
+        return AnnotScanner()
+
+def get_annot_pool(kind):
+    """ The pool of parsers for the mlfi_annot_parser setting kind.
+        Commands run in several threads, each parse takes its own
+        parser out of the pool.
+    """
+    if kind not in annot_pools:
+        annot_pools.setdefault(kind, ParserPool(lambda: new_annot_parser(kind)))
+    return annot_pools[kind]
+
+def get_char_offsets(filename):
+    """ The CharOffsets of the source file filename, only read again
+        when the file changes.
+    """
+    stamp = (os.path.getmtime(filename), os.path.getsize(filename))
+    if filename not in source_offsets or source_offsets[filename][0] != stamp:
+        source_offsets[filename] = (stamp, CharOffsets.of_file(filename))
+    return source_offsets[filename][1]
+
 class MlfiTypeCommand(sublime_plugin.TextCommand):
     def __init__(self, *args, **kwargs):
       super(MlfiTypeCommand, self).__init__(*args, **kwargs)
@@ -35,12 +84,15 @@ class MlfiTypeCommand(sublime_plugin.TextCommand):
       self.panel_name = mlfitype_panel_name
       self.settings = sublime.load_settings('mlfi.sublime-settings')
       self.single_result = self.settings.get('mlfi_type_single_result', True)
+      self.annot_parser = self.settings.get('mlfi_annot_parser', 'standalone')
+      self.parallel_threshold = self.settings.get('mlfi_parallel_threshold', 0)
+      self.read_cmt = self.settings.get('mlfi_read_cmt', False)
 
     def run(self, edit):
       queries = []
       
       for r in self.view.sel():
-        queries.append(tuple(map(self.__pos_to_point, [r.begin(), r.end()])))
+        queries.append((r.begin(), r.end()))
 
       filename = self.view.file_name()
       if filename == None:
@@ -51,23 +103,27 @@ class MlfiTypeCommand(sublime_plugin.TextCommand):
 
       msg = []
       try:
-        (tree, dirty) = self.__get_annot_tree(filename)
+        (tree, payload, dirty, skipped) = self.__get_annot_tree(filename)
         if dirty:
           msg += ["** {0} is newer than its annotation file **".format(os.path.basename(filename))]
+        if skipped:
+          msg += ["** {0} regions of {1} could not be read **".format(skipped, os.path.basename(os.path.splitext(filename)[0] + ".annot"))]
         
-        # sorting keys
-        numlines = lambda itv: itv.end - itv.begin
         # only sort by euclidean distance if we don't use strict range search
         # euc_dist = lambda s, e, i: s.euclidean_dist(i.begin) + e.euclidean_dist(i.end)
-        search_point = lambda s, e: sorted(tree[s], key=numlines)
-        search_range = lambda s, e: sorted(tree.search(s, e, strict=True), key=lambda i: (i.length(), -i.begin), reverse=True)
+        # the tree indexes every kind of annotation, only types are shown
+        typed = lambda itvs: [i for i in itvs if has_kind(i.data, "type")]
+        # spans are nested: the ones around a point are found from the
+        # innermost one outwards, already sorted by length
+        search_point = lambda s, e: typed(tree.enclosing(s))
+        search_range = lambda s, e: sorted(typed(tree.search(s, e, strict=True)), key=lambda i: (i.length(), -i.begin), reverse=True)
         searches = [search_range, search_point]
         results = [(searches[s == e](s,e), s == e) for (s,e) in queries]
         results = [(ts, b) for (ts, b) in results if ts]
         types = [ts[:1] if (b and self.single_result) else ts for (ts, b) in results]
 
         if any(types):
-          tmsg = [self.__mk_msg(ts) for ts in types]
+          tmsg = [self.__mk_msg(ts, payload) for ts in types]
           tmsg = filter(None, tmsg)
           msg += [("\n"*2+"-"*80+"\n"*2).join(tmsg)]
           fts = next(ts for ts in types if ts)
@@ -90,22 +146,17 @@ class MlfiTypeCommand(sublime_plugin.TextCommand):
         self.view.window().run_command('show_panel', { 'panel': 'output.' + self.panel_name })
 
     def __interval_to_region(self, itv):
-      start = self.view.text_point(itv.begin.x-1, itv.begin.y)
-      end = self.view.text_point(itv.end.x-1, itv.end.y)
-      return sublime.Region(start, end)
+      # the tree is keyed on the character offsets of the view
+      return sublime.Region(itv.begin, itv.end)
 
-    def __interval_to_msg(self, itv):
+    def __interval_to_msg(self, itv, payload):
       r = self.__interval_to_region(itv)
       expr = self.view.substr(r)
       row, col = self.view.rowcol(r.begin())
-      return "{0}\n{2}:{3} --> {1}".format(itv.data, expr, row + 1, col + 1)
+      return "{0}\n{2}:{3} --> {1}".format(payload(entry_payload(itv.data, "type")), expr, row + 1, col + 1)
 
-    def __mk_msg(self, types):
-      return "\n\n".join([self.__interval_to_msg(itv) for itv in types])
-
-    def __pos_to_point(self, pos):
-        (r, c) = self.view.rowcol(pos)
-        return Point(r+1, c)
+    def __mk_msg(self, types, payload):
+      return "\n\n".join([self.__interval_to_msg(itv, payload) for itv in types])
 
     def __get_mt(self, filename):
       return os.path.getmtime(filename)
@@ -115,49 +166,167 @@ class MlfiTypeCommand(sublime_plugin.TextCommand):
         raise ValueError("{0} not found.".format(filename))
 
       tag = os.path.splitext(filename)[0]
-      annot_file = tag + ".annot"
+      text_file = next((tag + s for s in ANNOT_SUFFIXES if os.path.isfile(tag + s)), None)
+      # the typed tree of the compiler, of the interface for .mfi
+      cmt_file = tag + (".cmti" if filename.endswith("i") else ".cmt")
+      if not (self.read_cmt and os.path.isfile(cmt_file)):
+        cmt_file = None
 
-      if not os.path.isfile(annot_file):
-        raise ValueError("{0} not found.".format(annot_file))
+      if text_file == None and cmt_file == None:
+        raise ValueError("{0} not found.".format(tag + ".annot"))
+      # the newer of the annotations and the typed tree is read
+      annot_file = text_file
+      if cmt_file and (text_file == None or self.__get_mt(cmt_file) > self.__get_mt(text_file)):
+        annot_file = cmt_file
+      # compressed files can only be read in order, by a single process,
+      # and they are not mapped
+      compressed = not annot_file.endswith(".annot")
       
       [fmt, amt] = map(self.__get_mt, [filename, annot_file])
       (tree, dirty) = (None, fmt > amt)
 
       # if we have a tree already
+      index = None
       if tag in self.trees:
-        (tree, mt) = self.trees[tag]
+        (tree, mt, payload, skipped, index, old_chars) = self.trees[tag]
         if mt >= amt:
-          return (tree, fmt > mt)
-      # make a new tree
-      annot = self.__read_file(annot_file)
+          return (tree, payload, fmt > mt, skipped)
+        del self.trees[tag]
+
+      mapped = None
+      # annotations give byte offsets, the view character offsets
+      chars = get_char_offsets(filename)
+      if index and chars != old_chars:
+        # the offsets of the blocks of the tree have moved
+        index = None
+      if annot_file == cmt_file:
+        try:
+          tree = self.__build_index(cmt_records(cmt_file), chars, payload_table.intern_entry)
+        except Exception as e:
+          # a typed tree of a compiler that is not supported, or one
+          # the reader gets wrong: the annotations are read instead
+          if text_file == None:
+            raise ValueError("Cannot read typed tree: {0}.".format(e))
+          print("{0}: {1}, reading {2}".format(cmt_file, e, text_file))
+          (annot_file, compressed) = (text_file, not text_file.endswith(".annot"))
+        else:
+          self.__cache_tree(tag, tree, amt, str, 0, None, chars)
+          return (tree, str, dirty, 0)
+      if (self.parallel_threshold and self.annot_parser != 'mmap' and not compressed and
+          os.path.getsize(annot_file) >= self.parallel_threshold * (1 << 20)):
+        # big files are parsed in a pool of processes, and parsed
+        # again in full when they change
+        (records, skipped) = annotparallel.parse_file(annot_file, self.annot_parser, resilient=True)
+        tree = self.__build_index(records, chars, payload_table.intern_entry)
+        self.__cache_tree(tag, tree, amt, str, skipped, None, chars)
+        return (tree, str, dirty, skipped)
+      if self.annot_parser == 'mmap' and not compressed:
+        # the file is only mapped while it is scanned, the tree keeps
+        # references to the payloads, read when shown
+        annot = mapped = self.__map_file(annot_file)
+      else:
+        # the blocks are indexed while the annotation file is read
+        annot = self.__open_file(annot_file)
       
       if annot == None:
         raise ValueError("Cannot read annotation file: {0}.".format(annot_file))
 
-      tree = intervaltree.IntervalTree() 
-      af = annot_parser.parse(annot, annot_file, debuglevel=0)
-      for b in af.blocks:
-        start = Point(b.start.line, b.start.column)
-        end = Point(b.end.line, b.end.column)
-        data = "\n".join([a.data for a in b.annotations if a.type == "type"])
-        if data:
-          tree[start:end] = data
+      # malformed blocks are skipped, and reported in run()
+      pool = get_annot_pool('scanner' if self.annot_parser == 'mmap' else self.annot_parser)
+      with pool.parser() as parser:
+        try:
+          if mapped:
+            blocks = parser.scan_mapped(mapped, annot_file, resilient=True)
+            (tree, index) = (self.__build_index(block_entries(blocks, mapped.join), chars), None)
+            skipped = parser.skipped_regions
+          else:
+            # only the blocks that changed since the tree was built
+            # are parsed, see BlockIndex, and their records patch the
+            # tree, see StaticIndex.patched
+            reindex = index != None
+            if not reindex:
+              index = BlockIndex()
+            (added, removed) = index.update(iter_chunks(annot),
+              lambda text: self.__parse_records(parser, text, annot_file))
+            if reindex:
+              tree = tree.patched(self.__index_records(added, chars), self.__index_records(removed, chars))
+            else:
+              tree = self.__build_index(added, chars)
+            skipped = index.skipped
+            if reindex:
+              print("{0}: {1} blocks reused, {2} parsed".format(annot_file, index.reused, index.parsed))
+        except:
+          annot.close()
+          raise
+      annot.close()
+      # the data of a tree are its payloads, unless the file is mapped
+      payload = mapped.payload if mapped else str
+      self.__cache_tree(tag, tree, amt, payload, skipped, index, chars)
+      return (tree, payload, dirty, skipped)
+
+    def __cache_tree(self, tag, tree, amt, payload, skipped, index, chars):
+      # the payload counts of a file are the ones of its last tree,
+      # references into a mapped file are not counted
       if tree:
-        self.trees[tag] = (tree, amt)
-      return (tree, dirty)
+        self.trees[tag] = (tree, amt, payload, skipped, index, chars)
+      if tree and payload is str:
+        payload_table.count(tag, tree.values())
+      else:
+        payload_table.forget(tag)
 
-    def __read_file(self, filename):
-      content = None
+    def __build_index(self, records, chars, intern=None):
+      # annotations are not modified once read, see StaticIndex
+      return StaticIndex(self.__index_records(records, chars, intern))
+
+    def __index_records(self, records, chars, intern=None):
+      # the records keyed on the character offsets of the view
+      if not chars.is_identity():
+        char = chars.char_offset
+        records = ((char(start), char(end), data) for (start, end, data) in records)
+      if intern:
+        records = ((start, end, intern(data)) for (start, end, data) in records)
+      return records
+
+    def __parse_records(self, parser, text, annot_file):
+      # the records of the blocks of text, with their payloads
+      # interned, and the regions skipped, see BlockIndex.update
+      intern = payload_table.intern_entry
+      if self.annot_parser != 'ply':
+        blocks = parser.parse(text, annot_file, resilient=True).blocks
+        return ([(start, end, intern(data)) for (start, end, data) in block_entries(blocks)], parser.skipped_regions)
+      # the sink parser builds no blocks: it gives the annotations one
+      # by one, and the payloads of a block are added together once
+      # the next block starts
+      records = []
+      block = [None, None, None, {}]
+      def add():
+        if block[3]:
+          records.append((block[1], block[2], intern(make_entry(block[3]))))
+      def on_block(sline, scol, eline, ecol, kind, payload, soffset, eoffset):
+        if block[0] != parser.block_count:
+          add()
+          block[:] = [parser.block_count, soffset, eoffset, {}]
+        block[3].setdefault(kind, []).append(payload)
+      parser.on_block = on_block
+      parser.parse(text, annot_file, resilient=True)
+      add()
+      return (records, parser.skipped_regions)
+
+    def __open_file(self, filename):
       f = None
       try:
-        f = open(filename, 'r')
-        content = f.read()
+        f = open_annot(filename)
+      except:
+        print("Cannot read annotation file: {0}".format(filename))
+      return f
+
+    def __map_file(self, filename):
+      mapped = None
+      try:
+        mapped = MappedAnnot(filename)
       except:
         print("Cannot read annotation file: {0}".format(filename))
-      finally:
-        if f:
-          f.close()
-      return content
+      return mapped
 
     def __append(self, view, text):
       view.set_syntax_file(self.type_syntax_file)
@@ -185,6 +354,17 @@ class MlfiTypeCommand(sublime_plugin.TextCommand):
       v.set_scratch(True)
       return v
 
+class MlfiPayloadStatsCommand(sublime_plugin.WindowCommand):
+    def run(self):
+      stats = payload_table.stats()
+      sublime.message_dialog("\n".join([
+        "Payloads read: {lookups}",
+        "Distinct payloads: {distinct}",
+        "Deduplication ratio: {ratio:.1f}",
+        "Payload bytes read: {total_bytes}",
+        "Bytes saved: {saved_bytes} ({0:.0f}%)"]).format(
+          100.0 * stats['saved_bytes'] / (stats['total_bytes'] or 1), **stats))
+
 class MlfiTypeNextType(sublime_plugin.TextCommand):
     def run(self, edit, forward = True, focus_code = False):
       window = self.view.window()
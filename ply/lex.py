@@ -67,6 +67,7 @@ class LexError(Exception):
 
 # Token class.  This class is used to represent the tokens produced.
 class LexToken(object):
+    __slots__ = ('type','value','lineno','lexpos','lexer')
     def __str__(self):
         return "LexToken(%s,%r,%d,%d)" % (self.type,self.value,self.lineno,self.lexpos)
     def __repr__(self):
@@ -105,6 +106,8 @@ class NullLogger(object):
 #
 #    input()          -  Store a new string in the lexer
 #    token()          -  Get the next token
+#    iter_tokens()    -  Iterate over the remaining tokens
+#    tokenize_all()   -  Get the list of the remaining tokens
 #    clone()          -  Clone the lexer
 #
 #    lineno           -  Current line number
@@ -163,6 +166,9 @@ class Lexer:
             for key, ef in self.lexstateerrorf.items():
                 c.lexstateerrorf[key] = getattr(object,ef.__name__)
             c.lexmodule = object
+            # the rules of the current state are bound to the old object
+            c.begin(c.lexstate)
+        c.lexstatestack = list(self.lexstatestack)
         return c
 
     # ------------------------------------------------------------
@@ -397,6 +403,105 @@ class Lexer:
              raise RuntimeError("No input string given with input()")
         return None
 
+    # ------------------------------------------------------------
+    # iter_tokens() - Iterate over the remaining tokens
+    #
+    # Gives the tokens token() would, from a single loop that keeps
+    # its state in local variables instead of one call per token.
+    # Rules may still change lexpos, lineno or the lexing state.
+    # The lexer must not be driven by other means meanwhile.
+    # ------------------------------------------------------------
+    def iter_tokens(self):
+        lexdata   = self.lexdata
+        if lexdata is None:
+             raise RuntimeError("No input string given with input()")
+        lexpos    = self.lexpos
+        lexlen    = self.lexlen
+        lexre     = self.lexre
+        lexignore = self.lexignore
+        optimize  = self.lexoptimize
+        _LexToken = LexToken
+
+        while lexpos < lexlen:
+            if lexdata[lexpos] in lexignore:
+                lexpos += 1
+                continue
+
+            for regex,lexindexfunc in lexre:
+                m = regex.match(lexdata,lexpos)
+                if not m: continue
+
+                tok = _LexToken()
+                tok.value = m.group()
+                tok.lineno = self.lineno
+                tok.lexpos = lexpos
+                func,tok.type = lexindexfunc[m.lastindex]
+
+                if not func:
+                    lexpos = m.end()
+                    if tok.type:
+                        self.lexpos = lexpos
+                        yield tok
+                    break
+
+                tok.lexer = self
+                self.lexmatch = m
+                self.lexpos = m.end()
+                newtok = func(tok)
+                lexpos = self.lexpos
+                if self.lexre is not lexre:
+                    # The rule changed the state
+                    lexre = self.lexre
+                    lexignore = self.lexignore
+
+                if newtok:
+                    if not optimize and not newtok.type in self.lextokens:
+                        raise LexError("%s:%d: Rule '%s' returned an unknown token type '%s'" % (
+                            func_code(func).co_filename, func_code(func).co_firstlineno,
+                            func.__name__, newtok.type),lexdata[lexpos:])
+                    yield newtok
+                break
+            else:
+                if lexdata[lexpos] in self.lexliterals:
+                    tok = _LexToken()
+                    tok.value = lexdata[lexpos]
+                    tok.lineno = self.lineno
+                    tok.type = tok.value
+                    tok.lexpos = lexpos
+                    lexpos += 1
+                    self.lexpos = lexpos
+                    yield tok
+                    continue
+
+                if self.lexerrorf:
+                    tok = _LexToken()
+                    tok.value = lexdata[lexpos:]
+                    tok.lineno = self.lineno
+                    tok.type = "error"
+                    tok.lexer = self
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos
+                    newtok = self.lexerrorf(tok)
+                    if lexpos == self.lexpos:
+                        raise LexError("Scanning error. Illegal character '%s'" % (lexdata[lexpos]), lexdata[lexpos:])
+                    lexpos = self.lexpos
+                    lexre = self.lexre
+                    lexignore = self.lexignore
+                    if newtok:
+                        yield newtok
+                    continue
+
+                self.lexpos = lexpos
+                raise LexError("Illegal character '%s' at index %d" % (lexdata[lexpos],lexpos), lexdata[lexpos:])
+
+        self.lexpos = lexpos
+
+    # ------------------------------------------------------------
+    # tokenize_all() - Return the list of the remaining tokens
+    # ------------------------------------------------------------
+    def tokenize_all(self):
+        return list(self.iter_tokens())
+
     # Iterator interface
     def __iter__(self):
         return self
@@ -862,7 +967,7 @@ class LexerReflect(object):
 #
 # Build all of the regular expression rules from definitions in the supplied module
 # -----------------------------------------------------------------------------
-def lex(module=None,object=None,debug=0,optimize=0,lextab="lextab",reflags=0,nowarn=0,outputdir="", debuglog=None, errorlog=None):
+def lex(module=None,object=None,debug=0,optimize=0,lextab="lextab",reflags=0,nowarn=0,outputdir="", debuglog=None, errorlog=None, trusted=0):
     global lexer
     ldict = None
     stateinfo  = { 'INITIAL' : 'inclusive'}
@@ -886,6 +991,19 @@ def lex(module=None,object=None,debug=0,optimize=0,lextab="lextab",reflags=0,now
     else:
         ldict = get_caller_module_dict(2)
 
+    # In trusted mode the lextab is used as it is, without collecting
+    # the rules.  The lexer is only built when it can't be read
+    if trusted and lextab:
+        try:
+            lexobj.readtab(lextab,ldict)
+            token = lexobj.token
+            input = lexobj.input
+            lexer = lexobj
+            return lexobj
+
+        except ImportError:
+            pass
+
     # Collect parser information from the dictionary
     linfo = LexerReflect(ldict,log=errorlog,reflags=reflags)
     linfo.get_all()
@@ -84,7 +84,7 @@ resultlimit = 40               # Size limit of results when running in debug mod
 
 pickle_protocol = 0            # Protocol to use when writing pickle files
 
-import re, types, sys, os.path
+import re, types, sys, os.path, functools, copy
 
 # Compatibility function for python 2.6/3.0
 if sys.version_info[0] < 3:
@@ -176,6 +176,7 @@ def format_stack_entry(r):
 #        .endlexpos  = Ending lex position (optional, set automatically)
 
 class YaccSymbol:
+    __slots__ = ('type','value','lineno','endlineno','lexpos','endlexpos','lexer')
     def __str__(self):    return self.type
     def __repr__(self):   return str(self)
 
@@ -189,6 +190,7 @@ class YaccSymbol:
 # representing the range of positional information for a symbol.
 
 class YaccProduction:
+    __slots__ = ('slice','stack','lexer','parser')
     def __init__(self,s,stack=None):
         self.slice = s
         self.stack = stack
@@ -242,6 +244,32 @@ class LRParser:
         self.action      = lrtab.lr_action
         self.goto        = lrtab.lr_goto
         self.errorfunc   = errorf
+        # (name, length, callable) of each production, for parseopt_notrack()
+        self.prodinfo    = [(p.name,p.len,p.callable) for p in self.productions]
+
+    # ------------------------------------------------------------
+    # clone() - Returns a parser sharing the parsing tables, for
+    #           parsing from another thread.  If object is given, the
+    #           grammar rules are rebound to its methods, like
+    #           Lexer.clone() does for the lexing rules.
+    # ------------------------------------------------------------
+    def clone(self,object=None):
+        c = LRParser.__new__(LRParser)
+        c.action    = self.action
+        c.goto      = self.goto
+        c.errorfunc = self.errorfunc
+        c.productions = self.productions
+        if object:
+            c.productions = []
+            for p in self.productions:
+                p = copy.copy(p)
+                if p.func:
+                    p.callable = getattr(object,p.func)
+                c.productions.append(p)
+            if self.errorfunc:
+                c.errorfunc = getattr(object,self.errorfunc.__name__)
+        c.prodinfo = [(p.name,p.len,p.callable) for p in c.productions]
+        return c
 
     def errok(self):
         self.errorok     = 1
@@ -254,7 +282,11 @@ class LRParser:
         self.symstack.append(sym)
         self.statestack.append(0)
 
-    def parse(self,input=None,lexer=None,debug=0,tracking=0,tokenfunc=None):
+    def parse(self,input=None,lexer=None,debug=0,tracking=0,tokenfunc=None,tokens=None):
+        # Tokens may also come as an iterable, such as Lexer.iter_tokens()
+        # or the list of Lexer.tokenize_all()
+        if tokens is not None:
+            tokenfunc = functools.partial(next,iter(tokens),None)
         if debug or yaccdevel:
             if isinstance(debug,int):
                 debug = PlyLogger(sys.stderr)
@@ -861,9 +893,11 @@ class LRParser:
     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
     # parseopt_notrack().
     #
-    # Optimized version of parseopt() with line number tracking removed. 
-    # DO NOT EDIT THIS CODE DIRECTLY. Copy the optimized version and remove
-    # code in the #--! TRACKING sections
+    # Optimized version of parseopt() with line number tracking removed,
+    # and tuned for large inputs: the productions are read from the
+    # prodinfo tuples, and both kinds of reductions share one code path.
+    # Error recovery is the one of parseopt(): changes made to it there
+    # must be made here too.
     # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 
     def parseopt_notrack(self,input=None,lexer=None,debug=0,tracking=0,tokenfunc=None):
@@ -871,7 +905,7 @@ class LRParser:
         lookaheadstack = [ ]             # Stack of lookahead symbols
         actions = self.action            # Local reference to action table (to avoid lookup on self.)
         goto    = self.goto              # Local reference to goto table (to avoid lookup on self.)
-        prod    = self.productions       # Local reference to production list (to avoid lookup on self.)
+        prodinfo = self.prodinfo         # Local reference to production tuples (to avoid lookup on self.)
         pslice  = YaccProduction(None)   # Production object passed to grammar rules
         errorcount = 0                   # Used during error recovery 
 
@@ -944,11 +978,8 @@ class LRParser:
 
                 if t < 0:
                     # reduce a symbol on the stack, emit a production
-                    p = prod[-t]
-                    pname = p.name
-                    plen  = p.len
+                    pname,plen,func = prodinfo[-t]
 
-                    # Get production function
                     sym = YaccSymbol()
                     sym.type = pname       # Production name
                     sym.value = None
@@ -956,64 +987,29 @@ class LRParser:
                     if plen:
                         targ = symstack[-plen-1:]
                         targ[0] = sym
-
-                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-                        # The code enclosed in this section is duplicated 
-                        # below as a performance optimization.  Make sure
-                        # changes get made in both locations.
-
-                        pslice.slice = targ
-                        
-                        try:
-                            # Call the grammar rule with our special slice object
-                            del symstack[-plen:]
-                            del statestack[-plen:]
-                            p.callable(pslice)
-                            symstack.append(sym)
-                            state = goto[statestack[-1]][pname]
-                            statestack.append(state)
-                        except SyntaxError:
-                            # If an error was set. Enter error recovery state
-                            lookaheadstack.append(lookahead)
-                            symstack.pop()
-                            statestack.pop()
-                            state = statestack[-1]
-                            sym.type = 'error'
-                            lookahead = sym
-                            errorcount = error_count
-                            self.errorok = 0
-                        continue
-                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-    
+                        del symstack[-plen:]
+                        del statestack[-plen:]
                     else:
-
                         targ = [ sym ]
+                    pslice.slice = targ
 
-                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-                        # The code enclosed in this section is duplicated 
-                        # above as a performance optimization.  Make sure
-                        # changes get made in both locations.
-
-                        pslice.slice = targ
-
-                        try:
-                            # Call the grammar rule with our special slice object
-                            p.callable(pslice)
-                            symstack.append(sym)
-                            state = goto[statestack[-1]][pname]
-                            statestack.append(state)
-                        except SyntaxError:
-                            # If an error was set. Enter error recovery state
-                            lookaheadstack.append(lookahead)
-                            symstack.pop()
-                            statestack.pop()
-                            state = statestack[-1]
-                            sym.type = 'error'
-                            lookahead = sym
-                            errorcount = error_count
-                            self.errorok = 0
-                        continue
-                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+                    try:
+                        # Call the grammar rule with our special slice object
+                        func(pslice)
+                        symstack.append(sym)
+                        state = goto[statestack[-1]][pname]
+                        statestack.append(state)
+                    except SyntaxError:
+                        # If an error was set. Enter error recovery state
+                        lookaheadstack.append(lookahead)
+                        symstack.pop()
+                        statestack.pop()
+                        state = statestack[-1]
+                        sym.type = 'error'
+                        lookahead = sym
+                        errorcount = error_count
+                        self.errorok = 0
+                    continue
 
                 if t == 0:
                     n = symstack[-1]
@@ -2543,6 +2539,8 @@ class LRGeneratedTable(LRTable):
     # -----------------------------------------------------------------------------
 
     def write_table(self,modulename,outputdir='',signature=""):
+        if isinstance(modulename,types.ModuleType):
+            return
         basemodulename = modulename.split(".")[-1]
         filename = os.path.join(outputdir,basemodulename) + ".py"
         try:
@@ -3035,7 +3033,7 @@ class ParserReflect(object):
 
 def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, start=None, 
          check_recursion=1, optimize=0, write_tables=1, debugfile=debug_file,outputdir='',
-         debuglog=None, errorlog = None, picklefile=None):
+         debuglog=None, errorlog = None, picklefile=None, trusted=0):
 
     global parse                 # Reference to the parsing method of the last built parser
 
@@ -3054,6 +3052,26 @@ def yacc(method='LALR', debug=yaccdebug, module=None, tabmodule=tab_module, star
     else:
         pdict = get_caller_module_dict(2)
 
+    # In trusted mode the tables are used as they are: the grammar is
+    # neither collected, signed nor validated.  The parser is only
+    # built (and written if write_tables is set) when they can't be read
+    if trusted:
+        try:
+            lr = LRTable()
+            if picklefile:
+                lr.read_pickle(picklefile)
+            else:
+                lr.read_table(tabmodule)
+            lr.bind_callables(pdict)
+            parser = LRParser(lr,pdict.get('p_error'))
+            parse = parser.parse
+            return parser
+        except VersionError:
+            e = sys.exc_info()
+            errorlog.warning(str(e))
+        except Exception:
+            pass
+
     # Collect parser information from the dictionary
     pinfo = ParserReflect(pdict,log=errorlog)
     pinfo.get_all()
@@ -7,6 +7,9 @@
 # Copyright (C) 2008-2012, Eli Bendersky
 # License: BSD
 #-----------------------------------------------------------------
+import importlib
+import os
+import types
 
 
 class Coord(object):
@@ -29,6 +32,40 @@ class Coord(object):
 class ParseError(Exception): pass
 
 
+def load_tables(name, package=None, cachedir=None, version=''):
+    """ Finds the PLY table module name for a trusted parser,
+        without importing it as a top-level module when package
+        is given, nor writing into the package:
+            - the module name of package, if it is there
+            - else its copy in cachedir, named name_version.py
+        Returns the module found, else the name to write the tables
+        under in cachedir (which is created), or None without a
+        cachedir.
+    """
+    try:
+        if package:
+            return importlib.import_module('.' + name, package)
+        return importlib.import_module(name)
+    except ImportError:
+        pass
+    if not cachedir:
+        return None
+    cached = '%s_%s' % (name, version) if version else name
+    path = os.path.join(cachedir, cached + '.py')
+    if os.path.exists(path):
+        module = types.ModuleType(cached)
+        try:
+            with open(path) as f:
+                exec(compile(f.read(), path, 'exec'), module.__dict__)
+            return module
+        except Exception:
+            # a broken copy is written again
+            pass
+    elif not os.path.isdir(cachedir):
+        os.makedirs(cachedir)
+    return cached
+
+
 class PLYParser(object):
     def _create_opt_rule(self, rulename):
         """ Given a rule name, creates an optional ply.yacc rule
@@ -44,9 +81,18 @@ class PLYParser(object):
         optrule.__name__ = 'p_%s' % optname
         setattr(self.__class__, optrule.__name__, optrule)
 
-    def _create_list_rule(self, rulename, delimiter='","',suffix='_list'):
+    def _create_list_rule(self, rulename, delimiter='","',suffix='_list',
+                          left_recursive=False):
         """ Given a rule name, creates an ply.yacc rule for a list.
             The name of the list-rule is <rulename>_list
+
+            left_recursive:
+                By default the list rule is right-recursive, which
+                copies the list on every reduction and keeps every
+                element on the LR stack until the end of the list.
+                When True, the rule is left-recursive and appends to
+                the list built so far, so a list of N elements is
+                built in O(N) time with a constant stack depth.
         """
         listname = rulename + suffix
 
@@ -57,11 +103,19 @@ class PLYParser(object):
         listrule_1.__name__ = 'p_%s_1' % listname
         setattr(self.__class__, listrule_1.__name__, listrule_1)
 
-        def listrule_2(self, p):
-            idx = (2 if delimiter == "" else 3)
-            p[0] = [p[1]] + p[idx]
+        if left_recursive:
+            def listrule_2(self, p):
+                idx = (2 if delimiter == "" else 3)
+                p[1].append(p[idx])
+                p[0] = p[1]
+
+            listrule_2.__doc__ = '%s : %s %s %s' % (listname, listname, delimiter, rulename)
+        else:
+            def listrule_2(self, p):
+                idx = (2 if delimiter == "" else 3)
+                p[0] = [p[1]] + p[idx]
 
-        listrule_2.__doc__ = '%s : %s %s %s' % (listname, rulename, delimiter, listname)
+            listrule_2.__doc__ = '%s : %s %s %s' % (listname, rulename, delimiter, listname)
         listrule_2.__name__ = 'p_%s_2' % listname
         setattr(self.__class__, listrule_2.__name__, listrule_2)
 
@@ -5,6 +5,8 @@ from math import sqrt
 
 class Point(namedtuple('PointBase', ['x', 'y'])):
     __slots__ = ()  # Saves memory, avoiding the need to create __dict__ for each interval
+    # equality, hashing and ordering (by x, then by y) are the ones of
+    # tuple, done in C: points are keys of the interval trees
 
     # def __new__(cls, x, y):
     #     return super(Point, cls).__new__(cls, x, y)
@@ -60,35 +62,6 @@ class Point(namedtuple('PointBase', ['x', 'y'])):
             return Point(self.x % other, self.y % other)
         else:
             return NotImplemented
-    def __eq__(self, other): 
-        if isinstance(other,type(self)):
-            return (self.x == other.x and self.y == other.y)
-        else:
-            return NotImplemented
-
-    def __cmp__(self, other):
-        def cmp(a, b):
-            return (a > b) - (a < b)
-        if isinstance(other,type(self)):
-            val = cmp(self.x, other.x)
-            if val == 0:
-                return cmp(self.y, other.y)
-            return val
-        else:
-            return NotImplemented
-
-    def __le__(self, other):
-        return self.__cmp__(other) <= 0
-
-    def __ge__(self, other):
-        return self.__cmp__(other) >= 0
-
-    def __lt__(self, other):
-        return self.__cmp__(other) < 0
-
-    def __gt__(self, other):
-        return self.__cmp__(other) > 0
-
     def __repr__(self):
         if isinstance(self.x, Number):
             s_x = str(self.x)
@@ -100,14 +73,6 @@ class Point(namedtuple('PointBase', ['x', 'y'])):
         
     __str__ = __repr__
 
-    def __hash__(self):
-        """
-        Depends on begin and end only.
-        :return: hash
-        :rtype: Number
-        """
-        return hash((self.x, self.y))
-
     def copy(self):
         """
         Shallow copy.